@@ -0,0 +1,271 @@
+"""
+Набор бенчмарков движка.
+
+Каждый бенчмарк — prepare(), который готовит входные данные (не
+замеряется) и возвращает замеряемую функцию; та делает пачку операций
+и возвращает их число. Все входы строятся из фиксированных seed'ов,
+поэтому между запусками и коммитами сравниваются одни и те же позиции.
+
+micro — отдельные функции ядра, macro — партии целиком.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from random import Random
+from typing import Callable, Dict, List, Optional, Tuple
+import copy
+
+from machi_core.actions import Action, ActionType
+from machi_core.agents import Agent, RandomBot
+from machi_core.bots.greedy_bot import GreedyBot
+from machi_core.cards import ESTABLISHMENT_IDS, CardVersion
+from machi_core.codec import decode_state, encode_state
+from machi_core.rules import _resolve_dice, apply_action, legal_actions, new_game, reset_game
+from machi_core.simulation import GamePool, play_game, step
+from machi_core.state import VICTORY_LANDMARKS, GameState, Phase
+
+
+ALL_VERSIONS = set(CardVersion)
+
+Batch = Callable[[], int]
+
+
+@dataclass
+class Case:
+    name: str
+    kind: str                        # "micro" | "macro"
+    prepare: Callable[[], Batch]
+    unit: str = "оп"
+
+
+CASES: Dict[str, Case] = {}
+
+
+def case(name: str, kind: str = "micro", unit: str = "оп"):
+    def register(prepare: Callable[[], Batch]) -> Callable[[], Batch]:
+        CASES[name] = Case(name, kind, prepare, unit)
+        return prepare
+    return register
+
+
+# ---- входные данные ----------------------------------------------------------------
+
+_positions_cache: Dict[Tuple[int, int], List[GameState]] = {}
+
+
+def positions(num_players: int, count: int = 2000, seed: int = 0) -> List[GameState]:
+    """Позиции из партий случайных ботов (все фазы, все наборы карт)."""
+    key = (num_players, seed)
+    cached = _positions_cache.get(key)
+    if cached is not None and len(cached) >= count:
+        return cached[:count]
+
+    rng = Random(seed)
+    result: List[GameState] = []
+    while len(result) < count:
+        state = new_game(num_players, ALL_VERSIONS, rng=rng)
+        bots = [RandomBot(seed=rng.randrange(2**31)) for _ in range(num_players)]
+        while not state.done and len(result) < count:
+            result.append(state.copy())
+            idx = state.current_player
+            state = step(state, bots[idx].select_action(state, idx), rng)
+    _positions_cache[key] = result
+    return result
+
+
+def heavy_state(num_players: int) -> GameState:
+    """
+    Все игроки с тремя копиями каждого предприятия и победными
+    достопримечательностями. Без сноса: он ломал бы достопримечательности,
+    и позиция менялась бы от прогона к прогону.
+    """
+    state = new_game(num_players, ALL_VERSIONS, rng=Random(0))
+    for p in state.players:
+        for card_id in ESTABLISHMENT_IDS:
+            if card_id != "building_demolition_company":
+                p.add_card(card_id, 3)
+        for landmark_id in VICTORY_LANDMARKS:
+            p.build_landmark(landmark_id)
+    return state
+
+
+_actions_cache: Dict[ActionType, List[Tuple[GameState, Action]]] = {}
+
+
+def with_action(action_type: ActionType, count: int = 1000) -> List[Tuple[GameState, Action]]:
+    """Позиции, где действие такого типа допустимо, и само действие."""
+    cached = _actions_cache.get(action_type)
+    if cached is not None:
+        return cached
+
+    rng = Random(1)
+    result: List[Tuple[GameState, Action]] = []
+    seed = 0
+    while len(result) < count:
+        for state in positions(4, seed=seed):
+            options = [a for a in legal_actions(state, state.current_player) if a.type == action_type]
+            if options:
+                result.append((state, rng.choice(options)))
+                if len(result) >= count:
+                    break
+        seed += 1
+    _actions_cache[action_type] = result
+    return result
+
+
+# ---- micro -------------------------------------------------------------------------
+
+def _new_game_case(num_players: int) -> Batch:
+    def run() -> int:
+        for i in range(2000):
+            new_game(num_players, ALL_VERSIONS, rng=Random(i))
+        return 2000
+    return run
+
+
+case("new_game/2p")(lambda: _new_game_case(2))
+case("new_game/4p")(lambda: _new_game_case(4))
+
+
+@case("reset_game/4p")
+def _reset_game() -> Batch:
+    state = new_game(4, ALL_VERSIONS, rng=Random(0))
+
+    def run() -> int:
+        for i in range(2000):
+            reset_game(state, ALL_VERSIONS, Random(i))
+        return 2000
+    return run
+
+
+def _legal_actions_case(phase: Phase) -> Batch:
+    states = [s for s in positions(4) if s.phase == phase]
+
+    def run() -> int:
+        for s in states:
+            legal_actions(s, s.current_player)
+        return len(states)
+    return run
+
+
+case("legal_actions/roll")(lambda: _legal_actions_case(Phase.ROLL))
+case("legal_actions/buy")(lambda: _legal_actions_case(Phase.BUY))
+
+
+def _apply_case(action_type: ActionType) -> Callable[[], Batch]:
+    def prepare() -> Batch:
+        # apply_action меняет состояние: каждый прогон на свежих копиях
+        items = with_action(action_type)
+        work = [(s.copy(), a) for s, a in items]
+        rng = Random(2)
+        dice = [rng.randint(1, 6) + (rng.randint(1, 6) if a.num_dice == 2 else 0) for _, a in items]
+
+        def run() -> int:
+            for (s, a), d in zip(work, dice):
+                apply_action(s, a, dice_value=d, rng=rng)
+            return len(work)
+        return run
+    return prepare
+
+
+for _action_type in ActionType:
+    case(f"apply_action/{_action_type.value}")(_apply_case(_action_type))
+
+
+def _resolve_case(num_players: int) -> Batch:
+    state = heavy_state(num_players)
+
+    def run() -> int:
+        rng = Random(3)
+        for p in state.players:
+            p.coins = 50
+        for i in range(1200):
+            state.current_player = i % num_players
+            state.last_roll = i % 12 + 1
+            _resolve_dice(state, rng)
+        return 1200
+    return run
+
+
+case("resolve_dice/heavy-2p")(lambda: _resolve_case(2))
+case("resolve_dice/heavy-4p")(lambda: _resolve_case(4))
+case("resolve_dice/heavy-6p")(lambda: _resolve_case(6))
+
+
+@case("state/copy")
+def _state_copy() -> Batch:
+    states = positions(4)
+
+    def run() -> int:
+        for s in states:
+            s.copy()
+        return len(states)
+    return run
+
+
+@case("state/deepcopy")
+def _state_deepcopy() -> Batch:
+    states = positions(4)
+
+    def run() -> int:
+        for s in states:
+            copy.deepcopy(s)
+        return len(states)
+    return run
+
+
+@case("state/encode")
+def _state_encode() -> Batch:
+    states = positions(4)
+
+    def run() -> int:
+        for s in states:
+            encode_state(s)
+        return len(states)
+    return run
+
+
+@case("state/decode")
+def _state_decode() -> Batch:
+    blobs = [encode_state(s) for s in positions(4)]
+
+    def run() -> int:
+        for b in blobs:
+            decode_state(b)
+        return len(blobs)
+    return run
+
+
+# ---- macro -------------------------------------------------------------------------
+
+def _games_case(make_agents: Callable[[int], List[Agent]], num_players: int, count: int) -> Batch:
+    def run() -> int:
+        agents = make_agents(num_players)   # свежие seed'ы агентов — те же партии
+        pool = GamePool()
+        for seed in range(count):
+            play_game(agents, seed, ALL_VERSIONS, pool=pool)
+        return count
+    return run
+
+
+def _random_agents(n: int) -> List[Agent]:
+    return [RandomBot(seed=i) for i in range(n)]
+
+
+def _greedy_agents(n: int) -> List[Agent]:
+    return [GreedyBot(seed=i) for i in range(n)]
+
+
+case("game/random-2p", "macro", "партия")(lambda: _games_case(_random_agents, 2, 300))
+case("game/random-4p", "macro", "партия")(lambda: _games_case(_random_agents, 4, 200))
+case("game/greedy-4p", "macro", "партия")(lambda: _games_case(_greedy_agents, 4, 50))
+
+
+def select(patterns: Optional[List[str]] = None, kind: Optional[str] = None) -> List[Case]:
+    """Бенчмарки, в имени которых есть хоть одна из подстрок."""
+    return [
+        c for c in CASES.values()
+        if (kind is None or c.kind == kind)
+        and (not patterns or any(p in c.name for p in patterns))
+    ]
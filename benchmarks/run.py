@@ -0,0 +1,213 @@
+"""
+Запуск бенчмарков движка и сравнение с историей.
+
+    python benchmarks/run.py run                      # всё, запись в историю
+    python benchmarks/run.py run -k resolve -k copy --label "до правки"
+    python benchmarks/run.py compare                  # последний запуск против предыдущего
+    python benchmarks/run.py compare --base 0 --threshold 0.05
+    python benchmarks/run.py list
+
+История — JSON-список запусков (benchmarks/history.json по умолчанию).
+Для каждого бенчмарка хранится лучшее и медианное время на операцию;
+сравниваются лучшие: они меньше всего шумят. compare завершается
+с кодом 1, если что-то замедлилось больше чем на threshold. Запуски
+на разных машинах или версиях Python несравнимы: такое сравнение
+печатается с предупреждением и регрессий не находит, а run сравнивает
+новый запуск с последним из того же окружения.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+import argparse
+import gc
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from benchmarks.cases import CASES, Case, select
+from machi_core import profiling, tracing
+from machi_core.checkpoint import atomic_write_json, read_json
+
+
+DEFAULT_HISTORY = os.path.join(ROOT, "benchmarks", "history.json")
+DEFAULT_THRESHOLD = 0.10
+# поля запуска, без совпадения которых времена не сравнить
+ENVIRONMENT_KEYS = ("machine", "python")
+
+
+def measure(case: Case, repeat: int) -> Dict[str, Any]:
+    """repeat прогонов; каждый на свежих входах из prepare()."""
+    per_op: List[float] = []
+    ops = 0
+    for _ in range(repeat):
+        run = case.prepare()
+        gc.collect()
+        gc.disable()
+        try:
+            t0 = time.perf_counter_ns()
+            ops = run()
+            elapsed = time.perf_counter_ns() - t0
+        finally:
+            gc.enable()
+        per_op.append(elapsed / ops)
+    return {
+        "kind": case.kind,
+        "unit": case.unit,
+        "ops": ops,
+        "best_ns": min(per_op),
+        "median_ns": statistics.median(per_op),
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT, capture_output=True, text=True, timeout=10,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def _format_time(ns: float) -> str:
+    if ns >= 1e6:
+        return f"{ns / 1e6:9.2f} мс"
+    if ns >= 1e3:
+        return f"{ns / 1e3:9.2f} мкс"
+    return f"{ns:9.0f} нс"
+
+
+def load_history(path: str) -> List[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return []
+    return read_json(path)
+
+
+def run_cases(cases: List[Case], repeat: int, label: Optional[str]) -> Dict[str, Any]:
+    results: Dict[str, Any] = {}
+    for case in cases:
+        row = measure(case, repeat)
+        results[case.name] = row
+        line = f"{case.name:<28} {_format_time(row['best_ns'])}/{case.unit}"
+        if case.kind == "macro":
+            line += f"   ({1e9 / row['best_ns']:8.1f} {case.unit}/с)"
+        print(line, flush=True)
+    return {
+        "label": label,
+        "time": datetime.now().isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def environment_diff(base: Dict[str, Any], head: Dict[str, Any]) -> List[str]:
+    """Чем отличаются окружения двух запусков ("machine: x86_64 -> arm64")."""
+    return [
+        f"{key}: {base.get(key)} -> {head.get(key)}"
+        for key in ENVIRONMENT_KEYS
+        if base.get(key) != head.get(key)
+    ]
+
+
+def compare(base: Dict[str, Any], head: Dict[str, Any], threshold: float) -> List[str]:
+    """Печатает таблицу сравнения; возвращает имена регрессий."""
+    def title(entry: Dict[str, Any]) -> str:
+        return entry.get("label") or entry.get("commit") or entry["time"]
+
+    print(f"база: {title(base)} ({base['time']})   новое: {title(head)} ({head['time']})")
+    diff = environment_diff(base, head)
+    if diff:
+        print(f"внимание: разные окружения ({', '.join(diff)}) — времена несравнимы, регрессии не ищем")
+    regressions: List[str] = []
+    for name, row in head["results"].items():
+        old = base["results"].get(name)
+        if old is None:
+            print(f"{name:<28} {'—':>12} {_format_time(row['best_ns'])}   новый")
+            continue
+        change = row["best_ns"] / old["best_ns"] - 1
+        mark = ""
+        if change > threshold and not diff:
+            mark = "  РЕГРЕССИЯ"
+            regressions.append(name)
+        elif change < -threshold and not diff:
+            mark = "  быстрее"
+        print(
+            f"{name:<28} {_format_time(old['best_ns'])} {_format_time(row['best_ns'])}"
+            f"   {change:+7.1%}{mark}"
+        )
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Бенчмарки движка")
+    parser.add_argument("--history", default=DEFAULT_HISTORY)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_run = sub.add_parser("run", help="замерить и записать в историю")
+    p_run.add_argument("-k", dest="patterns", action="append", help="подстрока имени (можно несколько)")
+    p_run.add_argument("--kind", choices=("micro", "macro"))
+    p_run.add_argument("--repeat", type=int, default=5)
+    p_run.add_argument("--label")
+    p_run.add_argument("--no-save", action="store_true")
+    p_run.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+
+    p_cmp = sub.add_parser("compare", help="сравнить два запуска из истории")
+    p_cmp.add_argument("--base", type=int, default=-2, help="номер запуска в истории (по умолчанию предпоследний)")
+    p_cmp.add_argument("--head", type=int, default=-1, help="номер запуска в истории (по умолчанию последний)")
+    p_cmp.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+
+    sub.add_parser("list", help="бенчмарки и запуски в истории")
+
+    args = parser.parse_args(argv)
+    history = load_history(args.history)
+    # MACHI_PROFILE / MACHI_TRACE — счётчики горячих функций и спаны за весь
+    # прогон; замеры с ними медленнее, поэтому такой запуск в историю не пишется
+    profiled = profiling.enable_from_env() is not None
+    profiled |= tracing.enable_from_env() is not None
+
+    if args.command == "list":
+        for case in CASES.values():
+            print(f"{case.kind:<6} {case.name}")
+        for i, entry in enumerate(history):
+            print(f"#{i:<3} {entry['time']}  {entry.get('commit') or '-':<10} {entry.get('label') or ''}")
+        return 0
+
+    if args.command == "run":
+        cases = select(args.patterns, args.kind)
+        if not cases:
+            parser.error("ни один бенчмарк не подходит")
+        entry = run_cases(cases, args.repeat, args.label)
+        # сравниваем с последним запуском из того же окружения
+        previous = next((e for e in reversed(history) if not environment_diff(e, entry)), None)
+        if not args.no_save and not profiled:
+            history.append(entry)
+            atomic_write_json(args.history, history)
+        if previous is None:
+            return 0
+        print()
+        regressions = compare(previous, entry, args.threshold)
+    else:
+        if len(history) < 2:
+            parser.error("в истории меньше двух запусков")
+        regressions = compare(history[args.base], history[args.head], args.threshold)
+
+    if regressions:
+        print(f"\nзамедлилось больше чем на {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,10 +5,13 @@ import os
 sys.path.append(os.path.abspath(".."))
 
 from PySide6.QtWidgets import QApplication
+from machi_core import profiling, tracing
 from ui.main_window import MainWindow
 
 
 def main():
+    profiling.enable_from_env()
+    tracing.enable_from_env()
     app = QApplication(sys.argv)
 
     window = MainWindow()
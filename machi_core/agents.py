@@ -2,22 +2,171 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
-from typing import Optional, List
+from typing import Iterator, Optional, List
+import copy
 import random
+import threading
+import time
 
 from .state import GameState
 from .actions import Action, ActionType
 from .rules import legal_actions
+from . import tracing
+
+
+def deadline_after(seconds: Optional[float]) -> Optional[float]:
+    """
+    Дедлайн через seconds секунд от текущего момента.
+
+    Дедлайн — абсолютное значение time.monotonic(); None — без ограничения.
+    """
+    if seconds is None:
+        return None
+    return time.monotonic() + seconds
+
+
+def deadline_passed(deadline: Optional[float]) -> bool:
+    return deadline is not None and time.monotonic() >= deadline
 
 
 class Agent(ABC):
     """Базовый интерфейс агента (человек / бот / RL и т.п.)."""
 
     @abstractmethod
-    def select_action(self, state: GameState, player_index: int) -> Action:
-        """Выбрать одно допустимое действие для игрока."""
+    def select_action(
+        self,
+        state: GameState,
+        player_index: int,
+        deadline: Optional[float] = None,
+    ) -> Action:
+        """
+        Выбрать одно допустимое действие для игрока.
+
+        deadline — момент time.monotonic(), к которому нужно ответить
+        (см. deadline_after). Простые агенты могут его игнорировать.
+        """
+        raise NotImplementedError
+
+
+class AnytimeAgent(Agent):
+    """
+    Агент, который «думает» итерациями и в любой момент может отдать
+    лучший найденный ход (поиск, MCTS и т.п.).
+
+    Наследник реализует think(): генератор, который выдаёт всё более
+    хорошие действия. Между yield'ами проверяется отмена и дедлайн,
+    поэтому один шаг генератора должен быть коротким.
+
+    Два режима:
+      - select_action(state, idx, deadline) — блокирующий, думает
+        в вызывающем потоке до дедлайна или до конца генератора;
+      - start_thinking / poll / stop — фоновый поток; вызывающий
+        (UI, сервер) сам решает, когда забрать ход.
+    """
+
+    def __init__(self) -> None:
+        self._best: Optional[Action] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._thinking_state: Optional[GameState] = None
+        self._thinking_player: int = 0
+
+    @abstractmethod
+    def think(self, state: GameState, player_index: int) -> Iterator[Action]:
+        """Генератор лучших-на-данный-момент действий."""
         raise NotImplementedError
 
+    def _run(
+        self,
+        state: GameState,
+        player_index: int,
+        deadline: Optional[float],
+        stop_event: Optional[threading.Event],
+    ) -> None:
+        with tracing.inside_decision():
+            for action in self.think(state, player_index):
+                self._best = action
+                if stop_event is not None and stop_event.is_set():
+                    break
+                if deadline_passed(deadline):
+                    break
+
+    def _fallback(self, state: GameState, player_index: int) -> Action:
+        """Ход, если ничего не придумали: ничего не тратить (END_BUY), бросить один кубик."""
+        actions = legal_actions(state, player_index)
+        if not actions:
+            raise RuntimeError("У бота нет допустимых действий")
+        for action in actions:
+            if action.type == ActionType.END_BUY:
+                return action
+            if action.type == ActionType.ROLL and action.num_dice == 1:
+                return action
+        return actions[0]
+
+    def select_action(
+        self,
+        state: GameState,
+        player_index: int,
+        deadline: Optional[float] = None,
+    ) -> Action:
+        self._best = None
+        self._run(state, player_index, deadline, None)
+        best = self._best
+        self._best = None
+        if best is None:
+            return self._fallback(state, player_index)
+        return best
+
+    # ---- фоновый режим -----------------------------------------------------
+
+    def start_thinking(
+        self,
+        state: GameState,
+        player_index: int,
+        deadline: Optional[float] = None,
+    ) -> None:
+        """
+        Начать думать в фоновом потоке.
+
+        Состояние копируется, так что вызывающий может дальше его менять.
+        """
+        if self.is_thinking():
+            self.stop()
+
+        self._best = None
+        self._stop_event = threading.Event()
+        self._thinking_state = copy.deepcopy(state)
+        self._thinking_player = player_index
+        self._thread = threading.Thread(
+            target=self._run,
+            args=(self._thinking_state, player_index, deadline, self._stop_event),
+            daemon=True,
+        )
+        self._thread.start()
+
+    def is_thinking(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def poll(self) -> Optional[Action]:
+        """Лучший найденный ход (или None, если ещё ничего нет)."""
+        return self._best
+
+    def stop(self) -> Action:
+        """Остановить размышления и вернуть лучший найденный ход."""
+        if self._thread is None or self._thinking_state is None:
+            raise RuntimeError("stop() без start_thinking()")
+
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+
+        best = self._best
+        self._best = None
+        if best is None:
+            best = self._fallback(self._thinking_state, self._thinking_player)
+        self._thinking_state = None
+        return best
+
 
 class RandomBot(Agent):
     """Простой бот: *адекватный* рандом, без мысли.
@@ -31,7 +180,12 @@ class RandomBot(Agent):
     def __init__(self, seed: Optional[int] = None) -> None:
         self._rng = random.Random(seed)
 
-    def select_action(self, state: GameState, player_index: int) -> Action:
+    def select_action(
+        self,
+        state: GameState,
+        player_index: int,
+        deadline: Optional[float] = None,
+    ) -> Action:
         actions: List[Action] = legal_actions(state, player_index)
         if not actions:
             raise RuntimeError("У бота нет допустимых действий")
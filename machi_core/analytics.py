@@ -0,0 +1,327 @@
+"""
+Потоковая аналитика по картам.
+
+Принимает поток GameResult (генератор, список — неважно) и копит
+только счётчики, поэтому память не зависит от числа партий:
+    - частота покупок каждой карты;
+    - доля побед игроков, купивших карту X не позже раунда T;
+    - гистограмма длины партий (в бросках);
+    - преимущество места (доля побед по местам).
+Всё разбито по группам (число игроков, набор версий карт).
+
+Агрегаты складываются (merge) и переводятся в JSON (to_dict/from_dict),
+так что шарды, посчитанные в разных процессах или на разных машинах,
+объединяются без исходных партий. analyze_games делает это сам:
+каждый воркер считает свой диапазон партий и возвращает агрегат.
+
+Раунд — круг ходов всех игроков: покупка после броска номер t
+относится к раунду (t - 1) // num_players + 1.
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from functools import partial
+from random import Random
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+import json
+
+from .cards import CardVersion
+from .checkpoint import JobCheckpoint, atomic_write_json
+from .simulation import (
+    DEFAULT_MAX_TURNS,
+    AgentSpec,
+    GameResult,
+    build_agents,
+    game_seed,
+    play_game,
+    run_parallel,
+)
+
+
+DEFAULT_BY_ROUNDS: Tuple[int, ...] = (4, 8, 12)
+
+GroupKey = Tuple[int, str]   # (число игроков, cards.versions_key)
+
+
+def round_of(turn: int, num_players: int) -> int:
+    return (max(turn, 1) - 1) // num_players + 1
+
+
+class GroupStats:
+    """Счётчики одной группы партий."""
+
+    def __init__(self, num_players: int, by_rounds: Sequence[int] = DEFAULT_BY_ROUNDS) -> None:
+        self.num_players = num_players
+        self.by_rounds = tuple(by_rounds)
+        self.games = 0
+        self.decided = 0
+        self.seat_wins = [0] * num_players
+        self.lengths: Counter = Counter()        # бросков -> партий
+        self.purchases: Counter = Counter()      # card_id -> покупок
+        self.bought: Counter = Counter()         # card_id -> (партия, игрок), где куплена
+        self.owned: Counter = Counter()          # (card_id, T) -> (партия, игрок)
+        self.owned_wins: Counter = Counter()     # (card_id, T) -> из них побед
+
+    def add(self, result: GameResult) -> None:
+        n = self.num_players
+        self.games += 1
+        self.lengths[result.turns] += 1
+        if result.winner is not None:
+            self.decided += 1
+            self.seat_wins[result.winner] += 1
+
+        first_round: List[Dict[str, int]] = [{} for _ in range(n)]
+        for turn, player, card_id in result.purchases:
+            self.purchases[card_id] += 1
+            first_round[player].setdefault(card_id, round_of(turn, n))
+
+        for player, cards in enumerate(first_round):
+            won = result.winner == player
+            for card_id, r in cards.items():
+                self.bought[card_id] += 1
+                for t in self.by_rounds:
+                    if r <= t:
+                        self.owned[card_id, t] += 1
+                        self.owned_wins[card_id, t] += won
+
+    def merge(self, other: "GroupStats") -> None:
+        if other.num_players != self.num_players or other.by_rounds != self.by_rounds:
+            raise ValueError("Разные группы или разные by_rounds")
+        self.games += other.games
+        self.decided += other.decided
+        self.seat_wins = [a + b for a, b in zip(self.seat_wins, other.seat_wins)]
+        self.lengths.update(other.lengths)
+        self.purchases.update(other.purchases)
+        self.bought.update(other.bought)
+        self.owned.update(other.owned)
+        self.owned_wins.update(other.owned_wins)
+
+    # ---- производные величины ---------------------------------------------
+
+    def seat_win_rates(self) -> List[float]:
+        return [w / self.games if self.games else 0.0 for w in self.seat_wins]
+
+    def purchase_rate(self, card_id: str) -> float:
+        """Сколько раз карту покупают в среднем за партию одним игроком."""
+        player_games = self.games * self.num_players
+        return self.purchases[card_id] / player_games if player_games else 0.0
+
+    def win_rate_if_owned(self, card_id: str, by_round: int) -> Optional[float]:
+        """Доля побед игроков, купивших карту не позже раунда by_round."""
+        owners = self.owned[card_id, by_round]
+        return self.owned_wins[card_id, by_round] / owners if owners else None
+
+    def mean_length(self) -> float:
+        if not self.games:
+            return 0.0
+        return sum(t * c for t, c in self.lengths.items()) / self.games
+
+    # ---- сериализация ------------------------------------------------------
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "num_players": self.num_players,
+            "by_rounds": list(self.by_rounds),
+            "games": self.games,
+            "decided": self.decided,
+            "seat_wins": self.seat_wins,
+            "lengths": {str(k): v for k, v in self.lengths.items()},
+            "purchases": dict(self.purchases),
+            "bought": dict(self.bought),
+            "owned": {f"{c}@{t}": v for (c, t), v in self.owned.items()},
+            "owned_wins": {f"{c}@{t}": v for (c, t), v in self.owned_wins.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "GroupStats":
+        stats = cls(data["num_players"], data["by_rounds"])
+        stats.games = data["games"]
+        stats.decided = data["decided"]
+        stats.seat_wins = list(data["seat_wins"])
+        stats.lengths = Counter({int(k): v for k, v in data["lengths"].items()})
+        stats.purchases = Counter(data["purchases"])
+        stats.bought = Counter(data["bought"])
+        for name in ("owned", "owned_wins"):
+            counter: Counter = Counter()
+            for key, v in data[name].items():
+                card_id, _, t = key.rpartition("@")
+                counter[card_id, int(t)] = v
+            setattr(stats, name, counter)
+        return stats
+
+
+class CardAnalytics:
+    """
+    Агрегаты по всем группам. add/consume — по одной партии из потока.
+    """
+
+    def __init__(self, by_rounds: Sequence[int] = DEFAULT_BY_ROUNDS) -> None:
+        self.by_rounds = tuple(by_rounds)
+        self.groups: Dict[GroupKey, GroupStats] = {}
+
+    def group(self, num_players: int, versions: str) -> GroupStats:
+        key = (num_players, versions)
+        stats = self.groups.get(key)
+        if stats is None:
+            stats = self.groups[key] = GroupStats(num_players, self.by_rounds)
+        return stats
+
+    def add(self, result: GameResult) -> None:
+        self.group(result.num_players, result.versions).add(result)
+
+    def consume(self, results: Iterable[GameResult]) -> "CardAnalytics":
+        for result in results:
+            self.add(result)
+        return self
+
+    def merge(self, other: "CardAnalytics") -> "CardAnalytics":
+        for (num_players, versions), stats in other.groups.items():
+            self.group(num_players, versions).merge(stats)
+        return self
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "by_rounds": list(self.by_rounds),
+            "groups": [
+                {"versions": versions, **stats.to_dict()}
+                for (_, versions), stats in sorted(self.groups.items())
+            ],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CardAnalytics":
+        analytics = cls(data["by_rounds"])
+        for group in data["groups"]:
+            stats = GroupStats.from_dict(group)
+            analytics.groups[stats.num_players, group["versions"]] = stats
+        return analytics
+
+    def save(self, path: str) -> None:
+        atomic_write_json(path, self.to_dict(), indent=None)
+
+    @classmethod
+    def load(cls, path: str) -> "CardAnalytics":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+    def format_report(self, min_owners: int = 30) -> str:
+        lines: List[str] = []
+        for (num_players, versions), stats in sorted(self.groups.items()):
+            lines.append(
+                f"{num_players} игр., {versions}: партий {stats.games}, "
+                f"с победителем {stats.decided}, средняя длина {stats.mean_length():.1f} бросков"
+            )
+            seats = ", ".join(f"{i}: {r:.3f}" for i, r in enumerate(stats.seat_win_rates()))
+            lines.append(f"  победы по местам: {seats}")
+
+            header = "  карта                      покупок/игрока " + " ".join(
+                f"побед<=р{t:<3}" for t in self.by_rounds
+            )
+            lines.append(header)
+            for card_id, _ in stats.purchases.most_common():
+                cells = []
+                for t in self.by_rounds:
+                    rate = stats.win_rate_if_owned(card_id, t)
+                    if rate is None or stats.owned[card_id, t] < min_owners:
+                        cells.append(f"{'—':<10}")
+                    else:
+                        cells.append(f"{rate:<10.3f}")
+                lines.append(
+                    f"  {card_id:<26} {stats.purchase_rate(card_id):<14.3f} " + " ".join(cells)
+                )
+        return "\n".join(lines)
+
+
+# ---- прогон партий -------------------------------------------------------------
+
+
+def iter_games(
+    specs: Sequence[AgentSpec],
+    game_ids: Iterable[int],
+    base_seed: int = 0,
+    allowed_versions: set[CardVersion] | None = None,
+    max_turns: int = DEFAULT_MAX_TURNS,
+) -> Iterator[GameResult]:
+    """Партии по номерам, по одной (в текущем процессе)."""
+    for game_id in game_ids:
+        seed = game_seed(base_seed, game_id)
+        yield play_game(
+            build_agents(specs, seed), seed, allowed_versions, max_turns, record_purchases=True,
+        )
+
+
+def _analyze_range(
+    bounds: Tuple[int, int],
+    specs: Sequence[AgentSpec],
+    base_seed: int,
+    allowed_versions: set[CardVersion] | None,
+    max_turns: int,
+    by_rounds: Sequence[int],
+) -> Dict[str, Any]:
+    start, stop = bounds
+    games = iter_games(specs, range(start, stop), base_seed, allowed_versions, max_turns)
+    return CardAnalytics(by_rounds).consume(games).to_dict()
+
+
+def analyze_games(
+    specs: Sequence[AgentSpec],
+    num_games: int,
+    base_seed: int = 0,
+    allowed_versions: set[CardVersion] | None = None,
+    max_turns: int = DEFAULT_MAX_TURNS,
+    by_rounds: Sequence[int] = DEFAULT_BY_ROUNDS,
+    workers: Optional[int] = None,
+    games_per_task: int = 1000,
+    analytics: Optional[CardAnalytics] = None,
+    checkpoint_path: Optional[str] = None,
+    checkpoint_every: float = 30.0,
+) -> CardAnalytics:
+    """
+    Сыграть num_games партий на пуле процессов и собрать аналитику.
+    Воркер возвращает агрегат своего диапазона партий, а не партии.
+    analytics — добавить к уже накопленному (те же by_rounds).
+
+    checkpoint_path — периодически сохранять агрегат и номер следующей
+    партии; при повторном запуске с тем же путём прогон продолжается
+    (analytics тогда берётся из чекпоинта).
+    """
+    if analytics is None:
+        analytics = CardAnalytics(by_rounds)
+
+    first = 0
+    checkpoint: Optional[JobCheckpoint] = None
+    if checkpoint_path is not None:
+        config = {
+            "specs": [spec.to_dict() for spec in specs],
+            "base_seed": base_seed,
+            "versions": sorted(v.value for v in allowed_versions or ()),
+            "max_turns": max_turns,
+            "by_rounds": list(analytics.by_rounds),
+        }
+        checkpoint = JobCheckpoint(checkpoint_path, config, checkpoint_every)
+        if checkpoint.resumed:
+            first = checkpoint.next_game
+            analytics = CardAnalytics.from_dict(checkpoint.payload)
+        # чекпоинт всегда пишется с агрегатом, даже если партий не осталось
+        checkpoint.update(first, analytics.to_dict)
+
+    ranges = [
+        (start, min(start + games_per_task, num_games))
+        for start in range(first, num_games, games_per_task)
+    ]
+    worker = partial(
+        _analyze_range,
+        specs=list(specs),
+        base_seed=base_seed,
+        allowed_versions=allowed_versions,
+        max_turns=max_turns,
+        by_rounds=analytics.by_rounds,
+    )
+    for (_, stop), shard in zip(ranges, run_parallel(worker, ranges, workers)):
+        analytics.merge(CardAnalytics.from_dict(shard))
+        if checkpoint is not None:
+            checkpoint.update(stop, analytics.to_dict)
+    if checkpoint is not None:
+        checkpoint.save()
+    return analytics
@@ -0,0 +1,233 @@
+"""
+Арена состояний в общей памяти.
+
+Много состояний в компактной форме (codec.py) в слотах фиксированного
+размера внутри одного multiprocessing.shared_memory. Процессы пишут и
+читают состояния по номеру слота, без pickle и без пересылки: корень
+поиска публикует позицию один раз, N воркеров читают её из общей памяти.
+
+Слот:
+    Q  счётчик версий (seqlock: нечётный — идёт запись)
+    I  длина данных
+    ...данные codec.encode_state
+
+Счётчик читается и пишется одним выровненным 8-байтовым словом
+(memoryview.cast("Q")): struct.pack_into пишет его по байту, и читатель
+мог бы увидеть половину старого и половину нового значения.
+
+Писатель у слота должен быть один (обычно владелец слота), читателей
+сколько угодно: чтение повторяется, если во время него слот переписали.
+
+    arena = StateArena.create(slots=64)
+    arena.put(0, state)
+    # в воркере:
+    arena = StateArena.attach(name)
+    state = arena.get(0)
+"""
+
+from __future__ import annotations
+
+from functools import partial
+from multiprocessing import shared_memory
+from random import Random
+from typing import List, Optional, Sequence, Tuple
+import multiprocessing
+import struct
+
+from .actions import Action
+from .agents import RandomBot
+from .codec import decode_state, encode_state
+from .simulation import play_game, step
+from .state import GameState
+
+
+# с запасом для 6 игроков и всех версий карт (закодированная позиция — до ~330 байт);
+# не влезшее состояние put не пишет, а бросает SlotOverflow
+DEFAULT_SLOT_SIZE = 512
+
+_SLOT_HEADER = struct.Struct("<QI")
+_LENGTH = struct.Struct("<I")
+
+
+class SlotOverflow(ValueError):
+    """Состояние не помещается в слот."""
+
+
+class StateArena:
+    """
+    Набор слотов в общей памяти. Создатель арены отвечает за unlink().
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, slots: int, slot_size: int, owner: bool) -> None:
+        self.shm = shm
+        self.slots = slots
+        self.slot_size = slot_size
+        self.owner = owner
+        self._buf = shm.buf
+        # счётчики версий слотов: слот начинается на границе 8 байт
+        self._words = shm.buf.cast("Q")
+
+    @classmethod
+    def create(cls, slots: int, slot_size: int = DEFAULT_SLOT_SIZE) -> "StateArena":
+        if slot_size % 8:
+            raise ValueError(f"Размер слота должен быть кратен 8: {slot_size}")
+        # в начале буфера — число слотов и их размер, чтобы attach знал раскладку
+        shm = shared_memory.SharedMemory(create=True, size=8 + slots * slot_size)
+        struct.pack_into("<II", shm.buf, 0, slots, slot_size)
+        shm.buf[8:8 + slots * slot_size] = bytes(slots * slot_size)
+        return cls(shm, slots, slot_size, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> "StateArena":
+        shm = shared_memory.SharedMemory(name=name)
+        slots, slot_size = struct.unpack_from("<II", shm.buf, 0)
+        return cls(shm, slots, slot_size, owner=False)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def _offset(self, slot: int) -> int:
+        if not 0 <= slot < self.slots:
+            raise IndexError(slot)
+        return 8 + slot * self.slot_size
+
+    # ---- запись / чтение ---------------------------------------------------
+
+    def put_bytes(self, slot: int, data: bytes) -> None:
+        if len(data) > self.slot_size - _SLOT_HEADER.size:
+            raise SlotOverflow(f"{len(data)} байт не помещаются в слот {self.slot_size}")
+        offset = self._offset(slot)
+        word = offset // 8
+        seq = self._words[word]
+        self._words[word] = seq + 1
+        _LENGTH.pack_into(self._buf, offset + 8, len(data))
+        start = offset + _SLOT_HEADER.size
+        self._buf[start:start + len(data)] = data
+        self._words[word] = seq + 2
+
+    def put(self, slot: int, state: GameState) -> None:
+        self.put_bytes(slot, encode_state(state))
+
+    def view(self, slot: int) -> Tuple[int, memoryview]:
+        """(версия, данные) без копирования; версия нечётная — слот пишется."""
+        offset = self._offset(slot)
+        seq = self._words[offset // 8]
+        # посреди записи длина может быть чужой: не выходим за слот
+        length = min(_LENGTH.unpack_from(self._buf, offset + 8)[0], self.slot_size - _SLOT_HEADER.size)
+        start = offset + _SLOT_HEADER.size
+        return seq, self._buf[start:start + length]
+
+    def get(self, slot: int) -> Optional[GameState]:
+        """Состояние из слота или None, если слот пуст."""
+        offset = self._offset(slot)
+        while True:
+            seq, data = self.view(slot)
+            if seq == 0:
+                return None
+            if seq % 2:
+                continue
+            try:
+                state = decode_state(data)
+            except (ValueError, IndexError, KeyError, struct.error):
+                state = None   # слот переписали посреди чтения
+            finally:
+                data.release()
+            if self._words[offset // 8] == seq and state is not None:
+                return state
+
+    def version(self, slot: int) -> int:
+        return self._words[self._offset(slot) // 8]
+
+    # ---- жизненный цикл ----------------------------------------------------
+
+    def close(self) -> None:
+        self._words.release()
+        self._words = None
+        self._buf = None
+        self.shm.close()
+
+    def unlink(self) -> None:
+        self.shm.unlink()
+
+    def __enter__(self) -> "StateArena":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+        if self.owner:
+            self.unlink()
+
+
+# ---- параллельные rollout'ы --------------------------------------------------------
+
+_worker_arena: Optional[StateArena] = None
+
+
+def _attach_worker(name: str) -> None:
+    global _worker_arena
+    _worker_arena = StateArena.attach(name)
+
+
+def _rollout_task(
+    item: Tuple[int, int],
+    actions: Sequence[Action],
+    player_index: int,
+    max_turns: int,
+) -> Tuple[int, float]:
+    action_idx, seed = item
+    assert _worker_arena is not None
+    sim = _worker_arena.get(0)
+    rng = Random(seed)
+    # порядок колоды игроку не виден: доигрываем со случайной его версией (как MonteCarloBot)
+    sim.market.deck = sim.market.deck.shuffled(rng)
+    sim = step(sim, actions[action_idx], rng)
+    policies = [RandomBot(seed=seed)] * len(sim.players)
+    play_game(policies, seed=seed, max_turns=max_turns, state=sim)
+    return action_idx, 1.0 if sim.winner == player_index else 0.0
+
+
+class RolloutPool:
+    """
+    Пул процессов для rollout'ов от общей позиции: позиция пишется
+    в арену один раз на решение, задачи — только (номер действия, seed).
+    """
+
+    def __init__(self, workers: Optional[int] = None, slot_size: int = DEFAULT_SLOT_SIZE) -> None:
+        self.arena = StateArena.create(1, slot_size)
+        self.pool = multiprocessing.Pool(workers, initializer=_attach_worker, initargs=(self.arena.name,))
+
+    def evaluate(
+        self,
+        state: GameState,
+        player_index: int,
+        actions: Sequence[Action],
+        rollouts_per_action: int,
+        seed: int = 0,
+        max_turns: int = 60,
+    ) -> List[float]:
+        """Доля побед player_index после каждого действия."""
+        self.arena.put(0, state)
+        rng = Random(seed)
+        items = [
+            (i, rng.randrange(2**31))
+            for _ in range(rollouts_per_action)
+            for i in range(len(actions))
+        ]
+        task = partial(_rollout_task, actions=list(actions), player_index=player_index, max_turns=max_turns)
+        wins = [0.0] * len(actions)
+        for i, win in self.pool.imap_unordered(task, items, chunksize=16):
+            wins[i] += win
+        return [w / rollouts_per_action for w in wins]
+
+    def close(self) -> None:
+        self.pool.close()
+        self.pool.join()
+        self.arena.close()
+        self.arena.unlink()
+
+    def __enter__(self) -> "RolloutPool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
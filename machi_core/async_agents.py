@@ -0,0 +1,198 @@
+"""
+Асинхронные агенты.
+
+Здесь:
+    - интерфейс AsyncAgent (async select_action);
+    - обёртки, превращающие обычный Agent в AsyncAgent
+      (через thread/process executor или фоновое мышление AnytimeAgent);
+    - прогон партий в одном asyncio-цикле.
+
+Один цикл может вести много партий сразу: пока один агент думает
+(поиск, внешний процесс, человек по сокету), остальные партии идут.
+"""
+
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from concurrent.futures import Executor, ProcessPoolExecutor
+from random import Random
+from typing import Callable, List, Optional, Sequence, Tuple
+import asyncio
+
+from .actions import Action, ActionType
+from .agents import Agent, AnytimeAgent, deadline_after, deadline_passed
+from .cards import CardVersion, versions_key
+from .rules import new_game
+from .simulation import DEFAULT_MAX_TURNS, GameResult, step
+from .state import GameState
+
+
+class AsyncAgent(ABC):
+    """Асинхронный аналог Agent."""
+
+    @abstractmethod
+    async def select_action(
+        self,
+        state: GameState,
+        player_index: int,
+        deadline: Optional[float] = None,
+    ) -> Action:
+        """Выбрать одно допустимое действие, не блокируя цикл событий."""
+        raise NotImplementedError
+
+
+def _select_in_process(
+    agent: Agent,
+    state: GameState,
+    player_index: int,
+    deadline: Optional[float],
+) -> Tuple[Action, Agent]:
+    # В процессе работает копия агента — возвращаем её вместе с ходом,
+    # чтобы не потерять внутреннее состояние (RNG и т.п.)
+    action = agent.select_action(state, player_index, deadline)
+    return action, agent
+
+
+class ExecutorAgent(AsyncAgent):
+    """
+    Синхронный Agent, который думает в executor'е.
+
+    executor=None — пул потоков цикла по умолчанию.
+    ProcessPoolExecutor — агент и состояние пиклятся на каждый ход,
+    агент должен быть picklable.
+    """
+
+    def __init__(self, agent: Agent, executor: Optional[Executor] = None) -> None:
+        self.agent = agent
+        self.executor = executor
+
+    async def select_action(
+        self,
+        state: GameState,
+        player_index: int,
+        deadline: Optional[float] = None,
+    ) -> Action:
+        loop = asyncio.get_running_loop()
+
+        if isinstance(self.executor, ProcessPoolExecutor):
+            action, self.agent = await loop.run_in_executor(
+                self.executor, _select_in_process,
+                self.agent, state, player_index, deadline,
+            )
+            return action
+
+        return await loop.run_in_executor(
+            self.executor, self.agent.select_action,
+            state, player_index, deadline,
+        )
+
+
+class AnytimeAsyncAgent(AsyncAgent):
+    """
+    AnytimeAgent, который думает в своём фоновом потоке;
+    цикл только периодически проверяет, не пора ли забрать ход.
+    """
+
+    def __init__(self, agent: AnytimeAgent, poll_interval: float = 0.01) -> None:
+        self.agent = agent
+        self.poll_interval = poll_interval
+
+    async def select_action(
+        self,
+        state: GameState,
+        player_index: int,
+        deadline: Optional[float] = None,
+    ) -> Action:
+        self.agent.start_thinking(state, player_index, deadline)
+        try:
+            while self.agent.is_thinking() and not deadline_passed(deadline):
+                await asyncio.sleep(self.poll_interval)
+        finally:
+            # stop() ждёт поток агента (join), пока генератор не дойдёт до yield:
+            # ждём в executor'е, чтобы не стояли остальные партии цикла
+            loop = asyncio.get_running_loop()
+            action = await loop.run_in_executor(None, self.agent.stop)
+        return action
+
+
+def as_async(agent: Agent | AsyncAgent, executor: Optional[Executor] = None) -> AsyncAgent:
+    """
+    Привести любого агента к AsyncAgent.
+
+    AnytimeAgent без явного executor'а думает в своём потоке,
+    остальные — в executor'е.
+    """
+    if isinstance(agent, AsyncAgent):
+        return agent
+    if isinstance(agent, AnytimeAgent) and executor is None:
+        return AnytimeAsyncAgent(agent)
+    return ExecutorAgent(agent, executor)
+
+
+async def play_game_async(
+    agents: Sequence[AsyncAgent],
+    seed: Optional[int] = None,
+    allowed_versions: set[CardVersion] | None = None,
+    max_turns: int = DEFAULT_MAX_TURNS,
+    move_time: Optional[float] = None,
+    record_purchases: bool = False,
+) -> GameResult:
+    """
+    Асинхронный аналог simulation.play_game.
+    """
+    rng = Random(seed)
+    state = new_game(len(agents), allowed_versions, rng=rng)
+
+    turns = 0
+    actions = 0
+    purchases: List[Tuple[int, int, str]] = []
+
+    while not state.done and turns < max_turns:
+        idx = state.current_player
+        action = await agents[idx].select_action(state, idx, deadline_after(move_time))
+
+        if action.type == ActionType.ROLL:
+            turns += 1
+        elif record_purchases and action.card_id is not None:
+            purchases.append((turns, idx, action.card_id))
+
+        state = step(state, action, rng)
+        actions += 1
+
+    return GameResult(
+        seed=seed,
+        num_players=len(state.players),
+        winner=state.winner,
+        turns=turns,
+        actions=actions,
+        versions=versions_key(allowed_versions),
+        purchases=purchases,
+    )
+
+
+async def play_games_async(
+    make_agents: Callable[[int], Sequence[AsyncAgent]],
+    seeds: Sequence[int],
+    allowed_versions: set[CardVersion] | None = None,
+    max_turns: int = DEFAULT_MAX_TURNS,
+    move_time: Optional[float] = None,
+    concurrency: int = 100,
+    record_purchases: bool = False,
+) -> List[GameResult]:
+    """
+    Сыграть партии по seeds одновременно в текущем цикле.
+
+    make_agents(seed) создаёт агентов для одной партии
+    (у каждого стола свои агенты). concurrency — сколько столов
+    идёт одновременно.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(seed: int) -> GameResult:
+        async with semaphore:
+            return await play_game_async(
+                make_agents(seed), seed, allowed_versions, max_turns, move_time,
+                record_purchases,
+            )
+
+    return list(await asyncio.gather(*(one(seed) for seed in seeds)))
@@ -0,0 +1,127 @@
+# machi_core/bots/greedy_bot.py
+from __future__ import annotations
+
+from dataclasses import dataclass, fields
+from typing import List, Optional, Sequence
+import random
+
+from ..state import GameState, PlayerState
+from ..actions import Action, ActionType
+from ..agents import Agent
+from ..cards import P_ONE_DIE, P_TWO_DICE, CardColor, get_card_def
+from ..rules import legal_actions
+
+
+@dataclass
+class GreedyWeights:
+    """
+    Численные веса эвристики GreedyBot (их подбирает tuning).
+    """
+    income: float = 1.0             # ценность 1 монеты ожидаемого дохода за круг
+    cost: float = 0.15              # штраф за каждую потраченную монету
+    red: float = 1.0                # множители по цветам карт
+    green: float = 1.0
+    blue: float = 1.0
+    landmark: float = 3.0           # срочность достопримечательности
+    landmark_cost: float = 0.05     # штраф за цену достопримечательности
+    end_buy: float = -1.0           # ценность «ничего не покупать» (копить обычно хуже)
+    two_dice: float = 0.0           # склонность бросать 2 кубика при вокзале
+
+    @classmethod
+    def names(cls) -> List[str]:
+        return [f.name for f in fields(cls)]
+
+    def to_vector(self) -> List[float]:
+        return [getattr(self, name) for name in self.names()]
+
+    @classmethod
+    def from_vector(cls, values: Sequence[float]) -> "GreedyWeights":
+        return cls(**dict(zip(cls.names(), values)))
+
+
+def _activation_chance(numbers: Sequence[int], two_dice: bool) -> float:
+    table = P_TWO_DICE if two_dice else P_ONE_DIE
+    return sum(table.get(n, 0.0) for n in numbers)
+
+
+class GreedyBot(Agent):
+    """Жадный бот: оценивает каждое действие линейной эвристикой.
+
+    Ценность предприятия — ожидаемый доход за круг (с учётом того,
+    в чьи ходы срабатывает цвет) минус штраф за цену.
+    Достопримечательности получают отдельный бонус срочности.
+    """
+
+    def __init__(
+        self,
+        weights: Optional[GreedyWeights] = None,
+        seed: Optional[int] = None,
+    ) -> None:
+        self.weights = weights or GreedyWeights()
+        self._rng = random.Random(seed)
+
+    def _card_income(self, card_id: str, num_players: int, two_dice: bool) -> float:
+        """Ожидаемый доход от одной копии карты за круг."""
+        w = self.weights
+        card_def = get_card_def(card_id)
+        chance = _activation_chance(card_def.activation_numbers, two_dice)
+
+        if card_def.color == CardColor.RED:
+            # срабатывает в ходы соперников
+            return w.red * chance * card_def.income * (num_players - 1)
+        if card_def.color == CardColor.GREEN:
+            return w.green * chance * card_def.income
+        if card_def.color == CardColor.BLUE:
+            return w.blue * chance * card_def.income * num_players
+        return 0.0
+
+    def _own_income(self, player: PlayerState, two_dice: bool) -> float:
+        total = 0.0
+        for card_id, count in player.establishments.items():
+            card_def = get_card_def(card_id)
+            if card_def.color in (CardColor.GREEN, CardColor.BLUE):
+                chance = _activation_chance(card_def.activation_numbers, two_dice)
+                total += chance * card_def.income * count
+        return total
+
+    def score(self, state: GameState, player_index: int, action: Action) -> float:
+        w = self.weights
+        player = state.players[player_index]
+        num_players = len(state.players)
+        two_dice = player.has_built("train_station")
+
+        if action.type == ActionType.ROLL:
+            if action.num_dice == 1:
+                return 0.0
+            gain = self._own_income(player, True) - self._own_income(player, False)
+            return w.two_dice + w.income * gain
+
+        if action.type == ActionType.END_BUY:
+            return w.end_buy
+
+        card_def = get_card_def(action.card_id)
+
+        if action.type == ActionType.BUILD_LANDMARK:
+            return w.landmark - w.landmark_cost * card_def.cost
+
+        if action.type == ActionType.BUY_CARD:
+            income = self._card_income(action.card_id, num_players, two_dice)
+            return w.income * income - w.cost * card_def.cost
+
+        return 0.0
+
+    def select_action(
+        self,
+        state: GameState,
+        player_index: int,
+        deadline: Optional[float] = None,
+    ) -> Action:
+        actions: List[Action] = legal_actions(state, player_index)
+        if not actions:
+            raise RuntimeError("У бота нет допустимых действий")
+
+        scores = [self.score(state, player_index, a) for a in actions]
+        best = max(scores)
+        # равные по оценке — случайно, чтобы бот не был полностью предсказуем
+        candidates = [a for a, s in zip(actions, scores) if s == best]
+        return self._rng.choice(candidates)
@@ -0,0 +1,135 @@
+# machi_core/bots/mc_bot.py
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Iterator, List, Optional
+import copy
+import random
+
+from ..state import VICTORY_LANDMARKS, GameState
+from ..cards import get_card_def
+from ..actions import Action
+from ..agents import AnytimeAgent, RandomBot
+from ..rules import legal_actions
+from ..simulation import play_game, step
+from ..endgame import EndgameSolver, EndgameTooLarge, remaining_cost, solvable
+
+if TYPE_CHECKING:
+    from ..opening_book import OpeningBook
+
+
+# до победы осталась одна достопримечательность, хоть самая дорогая
+DEFAULT_ENDGAME_THRESHOLD = max(get_card_def(landmark_id).cost for landmark_id in VICTORY_LANDMARKS)
+
+
+class MonteCarloBot(AnytimeAgent):
+    """Поисковый бот: плоский Монте-Карло.
+
+    Каждое допустимое действие по очереди доигрывается случайными
+    партиями (RandomBot за всех), выбирается действие с лучшей долей
+    побед. После каждого круга rollout'ов отдаёт текущий лучший ход,
+    поэтому его можно остановить в любой момент.
+
+    Если передана дебютная книга, в дебюте ход берётся из неё без поиска
+    (таблица — по числу игроков и версиям карт партии).
+    Когда кому-то до победы осталось вложить не больше endgame_threshold
+    монет (по умолчанию — одна любая недостроенная достопримечательность),
+    ход считает точный решатель эндшпиля; None — не использовать решатель.
+    Решатель берётся только в партиях не больше чем на endgame_max_players
+    игроков: с тремя и больше дерево обычно не влезает в endgame_max_nodes,
+    и неудачная попытка стоит дороже самого поиска.
+    """
+
+    def __init__(
+        self,
+        max_rollouts: int = 400,
+        rollout_turns: int = 60,
+        seed: Optional[int] = None,
+        opening_book: Optional["OpeningBook"] = None,
+        endgame_threshold: Optional[int] = DEFAULT_ENDGAME_THRESHOLD,
+        endgame_max_players: int = 2,
+        endgame_horizon: int = 8,
+        endgame_max_nodes: int = 20_000,
+    ) -> None:
+        super().__init__()
+        self.max_rollouts = max_rollouts    # всего rollout'ов на одно решение
+        self.rollout_turns = rollout_turns  # глубина одного rollout'а (в бросках)
+        self._rng = random.Random(seed)
+        self._policy = RandomBot(seed=self._rng.randrange(2**31))
+        self.opening_book = opening_book
+        self.endgame_threshold = endgame_threshold
+        self.endgame_max_players = endgame_max_players
+        self.endgame_horizon = endgame_horizon
+        self.endgame_max_nodes = endgame_max_nodes
+        self._solver: Optional[EndgameSolver] = None
+        self._solver_failed = False   # позиция с этими предприятиями не влезла в max_nodes
+
+    def _endgame_move(self, state: GameState, player_index: int) -> Optional[Action]:
+        if (
+            self.endgame_threshold is None
+            or len(state.players) > self.endgame_max_players
+            or not solvable(state)
+        ):
+            return None
+        closest = min(remaining_cost(state, i) for i in range(len(state.players)))
+        if closest > self.endgame_threshold:
+            return None
+
+        # кэш решателя живёт, пока у игроков не меняются предприятия
+        if self._solver is None or not self._solver.matches(state):
+            self._solver = EndgameSolver(
+                state, horizon=self.endgame_horizon, max_nodes=self.endgame_max_nodes,
+            )
+            self._solver_failed = False
+        elif self._solver_failed:
+            # до смены предприятий не пересчитывать позицию, которая уже не влезла
+            return None
+        try:
+            return self._solver.best_action(state, player_index)
+        except EndgameTooLarge:
+            self._solver_failed = True
+            return None
+
+    def _rollout(self, state: GameState, player_index: int, action: Action) -> float:
+        sim = copy.deepcopy(state)
+        # порядок колоды игроку не виден: доигрываем со случайной его версией
+        sim.market.deck = sim.market.deck.shuffled(self._rng)
+        sim = step(sim, action, self._rng)
+
+        policies = [self._policy] * len(sim.players)
+        seed = self._rng.randrange(2**31)
+        play_game(policies, seed=seed, max_turns=self.rollout_turns, state=sim)
+
+        if sim.winner is None:
+            return 0.0
+        return 1.0 if sim.winner == player_index else 0.0
+
+    def think(self, state: GameState, player_index: int) -> Iterator[Action]:
+        actions: List[Action] = legal_actions(state, player_index)
+        if not actions:
+            return
+
+        if self.opening_book is not None:
+            book_move = self.opening_book.lookup(state, player_index)
+            if book_move is not None:
+                yield book_move
+                return
+
+        endgame_move = self._endgame_move(state, player_index)
+        if endgame_move is not None:
+            yield endgame_move
+            return
+
+        # Сразу есть что отдать — ход RandomBot'а
+        yield self._policy.select_action(state, player_index)
+        if len(actions) == 1:
+            return
+
+        wins = [0.0] * len(actions)
+        rounds = max(1, self.max_rollouts // len(actions))
+
+        for _ in range(rounds):
+            for i, action in enumerate(actions):
+                wins[i] += self._rollout(state, player_index, action)
+
+            best = max(range(len(actions)), key=lambda i: wins[i])
+            yield actions[best]
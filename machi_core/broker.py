@@ -0,0 +1,176 @@
+"""
+Брокер решений: батчевая оценка политики для многих партий сразу.
+
+Партии (в одном asyncio-цикле) отдают брокеру запросы (state, player),
+брокер копит их в батч до max_batch штук или max_latency секунд
+и один раз вызывает векторную политику на весь батч.
+
+Политика — любой callable (obs[B, OBS_SIZE], mask[B, NUM_ACTIONS]) -> индексы
+действий [B]. Есть готовые линейная и MLP-политики на NumPy.
+
+Требует NumPy.
+"""
+
+from __future__ import annotations
+
+from typing import Callable, List, Optional, Sequence, Tuple
+import asyncio
+
+import numpy as np
+
+from .actions import Action
+from .async_agents import AsyncAgent
+from .encoding import NUM_ACTIONS, OBS_SIZE, encode_observation, index_action, legal_mask
+from .state import GameState
+
+
+BatchPolicy = Callable[[np.ndarray, np.ndarray], np.ndarray]
+
+
+def masked_argmax(scores: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """Лучшее допустимое действие в каждой строке."""
+    return np.where(mask, scores, -np.inf).argmax(axis=1)
+
+
+class LinearPolicy:
+    """Линейный скорер: scores = obs @ W + b."""
+
+    def __init__(self, weights: np.ndarray, bias: Optional[np.ndarray] = None) -> None:
+        if weights.shape != (OBS_SIZE, NUM_ACTIONS):
+            raise ValueError(f"Ожидались веса формы {(OBS_SIZE, NUM_ACTIONS)}, а не {weights.shape}")
+        self.weights = weights.astype(np.float32)
+        self.bias = np.zeros(NUM_ACTIONS, dtype=np.float32) if bias is None else bias.astype(np.float32)
+
+    @classmethod
+    def random(cls, seed: Optional[int] = None, scale: float = 0.1) -> "LinearPolicy":
+        rng = np.random.default_rng(seed)
+        return cls(rng.normal(0.0, scale, size=(OBS_SIZE, NUM_ACTIONS)))
+
+    def __call__(self, obs: np.ndarray, mask: np.ndarray) -> np.ndarray:
+        return masked_argmax(obs @ self.weights + self.bias, mask)
+
+
+class MLPPolicy:
+    """Многослойный перцептрон с ReLU на скрытых слоях."""
+
+    def __init__(self, layers: Sequence[Tuple[np.ndarray, np.ndarray]]) -> None:
+        if layers[0][0].shape[0] != OBS_SIZE or layers[-1][0].shape[1] != NUM_ACTIONS:
+            raise ValueError("Первый слой должен принимать OBS_SIZE, последний — отдавать NUM_ACTIONS")
+        self.layers = [(w.astype(np.float32), b.astype(np.float32)) for w, b in layers]
+
+    @classmethod
+    def random(
+        cls,
+        hidden: Sequence[int] = (64,),
+        seed: Optional[int] = None,
+    ) -> "MLPPolicy":
+        rng = np.random.default_rng(seed)
+        sizes = [OBS_SIZE, *hidden, NUM_ACTIONS]
+        layers = []
+        for n_in, n_out in zip(sizes, sizes[1:]):
+            w = rng.normal(0.0, 1.0 / np.sqrt(n_in), size=(n_in, n_out))
+            layers.append((w, np.zeros(n_out)))
+        return cls(layers)
+
+    def __call__(self, obs: np.ndarray, mask: np.ndarray) -> np.ndarray:
+        x = obs
+        for w, b in self.layers[:-1]:
+            x = np.maximum(x @ w + b, 0.0)
+        w, b = self.layers[-1]
+        return masked_argmax(x @ w + b, mask)
+
+
+class DecisionBroker:
+    """
+    Собирает запросы решений в батчи и вызывает политику один раз на батч.
+
+    Батч отправляется, когда набралось max_batch запросов или
+    с первого запроса прошло max_latency секунд.
+    Работает в одном asyncio-цикле (см. play_games_async).
+    """
+
+    def __init__(
+        self,
+        policy: BatchPolicy,
+        max_batch: int = 256,
+        max_latency: float = 0.002,
+    ) -> None:
+        self.policy = policy
+        self.max_batch = max_batch
+        self.max_latency = max_latency
+
+        self._obs = np.zeros((max_batch, OBS_SIZE), dtype=np.float32)
+        self._mask = np.zeros((max_batch, NUM_ACTIONS), dtype=bool)
+        self._pending: List[asyncio.Future] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+        # статистика
+        self.num_batches = 0
+        self.num_decisions = 0
+
+    async def decide(self, state: GameState, player_index: int) -> Action:
+        """Поставить запрос в батч и дождаться решения."""
+        loop = asyncio.get_running_loop()
+
+        row = len(self._pending)
+        encode_observation(state, player_index, out=self._obs[row])
+        legal_mask(state, player_index, out=self._mask[row])
+
+        future = loop.create_future()
+        self._pending.append(future)
+
+        if len(self._pending) >= self.max_batch:
+            self.flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_latency, self.flush)
+
+        return await future
+
+    def flush(self) -> None:
+        """Отправить накопленный батч в политику прямо сейчас."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        n = len(self._pending)
+        if n == 0:
+            return
+
+        pending = self._pending
+        self._pending = []
+
+        try:
+            choices = self.policy(self._obs[:n], self._mask[:n])
+        except Exception as ex:
+            for future in pending:
+                if not future.done():
+                    future.set_exception(ex)
+            return
+
+        self.num_batches += 1
+        self.num_decisions += n
+
+        for future, index in zip(pending, choices):
+            if not future.done():
+                future.set_result(index_action(int(index)))
+
+    @property
+    def mean_batch_size(self) -> float:
+        if self.num_batches == 0:
+            return 0.0
+        return self.num_decisions / self.num_batches
+
+
+class BrokerAgent(AsyncAgent):
+    """AsyncAgent, который отдаёт решения брокеру."""
+
+    def __init__(self, broker: DecisionBroker) -> None:
+        self.broker = broker
+
+    async def select_action(
+        self,
+        state: GameState,
+        player_index: int,
+        deadline: Optional[float] = None,
+    ) -> Action:
+        return await self.broker.decide(state, player_index)
@@ -7,7 +7,7 @@
 
 from __future__ import annotations
 
-from typing import List, Dict
+from typing import AbstractSet, List, Dict
 from enum import Enum
 from dataclasses import dataclass
 import os
@@ -124,6 +124,43 @@ def get_card_def(card_id: str) -> CardDef:
     return CARDS[card_id]
 
 
+# Порядковые номера карт (ordinal): порядок как в cards.json.
+# Нужны для компактных кодировок (массивы вместо словарей по id).
+CARD_IDS: List[str] = list(CARDS)
+CARD_INDEX: Dict[str, int] = {card_id: i for i, card_id in enumerate(CARD_IDS)}
+
+ESTABLISHMENT_IDS: List[str] = [
+    card_id for card_id in CARD_IDS
+    if CARDS[card_id].card_type == CardType.ESTABLISHMENT
+]
+LANDMARK_IDS: List[str] = [
+    card_id for card_id in CARD_IDS
+    if CARDS[card_id].card_type == CardType.LANDMARK
+]
+
+
+def versions_key(allowed_versions: AbstractSet[CardVersion] | None) -> str:
+    """Набор версий карт строкой, например "normal+plus"."""
+    versions = allowed_versions or {CardVersion.NORMAL}
+    return "+".join(sorted(v.value for v in versions))
+
+
+def _build_activation_table() -> Dict[int, List[str]]:
+    table: Dict[int, List[str]] = {}
+    for card_id in ESTABLISHMENT_IDS:
+        for number in CARDS[card_id].activation_numbers:
+            table.setdefault(number, []).append(card_id)
+    return table
+
+
+# Значение кубика -> какие предприятия на него срабатывают
+ACTIVATION_TABLE: Dict[int, List[str]] = _build_activation_table()
+
+# Вероятность суммы на 1 и 2 кубиках
+P_ONE_DIE: Dict[int, float] = {v: 1 / 6 for v in range(1, 7)}
+P_TWO_DICE: Dict[int, float] = {v: (6 - abs(v - 7)) / 36 for v in range(2, 13)}
+
+
 
 
 
@@ -0,0 +1,122 @@
+"""
+Чекпоинты долгих прогонов.
+
+Все инструменты симуляции сидируют партию её номером (simulation.game_seed),
+поэтому «состояние генератора» прогона — это просто номер следующей
+партии. Чекпоинт хранит:
+    - config — параметры прогона (продолжать можно только тот же прогон);
+    - next_game — все партии с меньшими номерами учтены;
+    - payload — частичные агрегаты и размеры открытых выходных файлов.
+
+Запись атомарная (tmp + fsync + os.replace) и не чаще, чем раз в
+every секунд, чтобы не тормозить прогон. Выходные файлы, дописанные
+после последнего чекпоинта, при продолжении обрезаются до размеров из
+payload (truncate_outputs) — партии не теряются и не дублируются.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, Optional, Union
+import hashlib
+import json
+import os
+import time
+
+
+def atomic_write_json(path: str, data: Any, indent: Optional[int] = 1) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=indent)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def read_json(path: str) -> Optional[Any]:
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def job_key(config: Dict[str, Any]) -> str:
+    """Короткий ключ прогона по его конфигурации (разные прогоны — разные ключи)."""
+    return hashlib.blake2b(
+        json.dumps(config, sort_keys=True).encode("utf-8"), digest_size=8,
+    ).hexdigest()
+
+
+class JobCheckpoint:
+    """
+    Прогресс прогона по номерам партий.
+
+        cp = JobCheckpoint(path, config)
+        start = cp.next_game          # 0 или место, где остановились
+        if cp.resumed: ...            # файл чекпоинта уже был: восстановить payload
+        ...
+        cp.update(stop, payload)      # после каждой учтённой пачки
+        cp.save()                     # в конце
+
+    payload можно передать функцией: она вызывается только при записи.
+    """
+
+    def __init__(self, path: str, config: Dict[str, Any], every: float = 30.0) -> None:
+        self.path = path
+        self.config = config
+        self.every = every
+        self.next_game = 0
+        self.payload: Dict[str, Any] = {}
+        self._payload_fn: Optional[Callable[[], Dict[str, Any]]] = None
+        self._saved_at = time.monotonic()
+        self._dirty = False
+
+        # Продолжение — это наличие файла, а не next_game > 0: прогон
+        # с нуля, упавший до первой партии, уже дописывал выходные файлы.
+        data = read_json(path)
+        self.resumed = data is not None
+        if data is not None:
+            if data["config"] != config:
+                raise ValueError(f"Чекпоинт {path} от другого прогона")
+            self.next_game = data["next_game"]
+            self.payload = data["payload"]
+
+    def update(
+        self,
+        next_game: int,
+        payload: Union[Dict[str, Any], Callable[[], Dict[str, Any]]],
+        force: bool = False,
+    ) -> None:
+        self.next_game = next_game
+        if callable(payload):
+            self._payload_fn = payload
+        else:
+            self._payload_fn = None
+            self.payload = payload
+        self._dirty = True
+        if force or time.monotonic() - self._saved_at >= self.every:
+            self.save()
+
+    def save(self) -> None:
+        if not self._dirty and os.path.exists(self.path):
+            return
+        if self._payload_fn is not None:
+            self.payload = self._payload_fn()
+        atomic_write_json(
+            self.path,
+            {"config": self.config, "next_game": self.next_game, "payload": self.payload},
+            indent=None,
+        )
+        self._saved_at = time.monotonic()
+        self._dirty = False
+
+
+def file_size(path: str) -> int:
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+
+def truncate_outputs(sizes: Dict[str, int]) -> None:
+    """Обрезать выходные файлы до размеров на момент чекпоинта."""
+    for path, size in sizes.items():
+        if os.path.exists(path) and os.path.getsize(path) > size:
+            with open(path, "r+b") as f:
+                f.truncate(size)
@@ -0,0 +1,128 @@
+"""
+Компактная бинарная форма GameState.
+
+Для передачи состояний между процессами (пул воркеров, поиск):
+вместо вложенных датаклассов со строковыми ключами и полной колодой
+строк — байты, где карты записаны порядковыми номерами (cards.CARD_INDEX).
+GameState.__reduce__ использует эту форму, так что pickle и пулы
+процессов получают её автоматически.
+
+Порядок ключей во всех словарях сохраняется: от него зависят порядок
+legal_actions и разрешения карт, а значит, и воспроизводимость партий.
+
+Формат (little-endian):
+    заголовок   B версия, B игроков, B текущий, B фаза, b last_roll (-1 — нет),
+                B done, b winner (-1 — нет), B max_unique,
+                B версии карт (бит i — i-я CardVersion)
+    игрок       i монеты, B длина имени + utf-8,
+                B число предприятий + (B карта, B копий) * n,
+                B число достопримечательностей + (B карта, B построена) * n
+    рынок       B число типов + (B карта, B копий) * n
+    колода      H длина + B карта * n
+"""
+
+from __future__ import annotations
+
+from typing import Dict, List, Tuple
+import struct
+
+from .cards import CARD_IDS, CARD_INDEX, CardVersion
+from .state import Deck, GameState, MarketState, Phase, PlayerState
+
+
+CODEC_VERSION = 2
+
+_PHASES = list(Phase)
+_PHASE_INDEX = {phase: i for i, phase in enumerate(_PHASES)}
+_VERSIONS = list(CardVersion)
+
+_HEADER = struct.Struct("<BBBBbBbBB")
+_COINS = struct.Struct("<i")
+_DECK_LEN = struct.Struct("<H")
+
+_CARD_BYTE: Dict[str, bytes] = {card_id: bytes([i]) for card_id, i in CARD_INDEX.items()}
+
+
+def _pack_counts(out: bytearray, items: Dict[str, int]) -> None:
+    out.append(len(items))
+    for card_id, count in items.items():
+        out += _CARD_BYTE[card_id]
+        out.append(count)
+
+
+def encode_state(state: GameState) -> bytes:
+    out = bytearray(_HEADER.pack(
+        CODEC_VERSION,
+        len(state.players),
+        state.current_player,
+        _PHASE_INDEX[state.phase],
+        -1 if state.last_roll is None else state.last_roll,
+        int(state.done),
+        -1 if state.winner is None else state.winner,
+        state.market.max_unique,
+        sum(1 << i for i, v in enumerate(_VERSIONS) if v in state.market.versions),
+    ))
+    for p in state.players:
+        out += _COINS.pack(p.coins)
+        name = p.name.encode("utf-8")
+        out.append(len(name))
+        out += name
+        _pack_counts(out, p.establishments)
+        _pack_counts(out, p.landmarks)
+
+    _pack_counts(out, state.market.available)
+    deck = state.market.deck.remaining()
+    out += _DECK_LEN.pack(len(deck))
+    out += b"".join(map(_CARD_BYTE.__getitem__, deck))
+    return bytes(out)
+
+
+def _unpack_counts(data: bytes | memoryview, pos: int) -> Tuple[Dict[str, int], int]:
+    end = pos + 1 + 2 * data[pos]
+    chunk = data[pos + 1:end]
+    return dict(zip(map(CARD_IDS.__getitem__, chunk[::2]), chunk[1::2])), end
+
+
+def decode_state(data: bytes | memoryview) -> GameState:
+    """Обратное к encode_state; data может быть memoryview (без копирования)."""
+    version, num_players, current, phase, last_roll, done, winner, max_unique, version_bits = \
+        _HEADER.unpack_from(data, 0)
+    if version != CODEC_VERSION:
+        raise ValueError(f"Неизвестная версия формата состояния: {version}")
+    pos = _HEADER.size
+
+    players: List[PlayerState] = []
+    for _ in range(num_players):
+        (coins,) = _COINS.unpack_from(data, pos)
+        pos += _COINS.size
+        name_len = data[pos]
+        name = str(data[pos + 1:pos + 1 + name_len], "utf-8")
+        pos += 1 + name_len
+        establishments, pos = _unpack_counts(data, pos)
+        landmarks, pos = _unpack_counts(data, pos)
+        players.append(PlayerState(
+            name=name,
+            coins=coins,
+            establishments=establishments,
+            landmarks={card_id: built == 1 for card_id, built in landmarks.items()},
+        ))
+
+    available, pos = _unpack_counts(data, pos)
+    (deck_len,) = _DECK_LEN.unpack_from(data, pos)
+    pos += _DECK_LEN.size
+    deck = Deck(map(CARD_IDS.__getitem__, data[pos:pos + deck_len]))
+
+    return GameState(
+        players=players,
+        current_player=current,
+        phase=_PHASES[phase],
+        market=MarketState(
+            available=available,
+            deck=deck,
+            max_unique=max_unique,
+            versions=frozenset(v for i, v in enumerate(_VERSIONS) if version_bits >> i & 1),
+        ),
+        last_roll=None if last_roll < 0 else last_roll,
+        done=bool(done),
+        winner=None if winner < 0 else winner,
+    )
@@ -0,0 +1,481 @@
+"""
+Прогон на нескольких машинах: координатор + воркеры по TCP.
+
+Координатор раздаёт диапазоны номеров партий (аренды), воркеры играют
+их и присылают результат. Партия сидируется своим номером
+(simulation.game_seed), поэтому неважно, кто и сколько раз её сыграл.
+
+Протокол — JSON-строки по TCP, одно соединение на запрос. В каждом
+сообщении воркера есть "token": общий секрет координатора и воркеров,
+без него координатор отвечает {"error": ...}. Токен защищает только
+от чужих запросов, сам трафик не шифруется — наружу координатор
+стоит открывать только в доверенной сети.
+    {"op": "lease", "worker": имя}
+        -> {"lease": id, "job": {...}, "range": [lo, hi], "timeout": сек}
+        -> {"wait": сек}        — всё роздано, но не всё сдано
+        -> {"done": true}       — работа закончена
+    {"op": "heartbeat", "lease": id}           -> {"ok": true}
+    {"op": "result", "lease": id, "payload": ...} -> {"ok": true}
+
+Если воркер пропал (нет результата и heartbeat дольше lease_timeout),
+его диапазон снова отдаётся другим. Результат принимается только за
+диапазон, который сейчас в аренде или ждёт в очереди; за уже сданный
+(от опоздавшего воркера) или чужой — отбрасывается.
+
+Виды работ (job["kind"]) — TASKS:
+    "analytics" — агрегат analytics.CardAnalytics за диапазон;
+    "results"   — список GameResult в виде dict.
+Агентов из задания воркер создаёт только из ALLOWED_FACTORIES.
+
+Запуск:
+    python -m machi_core.distributed analytics --agents greedy,random --games 100000 \
+        --host 0.0.0.0 --out analytics.json
+    MACHI_DIST_TOKEN=... python -m machi_core.distributed worker --host 10.0.0.5 --port 7070 --processes 64
+Из кода координатор создаёт distributed_analytics; в консоль он пишет,
+только если передать log (CLI передаёт print).
+"""
+
+from __future__ import annotations
+
+from dataclasses import asdict
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import argparse
+import hmac
+import itertools
+import json
+import multiprocessing
+import os
+import secrets
+import socket
+import socketserver
+import threading
+import time
+
+from .agents import RandomBot
+from .analytics import DEFAULT_BY_ROUNDS, CardAnalytics, _analyze_range, iter_games
+from .bots.greedy_bot import GreedyBot, GreedyWeights
+from .bots.mc_bot import MonteCarloBot
+from .cards import CardVersion
+from .simulation import DEFAULT_MAX_TURNS, AgentSpec, _qualified_name
+
+
+Range = Tuple[int, int]
+Job = Dict[str, Any]
+
+TOKEN_ENV = "MACHI_DIST_TOKEN"
+
+# что воркер согласен импортировать по имени из задания (фабрики и датаклассы в kwargs)
+ALLOWED_FACTORIES = frozenset(
+    _qualified_name(obj) for obj in (RandomBot, GreedyBot, GreedyWeights, MonteCarloBot)
+)
+
+
+# ---- виды работ ------------------------------------------------------------------
+
+
+def _job_args(job: Job) -> Tuple[List[AgentSpec], int, set[CardVersion] | None, int]:
+    specs = [AgentSpec.from_dict(d, ALLOWED_FACTORIES) for d in job["specs"]]
+    versions = {CardVersion(v) for v in job["versions"]} or None
+    return specs, job["base_seed"], versions, job["max_turns"]
+
+
+def _analytics_task(job: Job, bounds: Range) -> Any:
+    specs, base_seed, versions, max_turns = _job_args(job)
+    return _analyze_range(bounds, specs, base_seed, versions, max_turns, job["by_rounds"])
+
+
+def _results_task(job: Job, bounds: Range) -> Any:
+    specs, base_seed, versions, max_turns = _job_args(job)
+    return [asdict(r) for r in iter_games(specs, range(*bounds), base_seed, versions, max_turns)]
+
+
+TASKS: Dict[str, Callable[[Job, Range], Any]] = {
+    "analytics": _analytics_task,
+    "results": _results_task,
+}
+
+
+def make_job(
+    kind: str,
+    specs: Sequence[AgentSpec],
+    base_seed: int = 0,
+    allowed_versions: set[CardVersion] | None = None,
+    max_turns: int = DEFAULT_MAX_TURNS,
+    **extra: Any,
+) -> Job:
+    if kind not in TASKS:
+        raise ValueError(f"Неизвестный вид работы: {kind}")
+    for spec in specs:
+        if _qualified_name(spec.factory) not in ALLOWED_FACTORIES:
+            raise ValueError(f"Воркеры не создают {spec.label}: нет в ALLOWED_FACTORIES")
+    return {
+        "kind": kind,
+        "specs": [spec.to_dict() for spec in specs],
+        "base_seed": base_seed,
+        "versions": sorted(v.value for v in allowed_versions or ()),
+        "max_turns": max_turns,
+        **extra,
+    }
+
+
+# ---- транспорт -------------------------------------------------------------------
+
+
+def _request(address: Tuple[str, int], message: Dict[str, Any], timeout: float = 30.0) -> Dict[str, Any]:
+    with socket.create_connection(address, timeout=timeout) as sock:
+        sock.sendall(json.dumps(message, separators=(",", ":")).encode("utf-8") + b"\n")
+        with sock.makefile("rb") as f:
+            line = f.readline()
+    if not line:
+        raise ConnectionError("Координатор закрыл соединение")
+    return json.loads(line)
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        line = self.rfile.readline()
+        if not line:
+            return
+        reply = self.server.coordinator.handle(json.loads(line))  # type: ignore[attr-defined]
+        self.wfile.write(json.dumps(reply, separators=(",", ":")).encode("utf-8") + b"\n")
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+# ---- координатор -----------------------------------------------------------------
+
+
+class Coordinator:
+    """
+    Раздаёт диапазоны [start, start + num_games) кусками по games_per_lease.
+    on_result(range, payload) вызывается для каждого сданного диапазона
+    (в порядке сдачи, под замком — можно копить без своей синхронизации).
+    token — общий секрет с воркерами; None — сгенерировать (self.token).
+    """
+
+    def __init__(
+        self,
+        job: Job,
+        num_games: int,
+        on_result: Callable[[Range, Any], None],
+        start: int = 0,
+        games_per_lease: int = 1000,
+        lease_timeout: float = 120.0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        token: Optional[str] = None,
+    ) -> None:
+        self.job = job
+        self.token = token or secrets.token_urlsafe(16)
+        self.on_result = on_result
+        self.lease_timeout = lease_timeout
+        self.pending: List[Range] = [
+            (lo, min(lo + games_per_lease, start + num_games))
+            for lo in range(start, start + num_games, games_per_lease)
+        ]
+        self.pending.reverse()   # pop() отдаёт диапазоны по порядку
+        self.leases: Dict[int, Tuple[Range, float, str]] = {}
+        self.completed: set[Range] = set()
+        self.total = len(self.pending)
+        self.releases = 0        # сколько раз диапазон отдавали повторно
+
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._finished = threading.Event()
+        if not self.pending:
+            self._finished.set()
+
+        self._server = _Server((host, port), _Handler)
+        self._server.coordinator = self  # type: ignore[attr-defined]
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self._server.server_address[:2]
+
+    def start(self) -> "Coordinator":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._finished.wait(timeout)
+
+    def close(self) -> None:
+        # shutdown ждёт serve_forever, а без start() он не запущен
+        if self._thread is not None:
+            self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "Coordinator":
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    # ---- обработка запросов ------------------------------------------------
+
+    def _expire(self, now: float) -> None:
+        for lease_id, (bounds, deadline, _) in list(self.leases.items()):
+            if deadline < now:
+                del self.leases[lease_id]
+                if bounds not in self.completed:
+                    self.pending.append(bounds)
+                    self.releases += 1
+
+    def _authorized(self, message: Dict[str, Any]) -> bool:
+        token = message.get("token")
+        return isinstance(token, str) and hmac.compare_digest(token.encode(), self.token.encode())
+
+    def handle(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        if not self._authorized(message):
+            return {"error": "Неверный токен"}
+        op = message.get("op")
+        now = time.monotonic()
+        with self._lock:
+            if op == "lease":
+                self._expire(now)
+                if self._finished.is_set():
+                    return {"done": True}
+                if not self.pending:
+                    return {"wait": min(5.0, self.lease_timeout / 4)}
+                bounds = self.pending.pop()
+                lease_id = next(self._ids)
+                self.leases[lease_id] = (bounds, now + self.lease_timeout, str(message.get("worker", "")))
+                return {
+                    "lease": lease_id,
+                    "job": self.job,
+                    "range": list(bounds),
+                    "timeout": self.lease_timeout,
+                }
+
+            if op == "heartbeat":
+                lease = self.leases.get(message.get("lease"))
+                if lease is not None:
+                    self.leases[message["lease"]] = (lease[0], now + self.lease_timeout, lease[2])
+                return {"ok": lease is not None}
+
+            if op == "result":
+                lease = self.leases.pop(message.get("lease"), None)
+                if lease is not None:
+                    bounds = lease[0]
+                else:
+                    # аренда истекла: диапазон снова в очереди или у другого воркера
+                    bounds = tuple(message.get("range") or ())
+                    leased = {b for b, _, _ in self.leases.values()}
+                    if bounds not in self.pending and bounds not in leased:
+                        return {"ok": False}
+                if bounds in self.completed:
+                    return {"ok": False}
+                self.completed.add(bounds)
+                if bounds in self.pending:
+                    self.pending.remove(bounds)
+                self.on_result(bounds, message["payload"])
+                if len(self.completed) == self.total:
+                    self._finished.set()
+                return {"ok": True}
+
+        return {"error": f"Неизвестная операция: {op}"}
+
+
+# ---- воркер ----------------------------------------------------------------------
+
+
+def _heartbeat(
+    address: Tuple[str, int], token: str, lease_id: int, interval: float, stop: threading.Event,
+) -> None:
+    while not stop.wait(interval):
+        try:
+            _request(address, {"op": "heartbeat", "token": token, "lease": lease_id})
+        except OSError:
+            pass
+
+
+def run_worker(
+    host: str,
+    port: int,
+    token: str,
+    name: Optional[str] = None,
+    retry: float = 2.0,
+    give_up_after: float = 300.0,
+) -> int:
+    """
+    Брать диапазоны, пока координатор не скажет done. Возвращает,
+    сколько диапазонов сдано. Если координатор недоступен дольше
+    give_up_after секунд — выход.
+    """
+    address = (host, port)
+    name = name or f"{socket.gethostname()}:{multiprocessing.current_process().pid}"
+    delivered = 0
+    unreachable_since: Optional[float] = None
+
+    while True:
+        try:
+            reply = _request(address, {"op": "lease", "token": token, "worker": name})
+        except OSError:
+            now = time.monotonic()
+            unreachable_since = unreachable_since or now
+            if now - unreachable_since > give_up_after:
+                return delivered
+            time.sleep(retry)
+            continue
+        unreachable_since = None
+
+        if "error" in reply:
+            raise RuntimeError(f"Координатор отказал: {reply['error']}")
+        if reply.get("done"):
+            return delivered
+        if "wait" in reply:
+            time.sleep(reply["wait"])
+            continue
+
+        lease_id = reply["lease"]
+        stop = threading.Event()
+        beat = threading.Thread(
+            target=_heartbeat, args=(address, token, lease_id, reply["timeout"] / 3, stop), daemon=True,
+        )
+        beat.start()
+        try:
+            payload = TASKS[reply["job"]["kind"]](reply["job"], tuple(reply["range"]))
+        finally:
+            stop.set()
+
+        message = {
+            "op": "result", "token": token, "lease": lease_id, "range": reply["range"], "payload": payload,
+        }
+        while True:
+            try:
+                _request(address, message, timeout=120.0)
+                break
+            except OSError:
+                time.sleep(retry)
+        delivered += 1
+
+
+def _worker_process(args: Tuple[str, int, str, str]) -> int:
+    host, port, token, name = args
+    return run_worker(host, port, token, name)
+
+
+def run_workers(host: str, port: int, token: str, processes: Optional[int] = None) -> int:
+    """Запустить processes воркеров на этой машине (по умолчанию — по числу ядер)."""
+    processes = processes or multiprocessing.cpu_count()
+    base = socket.gethostname()
+    with multiprocessing.Pool(processes) as pool:
+        return sum(pool.map(
+            _worker_process, [(host, port, token, f"{base}/{i}") for i in range(processes)],
+        ))
+
+
+# ---- готовые сценарии ------------------------------------------------------------
+
+
+def distributed_analytics(
+    specs: Sequence[AgentSpec],
+    num_games: int,
+    base_seed: int = 0,
+    allowed_versions: set[CardVersion] | None = None,
+    max_turns: int = DEFAULT_MAX_TURNS,
+    by_rounds: Sequence[int] = DEFAULT_BY_ROUNDS,
+    games_per_lease: int = 1000,
+    lease_timeout: float = 120.0,
+    host: str = "127.0.0.1",
+    port: int = 7070,
+    local_workers: int = 0,
+    token: Optional[str] = None,
+    log: Callable[[str], None] | None = None,
+) -> CardAnalytics:
+    """
+    Координатор для analytics: ждёт воркеров (свои local_workers
+    процессов плюс подключившиеся извне) и собирает агрегат.
+    По умолчанию слушает только localhost; для воркеров с других машин
+    передайте host="0.0.0.0" (или адрес интерфейса) и token, который
+    им известен (без token он генерируется и сообщается в log).
+    log — куда писать прогресс, например print; None — молча.
+    """
+    analytics = CardAnalytics(by_rounds)
+    job = make_job(
+        "analytics", specs, base_seed, allowed_versions, max_turns, by_rounds=list(by_rounds),
+    )
+
+    def on_result(bounds: Range, payload: Any) -> None:
+        analytics.merge(CardAnalytics.from_dict(payload))
+        if log is not None:
+            log(f"диапазон {bounds[0]}..{bounds[1] - 1} сдан ({len(coordinator.completed)}/{coordinator.total})")
+
+    coordinator = Coordinator(
+        job, num_games, on_result,
+        games_per_lease=games_per_lease, lease_timeout=lease_timeout, host=host, port=port,
+        token=token,
+    )
+    if token is None and log is not None:
+        log(f"токен для воркеров ({TOKEN_ENV}): {coordinator.token}")
+    with coordinator:
+        local: Optional[multiprocessing.pool.Pool] = None
+        if local_workers:
+            connect_host = "127.0.0.1" if host in ("0.0.0.0", "") else host
+            local = multiprocessing.Pool(local_workers)
+            local.map_async(
+                _worker_process,
+                [
+                    (connect_host, coordinator.address[1], coordinator.token, f"local/{i}")
+                    for i in range(local_workers)
+                ],
+            )
+        coordinator.wait()
+        if local is not None:
+            local.close()
+            local.join()
+    return analytics
+
+
+CLI_AGENTS = {"random": RandomBot, "greedy": GreedyBot, "mc": MonteCarloBot}
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Распределённая симуляция: координатор и воркер")
+    sub = parser.add_subparsers(dest="command", required=True)
+    coordinator = sub.add_parser("analytics")
+    coordinator.add_argument("--agents", default="random,random",
+                             help=f"боты по местам через запятую: {', '.join(CLI_AGENTS)}")
+    coordinator.add_argument("--games", type=int, required=True)
+    coordinator.add_argument("--base-seed", type=int, default=0)
+    coordinator.add_argument("--host", default="127.0.0.1")
+    coordinator.add_argument("--port", type=int, default=7070)
+    coordinator.add_argument("--local-workers", type=int, default=0)
+    coordinator.add_argument("--token", default=os.environ.get(TOKEN_ENV),
+                             help=f"токен для воркеров (по умолчанию из {TOKEN_ENV} или новый)")
+    coordinator.add_argument("--out", required=True, help="куда сохранить агрегат (JSON)")
+    worker = sub.add_parser("worker")
+    worker.add_argument("--host", default="127.0.0.1")
+    worker.add_argument("--port", type=int, default=7070)
+    worker.add_argument("--processes", type=int, default=None)
+    worker.add_argument("--token", default=os.environ.get(TOKEN_ENV),
+                        help=f"токен координатора (по умолчанию из {TOKEN_ENV})")
+    args = parser.parse_args(argv)
+
+    if args.command == "analytics":
+        names = args.agents.split(",")
+        unknown = [name for name in names if name not in CLI_AGENTS]
+        if unknown:
+            parser.error(f"неизвестные боты: {', '.join(unknown)}")
+        analytics = distributed_analytics(
+            [AgentSpec(CLI_AGENTS[name]) for name in names], args.games, args.base_seed,
+            host=args.host, port=args.port, local_workers=args.local_workers,
+            token=args.token, log=print,
+        )
+        analytics.save(args.out)
+        print(f"сохранено: {args.out}")
+
+    elif args.command == "worker":
+        if not args.token:
+            parser.error(f"нужен --token или переменная окружения {TOKEN_ENV}")
+        delivered = run_workers(args.host, args.port, args.token, args.processes)
+        print(f"сдано диапазонов: {delivered}")
+
+
+if __name__ == "__main__":
+    main()
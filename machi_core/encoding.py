@@ -0,0 +1,137 @@
+"""
+Числовое кодирование состояния и действий (для обученных ботов).
+
+Здесь:
+    - вектор наблюдения фиксированной длины OBS_SIZE;
+    - пространство действий фиксированного размера NUM_ACTIONS;
+    - маска допустимых действий.
+
+Требует NumPy.
+
+Наблюдение строится с точки зрения игрока: он всегда на месте 0,
+дальше соперники по порядку хода. Места сверх числа игроков — нули.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, Optional
+
+import numpy as np
+
+from .actions import Action, ActionType
+from .cards import ESTABLISHMENT_IDS, LANDMARK_IDS
+from .rules import legal_actions
+from .state import GameState, Phase
+
+
+MAX_PLAYERS = 6
+
+NUM_ESTABLISHMENTS = len(ESTABLISHMENT_IDS)
+NUM_LANDMARKS = len(LANDMARK_IDS)
+
+_EST_INDEX: Dict[str, int] = {card_id: i for i, card_id in enumerate(ESTABLISHMENT_IDS)}
+_LANDMARK_INDEX: Dict[str, int] = {card_id: i for i, card_id in enumerate(LANDMARK_IDS)}
+_PHASES = list(Phase)
+
+# Раскладка наблюдения:
+#   [место 0 .. место MAX_PLAYERS-1] по SEAT_SIZE:
+#       есть ли игрок, монеты, предприятия по ESTABLISHMENT_IDS, достопримечательности
+#   рынок: сколько карт каждого предприятия на столе
+#   фаза: one-hot
+SEAT_SIZE = 2 + NUM_ESTABLISHMENTS + NUM_LANDMARKS
+MARKET_OFFSET = MAX_PLAYERS * SEAT_SIZE
+PHASE_OFFSET = MARKET_OFFSET + NUM_ESTABLISHMENTS
+OBS_SIZE = PHASE_OFFSET + len(_PHASES)
+
+# Раскладка действий:
+#   0 — ROLL одним кубиком, 1 — ROLL двумя, 2 — END_BUY,
+#   дальше BUY_CARD по ESTABLISHMENT_IDS, затем BUILD_LANDMARK по LANDMARK_IDS
+ROLL_1 = 0
+ROLL_2 = 1
+END_BUY = 2
+BUY_OFFSET = 3
+BUILD_OFFSET = BUY_OFFSET + NUM_ESTABLISHMENTS
+NUM_ACTIONS = BUILD_OFFSET + NUM_LANDMARKS
+
+
+def encode_observation(
+    state: GameState,
+    player_index: int,
+    out: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Вектор наблюдения float32 длины OBS_SIZE.
+
+    out — готовый буфер (например, строка батча), чтобы не выделять память.
+    """
+    if out is None:
+        out = np.zeros(OBS_SIZE, dtype=np.float32)
+    else:
+        out[:] = 0.0
+
+    num_players = len(state.players)
+    for seat in range(num_players):
+        p = state.players[(player_index + seat) % num_players]
+        base = seat * SEAT_SIZE
+
+        out[base] = 1.0
+        out[base + 1] = p.coins
+
+        est_base = base + 2
+        for card_id, count in p.establishments.items():
+            out[est_base + _EST_INDEX[card_id]] = count
+
+        lm_base = est_base + NUM_ESTABLISHMENTS
+        for landmark_id, built in p.landmarks.items():
+            if built:
+                out[lm_base + _LANDMARK_INDEX[landmark_id]] = 1.0
+
+    for card_id, count in state.market.available.items():
+        out[MARKET_OFFSET + _EST_INDEX[card_id]] = count
+
+    out[PHASE_OFFSET + _PHASES.index(state.phase)] = 1.0
+    return out
+
+
+def action_index(action: Action) -> int:
+    """Номер действия в пространстве действий."""
+    if action.type == ActionType.ROLL:
+        return ROLL_2 if action.num_dice == 2 else ROLL_1
+    if action.type == ActionType.END_BUY:
+        return END_BUY
+    if action.type == ActionType.BUY_CARD:
+        return BUY_OFFSET + _EST_INDEX[action.card_id]
+    if action.type == ActionType.BUILD_LANDMARK:
+        return BUILD_OFFSET + _LANDMARK_INDEX[action.card_id]
+    raise ValueError(f"Неизвестный тип действия: {action.type}")
+
+
+def index_action(index: int) -> Action:
+    """Действие по номеру (обратное к action_index)."""
+    if index == ROLL_1:
+        return Action(type=ActionType.ROLL, num_dice=1)
+    if index == ROLL_2:
+        return Action(type=ActionType.ROLL, num_dice=2)
+    if index == END_BUY:
+        return Action(type=ActionType.END_BUY)
+    if BUY_OFFSET <= index < BUILD_OFFSET:
+        return Action(type=ActionType.BUY_CARD, card_id=ESTABLISHMENT_IDS[index - BUY_OFFSET])
+    if BUILD_OFFSET <= index < NUM_ACTIONS:
+        return Action(type=ActionType.BUILD_LANDMARK, card_id=LANDMARK_IDS[index - BUILD_OFFSET])
+    raise ValueError(f"Неизвестный номер действия: {index}")
+
+
+def legal_mask(
+    state: GameState,
+    player_index: int,
+    out: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """Булева маска допустимых действий длины NUM_ACTIONS."""
+    if out is None:
+        out = np.zeros(NUM_ACTIONS, dtype=bool)
+    else:
+        out[:] = False
+
+    for action in legal_actions(state, player_index):
+        out[action_index(action)] = True
+    return out
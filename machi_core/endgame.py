@@ -0,0 +1,287 @@
+"""
+Точный решатель эндшпиля.
+
+Когда кому-то осталось построить одну-две достопримечательности
+(победа = train_station + shopping_mall + port), дерево игры маленькое.
+Решатель считает точные вероятности победы каждого игрока в пределах
+горизонта horizon ходов: expectimax по броскам кубиков, на каждом
+решении игрок максимизирует свою вероятность (maxN).
+
+Модель эндшпиля:
+    - предприятия у всех фиксированы (новые не покупаются);
+    - решения: 1 или 2 кубика (при вокзале), затем построить одну
+      из недостроенных достопримечательностей или закончить ход;
+    - доход считается настоящим rules._resolve_dice.
+Позиции, где есть траулер или компания по сносу (у них свои броски
+внутри эффекта), решатель не берёт — см. solvable().
+
+Мемоизация по компактному ключу:
+    (ходов осталось, текущий игрок, (монеты, биты достопримечательностей) по игрокам).
+Монеты игрока обрезаются сверху: остаток до победы + coin_margin.
+Лишние монеты влияют только на то, сколько можно отдать красным картам,
+поэтому решение точное с точностью до этого запаса.
+
+Стоимость ограничена max_nodes (сколько позиций держит кэш): если
+позиция больше, решатель бросает EndgameTooLarge, и бот ищет как обычно.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Tuple
+import copy
+
+from .actions import Action, ActionType
+from .cards import P_ONE_DIE, P_TWO_DICE, get_card_def
+from .rules import _resolve_dice
+from .state import VICTORY_LANDMARKS, GameState, MarketState, Phase
+
+
+ALL_BUILT = (1 << len(VICTORY_LANDMARKS)) - 1
+
+# карты со своей случайностью внутри эффекта
+UNSUPPORTED_CARDS = frozenset({"trawler", "building_demolition_company"})
+
+
+class EndgameTooLarge(RuntimeError):
+    """Позиция не укладывается в max_nodes."""
+
+
+PlayerKey = Tuple[int, int]           # (монеты, биты достопримечательностей)
+StateKey = Tuple[int, Tuple[PlayerKey, ...]]
+
+
+def _landmark_bits(state: GameState, idx: int) -> int:
+    return state.players[idx].victory_mask
+
+
+def remaining_cost(state: GameState, idx: int) -> int:
+    """Сколько монет игроку осталось вложить в достопримечательности до победы."""
+    player = state.players[idx]
+    return sum(
+        get_card_def(landmark_id).cost
+        for landmark_id in VICTORY_LANDMARKS
+        if not player.has_built(landmark_id)
+    )
+
+
+def solvable(state: GameState) -> bool:
+    if state.done:
+        return False
+    for player in state.players:
+        for card_id, count in player.establishments.items():
+            if count > 0 and card_id in UNSUPPORTED_CARDS:
+                return False
+    return True
+
+
+class EndgameSolver:
+    """
+    Решатель для конкретного набора предприятий игроков.
+
+    Создаётся по позиции; пока предприятия не меняются (в эндшпиле —
+    до конца партии), его кэш можно переиспользовать между ходами.
+    """
+
+    def __init__(
+        self,
+        state: GameState,
+        horizon: int = 8,
+        coin_margin: int = 4,
+        max_nodes: int = 20_000,
+    ) -> None:
+        if not solvable(state):
+            raise ValueError("Позиция не поддерживается решателем эндшпиля")
+        self.horizon = horizon
+        self.max_nodes = max_nodes
+        self.coin_margin = coin_margin
+        # обрезка монет по битам построенных достопримечательностей
+        self._coin_cap = [
+            sum(
+                get_card_def(landmark_id).cost
+                for i, landmark_id in enumerate(VICTORY_LANDMARKS)
+                if not bits & (1 << i)
+            ) + coin_margin
+            for bits in range(ALL_BUILT + 1)
+        ]
+        self._holdings = [dict(p.establishments) for p in state.players]
+
+        # черновое состояние для _resolve_dice: только нужные поля
+        self._scratch = GameState(
+            players=copy.deepcopy(state.players),
+            current_player=0,
+            phase=Phase.RESOLVE,
+            market=MarketState(),
+            done=False,
+        )
+        self._income: Dict[Tuple[int, int, Tuple[PlayerKey, ...]], Tuple[int, ...]] = {}
+        self._turn: Dict[Tuple[int, StateKey], Tuple[float, ...]] = {}
+        self._buy: Dict[Tuple[int, StateKey], Tuple[float, ...]] = {}
+
+    def matches(self, state: GameState) -> bool:
+        """Подходит ли кэш этого решателя к позиции (те же предприятия)."""
+        return (
+            len(state.players) == len(self._holdings)
+            and all(dict(p.establishments) == h for p, h in zip(state.players, self._holdings))
+        )
+
+    def _capped(self, coins: int, bits: int) -> PlayerKey:
+        return min(coins, self._coin_cap[bits]), bits
+
+    def key_of(self, state: GameState) -> StateKey:
+        return (
+            state.current_player,
+            tuple(
+                self._capped(p.coins, _landmark_bits(state, i))
+                for i, p in enumerate(state.players)
+            ),
+        )
+
+    # ---- переходы ----------------------------------------------------------
+
+    def _after_roll(self, current: int, roll: int, players: Tuple[PlayerKey, ...]) -> Tuple[int, ...]:
+        cache_key = (current, roll, players)
+        coins = self._income.get(cache_key)
+        if coins is not None:
+            return coins
+
+        scratch = self._scratch
+        for p, (c, bits) in zip(scratch.players, players):
+            p.coins = c
+            for i, landmark_id in enumerate(VICTORY_LANDMARKS):
+                if bits & (1 << i):
+                    p.build_landmark(landmark_id)
+                else:
+                    p.rebuild_landmark(landmark_id)
+        scratch.current_player = current
+        scratch.last_roll = roll
+        _resolve_dice(scratch)
+
+        coins = tuple(p.coins for p in scratch.players)
+        self._income[cache_key] = coins
+        return coins
+
+    def _win_vector(self, winner: int, n: int) -> Tuple[float, ...]:
+        return tuple(1.0 if i == winner else 0.0 for i in range(n))
+
+    def _roll_value(self, depth: int, key: StateKey, num_dice: int) -> Tuple[float, ...]:
+        current, players = key
+        n = len(players)
+        dist = P_TWO_DICE if num_dice == 2 else P_ONE_DIE
+
+        total = [0.0] * n
+        for roll, prob in dist.items():
+            coins = self._after_roll(current, roll, players)
+            after = tuple(self._capped(c, bits) for c, (_, bits) in zip(coins, players))
+            value = self.buy_value(depth, (current, after))
+            for i in range(n):
+                total[i] += prob * value[i]
+        return tuple(total)
+
+    def turn_value(self, depth: int, key: StateKey) -> Tuple[float, ...]:
+        """Вероятности побед в начале хода (фаза ROLL), осталось depth ходов."""
+        n = len(key[1])
+        if depth <= 0:
+            return (0.0,) * n
+
+        memo_key = (depth, key)
+        cached = self._turn.get(memo_key)
+        if cached is not None:
+            return cached
+
+        if len(self._turn) + len(self._buy) >= self.max_nodes:
+            raise EndgameTooLarge(f"Эндшпиль больше {self.max_nodes} позиций")
+
+        current, players = key
+        best = self._roll_value(depth, key, 1)
+        if players[current][1] & 1:   # вокзал — можно бросать 2 кубика
+            two = self._roll_value(depth, key, 2)
+            if two[current] > best[current]:
+                best = two
+
+        self._turn[memo_key] = best
+        return best
+
+    def _buy_options(self, key: StateKey) -> List[Optional[int]]:
+        current, players = key
+        coins, bits = players[current]
+        options: List[Optional[int]] = [None]
+        for i, landmark_id in enumerate(VICTORY_LANDMARKS):
+            if not bits & (1 << i) and coins >= get_card_def(landmark_id).cost:
+                options.append(i)
+        return options
+
+    def _apply_buy(self, key: StateKey, option: Optional[int]) -> Tuple[StateKey, bool]:
+        current, players = key
+        n = len(players)
+        if option is not None:
+            coins, bits = players[current]
+            landmark_id = VICTORY_LANDMARKS[option]
+            updated = list(players)
+            updated[current] = self._capped(
+                coins - get_card_def(landmark_id).cost, bits | (1 << option),
+            )
+            players = tuple(updated)
+            if players[current][1] == ALL_BUILT:
+                return (current, players), True
+        return ((current + 1) % n, players), False
+
+    def buy_value(self, depth: int, key: StateKey) -> Tuple[float, ...]:
+        """Вероятности побед в фазе BUY (после броска), осталось depth ходов."""
+        memo_key = (depth, key)
+        cached = self._buy.get(memo_key)
+        if cached is not None:
+            return cached
+
+        current = key[0]
+        n = len(key[1])
+        best: Optional[Tuple[float, ...]] = None
+        for option in self._buy_options(key):
+            next_key, won = self._apply_buy(key, option)
+            if won:
+                best = self._win_vector(current, n)
+                break
+            value = self.turn_value(depth - 1, next_key)
+            if best is None or value[current] > best[current]:
+                best = value
+
+        assert best is not None
+        self._buy[memo_key] = best
+        return best
+
+    # ---- интерфейс для ботов -----------------------------------------------
+
+    def win_probabilities(self, state: GameState) -> Tuple[float, ...]:
+        key = self.key_of(state)
+        if state.phase == Phase.BUY:
+            return self.buy_value(self.horizon, key)
+        return self.turn_value(self.horizon, key)
+
+    def best_action(self, state: GameState, player_index: int) -> Action:
+        """Лучшее действие в модели эндшпиля (ROLL c числом кубиков / BUILD / END_BUY)."""
+        key = self.key_of(state)
+        current, players = key
+
+        if state.phase == Phase.ROLL:
+            num_dice = 1
+            if players[current][1] & 1:
+                one = self._roll_value(self.horizon, key, 1)
+                two = self._roll_value(self.horizon, key, 2)
+                if two[player_index] > one[player_index]:
+                    num_dice = 2
+            return Action(type=ActionType.ROLL, num_dice=num_dice)
+
+        best_option: Optional[int] = None
+        best_value = -1.0
+        for option in self._buy_options(key):
+            next_key, won = self._apply_buy(key, option)
+            if won:
+                # победа сейчас; «закончить ход» может давать ту же 1.0 в пределах
+                # горизонта, но откладывать победу незачем
+                return Action(type=ActionType.BUILD_LANDMARK, card_id=VICTORY_LANDMARKS[option])
+            value = self.turn_value(self.horizon - 1, next_key)[player_index]
+            if value > best_value:
+                best_option, best_value = option, value
+
+        if best_option is None:
+            return Action(type=ActionType.END_BUY)
+        return Action(type=ActionType.BUILD_LANDMARK, card_id=VICTORY_LANDMARKS[best_option])
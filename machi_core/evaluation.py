@@ -0,0 +1,245 @@
+"""
+Сравнение двух агентов с ранней остановкой (SPRT).
+
+Кандидат играет против базовых агентов группами партий: в группе один
+и тот же seed (колода, кубики, эффекты карт) разыгрывается num_players
+раз, кандидат по очереди сидит на каждом месте. Так снимается
+перекос от порядка хода, который в этой игре сильный.
+
+После каждой группы пересчитывается логарифм отношения правдоподобия
+(Бернулли: «кандидат выиграл партию»):
+    H0: p = 1/num_players + delta0  (не лучше базового),
+    H1: p = 1/num_players + delta1  (лучше на delta1).
+Как только LLR выходит за границы Вальда, прогон останавливается.
+Партии без победителя (упёрлись в max_turns) в тест не идут.
+Корреляция внутри группы не учитывается — тест чуть оптимистичен.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from functools import partial
+from typing import List, Optional, Tuple
+import math
+import time
+
+from .cards import CardVersion
+from .simulation import (
+    DEFAULT_MAX_TURNS,
+    AgentSpec,
+    build_agents,
+    game_seed,
+    play_game,
+    run_parallel,
+)
+
+
+# (место кандидата, победитель или None, бросков, CPU-секунд)
+GameRecord = Tuple[int, Optional[int], int, float]
+
+
+def play_group(
+    candidate: AgentSpec,
+    baseline: AgentSpec,
+    num_players: int,
+    group_id: int,
+    base_seed: int = 0,
+    allowed_versions: set[CardVersion] | None = None,
+    max_turns: int = DEFAULT_MAX_TURNS,
+) -> List[GameRecord]:
+    """
+    Одна группа: seed группы, кандидат по очереди на каждом месте.
+    """
+    seed = game_seed(base_seed, group_id)
+    records: List[GameRecord] = []
+
+    for seat in range(num_players):
+        specs = [baseline] * num_players
+        specs[seat] = candidate
+
+        start = time.process_time()
+        result = play_game(build_agents(specs, seed), seed, allowed_versions, max_turns)
+        cpu = time.process_time() - start
+
+        records.append((seat, result.winner, result.turns, cpu))
+
+    return records
+
+
+def wilson_interval(wins: int, n: int, z: float = 1.96) -> Tuple[float, float]:
+    """Доверительный интервал Уилсона для доли побед."""
+    if n == 0:
+        return 0.0, 1.0
+    p = wins / n
+    denom = 1 + z * z / n
+    center = (p + z * z / (2 * n)) / denom
+    half = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denom
+    return max(0.0, center - half), min(1.0, center + half)
+
+
+@dataclass
+class SPRT:
+    """
+    Последовательный тест Вальда для доли побед.
+    """
+    p0: float
+    p1: float
+    alpha: float = 0.05
+    beta: float = 0.05
+
+    wins: int = 0
+    losses: int = 0
+
+    @property
+    def lower(self) -> float:
+        return math.log(self.beta / (1 - self.alpha))
+
+    @property
+    def upper(self) -> float:
+        return math.log((1 - self.beta) / self.alpha)
+
+    @property
+    def llr(self) -> float:
+        return (
+            self.wins * math.log(self.p1 / self.p0)
+            + self.losses * math.log((1 - self.p1) / (1 - self.p0))
+        )
+
+    def add(self, won: bool) -> None:
+        if won:
+            self.wins += 1
+        else:
+            self.losses += 1
+
+    def decision(self) -> Optional[str]:
+        """'H1' — кандидат лучше, 'H0' — не лучше, None — играем дальше."""
+        llr = self.llr
+        if llr >= self.upper:
+            return "H1"
+        if llr <= self.lower:
+            return "H0"
+        return None
+
+
+@dataclass
+class EvalReport:
+    candidate: str
+    baseline: str
+    num_players: int
+    decision: Optional[str]     # 'H1' / 'H0' / None (упёрлись в max_games)
+    llr: float
+    games: int
+    max_games: int
+    wins: int
+    no_winner: int
+    win_rate: float
+    interval: Tuple[float, float]
+    seat_games: List[int] = field(default_factory=list)
+    seat_wins: List[int] = field(default_factory=list)
+    mean_turns: float = 0.0
+    cpu_time: float = 0.0          # CPU-секунд на сыгранные партии
+    cpu_time_saved: float = 0.0    # оценка: сколько стоили бы несыгранные до max_games
+    wall_time: float = 0.0
+
+    def summary(self) -> str:
+        lo, hi = self.interval
+        verdict = {
+            "H1": "кандидат сильнее",
+            "H0": "кандидат не сильнее",
+            None: "решения нет",
+        }[self.decision]
+        seats = ", ".join(
+            f"{i}: {w}/{g}" for i, (w, g) in enumerate(zip(self.seat_wins, self.seat_games))
+        )
+        return (
+            f"{self.candidate} vs {self.baseline} ({self.num_players} игр.): {verdict}\n"
+            f"  партий {self.games}/{self.max_games}, побед {self.wins} "
+            f"({self.win_rate:.3f}, 95% [{lo:.3f}, {hi:.3f}]), без победителя {self.no_winner}\n"
+            f"  LLR {self.llr:.2f}, победы по местам кандидата: {seats}\n"
+            f"  CPU {self.cpu_time:.1f} c, сэкономлено ~{self.cpu_time_saved:.1f} c, "
+            f"время {self.wall_time:.1f} c"
+        )
+
+
+def evaluate(
+    candidate: AgentSpec,
+    baseline: AgentSpec,
+    num_players: int = 2,
+    delta0: float = 0.0,
+    delta1: float = 0.05,
+    alpha: float = 0.05,
+    beta: float = 0.05,
+    max_games: int = 20_000,
+    base_seed: int = 0,
+    allowed_versions: set[CardVersion] | None = None,
+    max_turns: int = DEFAULT_MAX_TURNS,
+    workers: Optional[int] = None,
+) -> EvalReport:
+    """
+    Играть группы партий, пока SPRT не примет решение или не кончится
+    max_games. num_players — от 2 до 6.
+    """
+    if not 2 <= num_players <= 6:
+        raise ValueError("Число игроков должно быть от 2 до 6")
+
+    base = 1.0 / num_players
+    sprt = SPRT(p0=base + delta0, p1=base + delta1, alpha=alpha, beta=beta)
+
+    seat_games = [0] * num_players
+    seat_wins = [0] * num_players
+    games = 0
+    no_winner = 0
+    turns = 0
+    cpu = 0.0
+    started = time.monotonic()
+
+    worker = partial(
+        play_group,
+        candidate,
+        baseline,
+        num_players,
+        base_seed=base_seed,
+        allowed_versions=allowed_versions,
+        max_turns=max_turns,
+    )
+    max_groups = max(1, max_games // num_players)
+
+    decision = None
+    for records in run_parallel(worker, range(max_groups), workers):
+        for seat, winner, game_turns, game_cpu in records:
+            games += 1
+            turns += game_turns
+            cpu += game_cpu
+            if winner is None:
+                no_winner += 1
+                continue
+            won = winner == seat
+            seat_games[seat] += 1
+            seat_wins[seat] += won
+            sprt.add(won)
+
+        decision = sprt.decision()
+        if decision is not None:
+            break
+
+    decided = sprt.wins + sprt.losses
+    planned = max_groups * num_players
+    return EvalReport(
+        candidate=candidate.label,
+        baseline=baseline.label,
+        num_players=num_players,
+        decision=decision,
+        llr=sprt.llr,
+        games=games,
+        max_games=planned,
+        wins=sprt.wins,
+        no_winner=no_winner,
+        win_rate=sprt.wins / decided if decided else 0.0,
+        interval=wilson_interval(sprt.wins, decided),
+        seat_games=seat_games,
+        seat_wins=seat_wins,
+        mean_turns=turns / games if games else 0.0,
+        cpu_time=cpu,
+        cpu_time_saved=(cpu / games) * (planned - games) if games else 0.0,
+        wall_time=time.monotonic() - started,
+    )
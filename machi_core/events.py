@@ -0,0 +1,106 @@
+"""
+События движка.
+
+rules.py во время apply_action сообщает, что произошло: кто сколько
+получил, кто кому заплатил, что куплено и построено, как сменилась фаза.
+Подписчики (UI, сервер, запись партий, аналитика) вешаются на конкретное
+состояние:
+
+    log = EventLog()
+    subscribe(state, log)
+    apply_action(state, action, dice_value=4)
+    for event in log.drain():
+        ...
+
+Подписчики не копируются вместе с состоянием (GameState.copy, pickle),
+так что rollout'ы поиска на копиях ничего не шлют. Когда подписчиков нет,
+события не создаются вовсе: в rules.py каждое место проверяет
+state.listeners до конструирования события.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Union
+
+from .state import GameState, Phase
+
+
+@dataclass(frozen=True)
+class IncomeEvent:
+    """Игрок получил монеты из банка (зелёные, синие, снос, бонус кредитного бюро)."""
+    player: int
+    card_id: str
+    amount: int
+
+
+@dataclass(frozen=True)
+class TransferEvent:
+    """Монеты перешли от игрока к игроку (красные карты)."""
+    from_player: int
+    to_player: int
+    card_id: str
+    amount: int
+
+
+@dataclass(frozen=True)
+class PurchaseEvent:
+    player: int
+    card_id: str
+    cost: int
+
+
+@dataclass(frozen=True)
+class LandmarkEvent:
+    """Достопримечательность построена (built=True) или снесена."""
+    player: int
+    landmark_id: str
+    built: bool
+    cost: int = 0
+
+
+@dataclass(frozen=True)
+class PhaseChange:
+    """Смена фазы; player — чей ход после смены, roll — выпавшее значение."""
+    player: int
+    old: Phase
+    new: Phase
+    roll: Optional[int] = None
+
+
+Event = Union[IncomeEvent, TransferEvent, PurchaseEvent, LandmarkEvent, PhaseChange]
+Listener = Callable[[Event], None]
+
+
+def subscribe(state: GameState, listener: Listener) -> Listener:
+    """Подписать listener на события состояния; возвращает его же."""
+    if state.listeners is None:
+        state.listeners = []
+    state.listeners.append(listener)
+    return listener
+
+
+def unsubscribe(state: GameState, listener: Listener) -> None:
+    if state.listeners and listener in state.listeners:
+        state.listeners.remove(listener)
+    if not state.listeners:
+        state.listeners = None
+
+
+def emit(listeners: List[Listener], event: Event) -> None:
+    for listener in listeners:
+        listener(event)
+
+
+class EventLog:
+    """Подписчик, который просто копит события."""
+
+    def __init__(self) -> None:
+        self.events: List[Event] = []
+
+    def __call__(self, event: Event) -> None:
+        self.events.append(event)
+
+    def drain(self) -> List[Event]:
+        events, self.events = self.events, []
+        return events
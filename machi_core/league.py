@@ -0,0 +1,283 @@
+"""
+Лига агентов: круговой турнир с рейтингом Эло.
+
+Здесь:
+    - регистрация участников (AgentSpec под уникальным именем);
+    - расписание: каждое сочетание из num_players участников играет
+      заданное число раундов; раунд — группа партий с одним seed,
+      где состав по очереди сдвигается по местам;
+    - рейтинг Эло для нескольких игроков, обновляется по мере
+      поступления результатов с пула процессов;
+    - состояние лиги в JSON: прогон можно прервать, продолжить
+      или добавить новых участников — старые партии не переигрываются.
+
+Эло для нескольких игроков: партия раскладывается на пары, победитель
+выигрывает у каждого, проигравшие между собой — ничья.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import partial
+from itertools import combinations
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+import hashlib
+import json
+import os
+
+from .cards import CardVersion
+from .checkpoint import atomic_write_json
+from .simulation import (
+    DEFAULT_MAX_TURNS,
+    AgentSpec,
+    build_agents,
+    game_seed,
+    play_game,
+    run_parallel,
+)
+
+
+DEFAULT_RATING = 1500.0
+
+# (номер участника в составе на каждом месте, победитель-место или None)
+MatchGame = Tuple[List[int], Optional[int]]
+
+
+@dataclass
+class Standing:
+    name: str
+    rating: float
+    games: int
+    wins: int
+
+
+def _match_key(names: Sequence[str]) -> str:
+    return "|".join(names)
+
+
+def match_seed(base_seed: int, names: Sequence[str], round_index: int) -> int:
+    """
+    Seed раунда зависит только от состава и номера раунда.
+    Хэш (состав, раунд) укладывается в 32 бита — номер партии в game_seed,
+    так что seed'ы не залезают в пространство следующего base_seed.
+    """
+    digest = hashlib.blake2b(
+        f"{_match_key(names)}#{round_index}".encode("utf-8"), digest_size=4,
+    ).digest()
+    return game_seed(base_seed, int.from_bytes(digest, "little"))
+
+
+def play_match(
+    spec_dicts: Sequence[Dict[str, Any]],
+    seed: int,
+    allowed_versions: Optional[List[str]] = None,
+    max_turns: int = DEFAULT_MAX_TURNS,
+) -> List[MatchGame]:
+    """
+    Один раунд: состав сдвигается по местам, seed общий для всех партий.
+    """
+    specs = [AgentSpec.from_dict(d) for d in spec_dicts]
+    versions = {CardVersion(v) for v in allowed_versions} if allowed_versions else None
+    k = len(specs)
+
+    games: List[MatchGame] = []
+    for shift in range(k):
+        lineup = [(seat + shift) % k for seat in range(k)]
+        agents = build_agents([specs[i] for i in lineup], seed)
+        result = play_game(agents, seed, versions, max_turns)
+        games.append((lineup, result.winner))
+    return games
+
+
+class League:
+    """
+    Состояние лиги: участники, рейтинги, сколько раундов сыграно
+    каждым составом. Хранится в JSON по path.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        num_players: int = 2,
+        k_factor: float = 16.0,
+        base_seed: int = 0,
+        allowed_versions: set[CardVersion] | None = None,
+        max_turns: int = DEFAULT_MAX_TURNS,
+    ) -> None:
+        self.path = path
+        self.config: Dict[str, Any] = {
+            "num_players": num_players,
+            "k_factor": k_factor,
+            "base_seed": base_seed,
+            "allowed_versions": sorted(v.value for v in (allowed_versions or {CardVersion.NORMAL})),
+            "max_turns": max_turns,
+        }
+        self.entrants: Dict[str, Dict[str, Any]] = {}
+        self.ratings: Dict[str, float] = {}
+        self.games: Dict[str, int] = {}
+        self.wins: Dict[str, int] = {}
+        self.played: Dict[str, int] = {}   # состав -> сыграно раундов
+
+    # ---- хранение ----------------------------------------------------------
+
+    @classmethod
+    def load(cls, path: str) -> "League":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        league = cls(path)
+        league.config = data["config"]
+        league.entrants = data["entrants"]
+        league.ratings = data["ratings"]
+        league.games = data["games"]
+        league.wins = data["wins"]
+        league.played = data["played"]
+        return league
+
+    @classmethod
+    def load_or_create(cls, path: str, **kwargs: Any) -> "League":
+        """
+        Загрузить лигу, если файл есть, иначе создать новую с kwargs.
+        Если kwargs расходятся с сохранённой конфигурацией — ValueError.
+        """
+        fresh = cls(path, **kwargs)
+        if not os.path.exists(path):
+            return fresh
+        league = cls.load(path)
+        mismatched = [
+            key for key in kwargs
+            if fresh.config[key] != league.config.get(key)
+        ]
+        if mismatched:
+            raise ValueError(
+                f"Лига {path} сохранена с другими параметрами: "
+                + ", ".join(f"{k}={league.config.get(k)!r} (передано {fresh.config[k]!r})" for k in mismatched)
+            )
+        return league
+
+    def save(self) -> None:
+        data = {
+            "config": self.config,
+            "entrants": self.entrants,
+            "ratings": self.ratings,
+            "games": self.games,
+            "wins": self.wins,
+            "played": self.played,
+        }
+        atomic_write_json(self.path, data)
+
+    # ---- участники ---------------------------------------------------------
+
+    def register(self, name: str, spec: AgentSpec, rating: float = DEFAULT_RATING) -> None:
+        if "|" in name:
+            raise ValueError("Имя участника не может содержать '|'")
+        if name in self.entrants:
+            if self.entrants[name] != spec.to_dict():
+                raise ValueError(f"Участник {name} уже зарегистрирован с другими параметрами")
+            return
+        self.entrants[name] = spec.to_dict()
+        self.ratings[name] = rating
+        self.games[name] = 0
+        self.wins[name] = 0
+
+    # ---- расписание и рейтинг ----------------------------------------------
+
+    def schedule(self, rounds: int) -> Iterator[Tuple[Tuple[str, ...], int]]:
+        """
+        Недостающие раунды: каждый состав доигрывает до rounds.
+        Новые участники догоняют, старые составы не переигрываются.
+        """
+        names = sorted(self.entrants)
+        k = self.config["num_players"]
+        for round_index in range(rounds):
+            for lineup in combinations(names, k):
+                if self.played.get(_match_key(lineup), 0) <= round_index:
+                    yield lineup, round_index
+
+    def record(self, names: Sequence[str], games: Sequence[MatchGame]) -> None:
+        """Учесть результаты одного раунда."""
+        k_factor = self.config["k_factor"]
+        k = len(names)
+
+        for lineup, winner_seat in games:
+            seated = [names[i] for i in lineup]
+            winner = None if winner_seat is None else seated[winner_seat]
+
+            deltas = {name: 0.0 for name in seated}
+            for a, b in combinations(seated, 2):
+                expected_a = 1.0 / (1.0 + 10 ** ((self.ratings[b] - self.ratings[a]) / 400))
+                if winner == a:
+                    score_a = 1.0
+                elif winner == b:
+                    score_a = 0.0
+                else:
+                    score_a = 0.5
+                change = k_factor / (k - 1) * (score_a - expected_a)
+                deltas[a] += change
+                deltas[b] -= change
+
+            for name in seated:
+                self.ratings[name] += deltas[name]
+                self.games[name] += 1
+            if winner is not None:
+                self.wins[winner] += 1
+
+        key = _match_key(names)
+        self.played[key] = self.played.get(key, 0) + 1
+
+    def run(
+        self,
+        rounds: int,
+        workers: Optional[int] = None,
+        save_every: int = 50,
+    ) -> int:
+        """
+        Доиграть расписание до rounds раундов на пуле процессов.
+        Рейтинги обновляются по мере прихода результатов, состояние
+        сохраняется каждые save_every раундов и в конце.
+        Возвращает число сыгранных раундов.
+        """
+        tasks = list(self.schedule(rounds))
+        base_seed = self.config["base_seed"]
+
+        worker = partial(
+            _play_task,
+            allowed_versions=self.config["allowed_versions"],
+            max_turns=self.config["max_turns"],
+        )
+        items = [
+            ([self.entrants[n] for n in lineup], match_seed(base_seed, lineup, r))
+            for lineup, r in tasks
+        ]
+
+        done = 0
+        for (lineup, _), games in zip(tasks, run_parallel(worker, items, workers)):
+            self.record(lineup, games)
+            done += 1
+            if done % save_every == 0:
+                self.save()
+
+        self.save()
+        return done
+
+    def standings(self) -> List[Standing]:
+        table = [
+            Standing(name, self.ratings[name], self.games[name], self.wins[name])
+            for name in self.entrants
+        ]
+        table.sort(key=lambda s: s.rating, reverse=True)
+        return table
+
+    def format_standings(self) -> str:
+        lines = [f"{'участник':<24} {'рейтинг':>8} {'партий':>7} {'побед':>6}"]
+        for s in self.standings():
+            lines.append(f"{s.name:<24} {s.rating:>8.1f} {s.games:>7} {s.wins:>6}")
+        return "\n".join(lines)
+
+
+def _play_task(
+    item: Tuple[List[Dict[str, Any]], int],
+    allowed_versions: Optional[List[str]] = None,
+    max_turns: int = DEFAULT_MAX_TURNS,
+) -> List[MatchGame]:
+    spec_dicts, seed = item
+    return play_match(spec_dicts, seed, allowed_versions, max_turns)
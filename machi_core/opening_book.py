@@ -0,0 +1,249 @@
+"""
+Дебютная книга: заранее посчитанные первые покупки.
+
+Все партии начинаются одинаково (3 монеты, пшеничное поле, пекарня),
+поэтому первые покупки повторяются из партии в партию. Книга хранит
+для каждой дебютной позиции ранжированный список покупок, бот берёт
+первую допустимую за O(1) вместо поиска.
+
+Ключ позиции:
+    (место игрока, номер его покупки, монеты, что у него есть).
+Рынок в ключ не входит: он зависит от перемешивания колоды, поэтому
+в книге лежит весь рейтинг действий, и недоступные пропускаются.
+
+Отдельная таблица на каждое число игроков и набор версий карт;
+lookup выбирает её по state.market.versions.
+На диске — gzip JSON, действия — порядковые номера карт
+(cards.CARD_INDEX), END_BUY — -1.
+
+Построение: партии политикой (GreedyBot за всех), с первых depth
+покупок каждого игрока собираются позиции; для каждой позиции
+каждое допустимое действие оценивается доигрыванием до конца.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from functools import partial
+from random import Random
+from typing import AbstractSet, Dict, List, Optional, Sequence, Tuple
+import copy
+import gzip
+import json
+
+from .actions import Action, ActionType
+from .bots.greedy_bot import GreedyBot
+from .cards import CARD_INDEX, CardVersion, versions_key
+from .rules import legal_actions, new_game
+from .simulation import (
+    DEFAULT_MAX_TURNS,
+    AgentSpec,
+    build_agents,
+    game_seed,
+    play_game,
+    run_parallel,
+    step,
+)
+from .state import GameState, Phase, PlayerState
+
+
+END_BUY_CODE = -1
+
+
+def table_key(num_players: int, allowed_versions: AbstractSet[CardVersion] | None) -> str:
+    return f"{num_players}:{versions_key(allowed_versions)}"
+
+
+def _holdings(player: PlayerState) -> str:
+    cards = ",".join(
+        f"{CARD_INDEX[card_id]}x{count}"
+        for card_id, count in sorted(player.establishments.items(), key=lambda kv: CARD_INDEX[kv[0]])
+        if count > 0
+    )
+    landmarks = ",".join(
+        str(CARD_INDEX[lm]) for lm, built in sorted(player.landmarks.items()) if built
+    )
+    return f"{cards}/{landmarks}"
+
+
+def position_key(seat: int, buy_index: int, player: PlayerState) -> str:
+    return f"{seat}|{buy_index}|{player.coins}|{_holdings(player)}"
+
+
+def action_code(action: Action) -> int:
+    if action.type == ActionType.END_BUY:
+        return END_BUY_CODE
+    return CARD_INDEX[action.card_id]
+
+
+def _buy_counts(state: GameState) -> List[int]:
+    # номер покупки = сколько у игрока предприятий сверх стартовых + достопримечательностей
+    return [
+        sum(p.establishments.values()) - 2 + sum(p.landmarks.values())
+        for p in state.players
+    ]
+
+
+class OpeningBook:
+    """
+    Дебютная книга: table_key -> position_key -> коды действий по убыванию силы.
+    """
+
+    def __init__(self, depth: int, tables: Optional[Dict[str, Dict[str, List[int]]]] = None) -> None:
+        self.depth = depth
+        self.tables: Dict[str, Dict[str, List[int]]] = tables or {}
+
+    # ---- хранение ----------------------------------------------------------
+
+    def save(self, path: str) -> None:
+        data = {"depth": self.depth, "tables": self.tables}
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, path: str) -> "OpeningBook":
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["depth"], data["tables"])
+
+    # ---- поиск -------------------------------------------------------------
+
+    def lookup(self, state: GameState, player_index: int) -> Optional[Action]:
+        """
+        Книжный ход в фазе BUY или None, если позиции нет в книге.
+
+        Таблица — по числу игроков и набору версий карт партии
+        (state.market.versions).
+        """
+        if state.phase != Phase.BUY or state.current_player != player_index:
+            return None
+
+        player = state.players[player_index]
+        buy_index = _buy_counts(state)[player_index]
+        if buy_index >= self.depth:
+            return None
+
+        table = self.tables.get(table_key(len(state.players), state.market.versions))
+        if not table:
+            return None
+
+        ranked = table.get(position_key(player_index, buy_index, player))
+        if not ranked:
+            return None
+
+        legal = {action_code(a): a for a in legal_actions(state, player_index)}
+        for code in ranked:
+            if code in legal:
+                return legal[code]
+        return None
+
+
+# ---- построение --------------------------------------------------------------
+
+
+def _collect_positions(
+    policy: AgentSpec,
+    num_players: int,
+    allowed_versions: set[CardVersion] | None,
+    depth: int,
+    game_id: int,
+    base_seed: int,
+) -> List[Tuple[str, GameState]]:
+    """Одна партия политикой; дебютные позиции фазы BUY."""
+    seed = game_seed(base_seed, game_id)
+    rng = Random(seed)
+    agents = build_agents([policy] * num_players, seed)
+    state = new_game(num_players, allowed_versions, rng=rng)
+
+    positions: List[Tuple[str, GameState]] = []
+    while not state.done:
+        idx = state.current_player
+        buys = _buy_counts(state)
+        if min(buys) >= depth:
+            break
+        if state.phase == Phase.BUY and buys[idx] < depth:
+            key = position_key(idx, buys[idx], state.players[idx])
+            positions.append((key, copy.deepcopy(state)))
+        state = step(state, agents[idx].select_action(state, idx), rng)
+    return positions
+
+
+def _rank_position(
+    item: Tuple[str, List[GameState], int],
+    policy: AgentSpec,
+    rollouts: int,
+    max_turns: int,
+) -> Tuple[str, List[int]]:
+    """Оценить все допустимые действия позиции доигрываниями."""
+    key, states, seed = item
+    rng = Random(seed)
+    wins: Dict[int, float] = defaultdict(float)
+    plays: Dict[int, int] = defaultdict(int)
+
+    for state in states:
+        idx = state.current_player
+        for action in legal_actions(state, idx):
+            code = action_code(action)
+            for _ in range(rollouts):
+                sim = copy.deepcopy(state)
+                step(sim, action, rng)
+                rollout_seed = rng.randrange(2**31)
+                agents = build_agents([policy] * len(sim.players), rollout_seed)
+                play_game(agents, rollout_seed, max_turns=max_turns, state=sim)
+                wins[code] += sim.winner == idx
+                plays[code] += 1
+
+    ranked = sorted(plays, key=lambda c: wins[c] / plays[c], reverse=True)
+    return key, ranked
+
+
+def build_opening_book(
+    player_counts: Sequence[int] = (2, 3, 4, 5, 6),
+    version_sets: Sequence[set[CardVersion]] = ({CardVersion.NORMAL},),
+    depth: int = 2,
+    games: int = 2000,
+    states_per_position: int = 8,
+    rollouts: int = 16,
+    min_visits: int = 4,
+    policy: Optional[AgentSpec] = None,
+    base_seed: int = 0,
+    max_turns: int = DEFAULT_MAX_TURNS,
+    workers: Optional[int] = None,
+    book: Optional[OpeningBook] = None,
+) -> OpeningBook:
+    """
+    Построить (или дополнить) книгу для всех сочетаний числа игроков
+    и наборов версий. Позиции, встреченные реже min_visits раз,
+    в книгу не попадают. policy по умолчанию — GreedyBot за всех.
+    """
+    if policy is None:
+        policy = AgentSpec(GreedyBot)
+    if book is None:
+        book = OpeningBook(depth)
+
+    for num_players in player_counts:
+        for versions in version_sets:
+            collect = partial(
+                _collect_positions, policy, num_players, versions, depth,
+                base_seed=base_seed,
+            )
+            grouped: Dict[str, List[GameState]] = defaultdict(list)
+            visits: Dict[str, int] = defaultdict(int)
+            for positions in run_parallel(collect, range(games), workers, chunksize=16):
+                for key, state in positions:
+                    visits[key] += 1
+                    if len(grouped[key]) < states_per_position:
+                        grouped[key].append(state)
+
+            items = [
+                (key, states, game_seed(base_seed, i))
+                for i, (key, states) in enumerate(sorted(grouped.items()))
+                if visits[key] >= min_visits
+            ]
+            rank = partial(_rank_position, policy=policy, rollouts=rollouts, max_turns=max_turns)
+            table = book.tables.setdefault(table_key(num_players, versions), {})
+            for key, ranked in run_parallel(rank, items, workers):
+                table[key] = ranked
+
+    return book
+
@@ -0,0 +1,181 @@
+"""
+Точное распределение итогов одного броска.
+
+Для текущей позиции: с какой вероятностью как изменятся монеты
+каждого игрока после следующего броска активного игрока (1 кубик
+и, если есть вокзал, 2 кубика). Считается перебором значений кубика,
+а не сэмплированием:
+    - значения, на которые ни у кого нет карт (cards.ACTIVATION_TABLE),
+      сразу дают нулевое изменение;
+    - для остальных один раз вызывается настоящий rules._resolve_dice
+      на дешёвой копии игроков;
+    - случайность внутри эффектов (броски траулера, выбор
+      достопримечательности под снос) тоже перебирается полностью.
+
+Результаты кэшируются по сигнатуре позиции (активный игрок, монеты,
+предприятия и достопримечательности всех игроков).
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .cards import ACTIVATION_TABLE, P_ONE_DIE, P_TWO_DICE
+from .rules import _resolve_dice
+from .state import GameState, MarketState, Phase, PlayerState
+
+
+CACHE_SIZE = 4096
+
+# изменение монет по игрокам -> вероятность
+Distribution = Dict[Tuple[int, ...], float]
+
+
+@dataclass
+class TurnOutcomes:
+    one_die: Distribution
+    two_dice: Optional[Distribution]   # None — вокзала нет, 2 кубика нельзя
+
+
+class _NeedMoreChoices(Exception):
+    def __init__(self, options: int) -> None:
+        self.options = options
+
+
+class _ScriptedRandom:
+    """
+    «Случайность» по заранее заданным номерам вариантов.
+    Если эффект запросил больше выборов, чем задано, — исключение
+    с числом вариантов, и перебор ветвится.
+    """
+
+    def __init__(self, script: Tuple[int, ...]) -> None:
+        self._script = script
+        self._pos = 0
+
+    def _next(self, options: int) -> int:
+        if self._pos >= len(self._script):
+            raise _NeedMoreChoices(options)
+        value = self._script[self._pos]
+        self._pos += 1
+        return value
+
+    def randint(self, a: int, b: int) -> int:
+        return a + self._next(b - a + 1)
+
+    def choice(self, seq: Sequence):
+        return seq[self._next(len(seq))]
+
+
+_cache: "OrderedDict[tuple, TurnOutcomes]" = OrderedDict()
+
+
+def _signature(state: GameState) -> tuple:
+    return (
+        state.current_player,
+        tuple(
+            (
+                p.coins,
+                tuple(sorted((k, v) for k, v in p.establishments.items() if v > 0)),
+                tuple(sorted(k for k, v in p.landmarks.items() if v)),
+            )
+            for p in state.players
+        ),
+    )
+
+
+def _scratch(state: GameState, roll: int) -> GameState:
+    # предприятия _resolve_dice не меняет — словари можно не копировать
+    players = [
+        PlayerState(name=p.name, coins=p.coins, establishments=p.establishments, landmarks=dict(p.landmarks))
+        for p in state.players
+    ]
+    return GameState(
+        players=players,
+        current_player=state.current_player,
+        phase=Phase.RESOLVE,
+        market=MarketState(),
+        last_roll=roll,
+        done=False,
+    )
+
+
+def _roll_distribution(state: GameState, roll: int) -> Distribution:
+    """Изменения монет при конкретном значении кубика (с перебором эффектов)."""
+    n = len(state.players)
+    owned = set()
+    for p in state.players:
+        owned.update(k for k, v in p.establishments.items() if v > 0)
+    if not owned.intersection(ACTIVATION_TABLE.get(roll, ())):
+        return {(0,) * n: 1.0}
+
+    before = [p.coins for p in state.players]
+    dist: Distribution = defaultdict(float)
+
+    # перебор в глубину по выборам внутри эффектов
+    stack: List[Tuple[Tuple[int, ...], float]] = [((), 1.0)]
+    while stack:
+        script, prob = stack.pop()
+        scratch = _scratch(state, roll)
+        try:
+            _resolve_dice(scratch, _ScriptedRandom(script))
+        except _NeedMoreChoices as more:
+            for option in range(more.options):
+                stack.append((script + (option,), prob / more.options))
+            continue
+        delta = tuple(p.coins - c for p, c in zip(scratch.players, before))
+        dist[delta] += prob
+
+    return dict(dist)
+
+
+def roll_outcomes(state: GameState, num_dice: int) -> Distribution:
+    """Распределение изменений монет для броска num_dice кубиков."""
+    table = P_TWO_DICE if num_dice == 2 else P_ONE_DIE
+    total: Distribution = defaultdict(float)
+    for roll, p_roll in table.items():
+        for delta, p in _roll_distribution(state, roll).items():
+            total[delta] += p_roll * p
+    return dict(total)
+
+
+def turn_outcomes(state: GameState) -> TurnOutcomes:
+    """Распределения для 1 и 2 кубиков (с кэшем по сигнатуре позиции)."""
+    key = _signature(state)
+    cached = _cache.get(key)
+    if cached is not None:
+        _cache.move_to_end(key)
+        return cached
+
+    current = state.current_player_state()
+    result = TurnOutcomes(
+        one_die=roll_outcomes(state, 1),
+        two_dice=roll_outcomes(state, 2) if current.has_built("train_station") else None,
+    )
+
+    _cache[key] = result
+    if len(_cache) > CACHE_SIZE:
+        _cache.popitem(last=False)
+    return result
+
+
+def expected_change(dist: Distribution) -> List[float]:
+    """Матожидание изменения монет каждого игрока."""
+    if not dist:
+        return []
+    n = len(next(iter(dist)))
+    result = [0.0] * n
+    for delta, p in dist.items():
+        for i in range(n):
+            result[i] += p * delta[i]
+    return result
+
+
+def player_distribution(dist: Distribution, player_index: int) -> Dict[int, float]:
+    """Маргинальное распределение изменения монет одного игрока."""
+    result: Dict[int, float] = defaultdict(float)
+    for delta, p in dist.items():
+        result[delta[player_index]] += p
+    return dict(sorted(result.items()))
@@ -0,0 +1,194 @@
+"""
+Индекс позиций по архиву реплеев.
+
+Лежит рядом с архивом (<архив>.idx) и отвечает на вопросы без
+повторной симуляции:
+    - «партии, где у игрока было 3 кафе и порт к раунду 8» —
+      по вехам: когда у игрока впервые стало k копий карты;
+    - «где встречалась эта позиция» — по компактному ключу состояния
+      в начале каждого хода.
+
+Формат — JSON-строки, по одной на проиндексированную партию:
+
+    {"offset": ..., "end": ..., "num_players": 2, "versions": "normal",
+     "milestones": [[seat, card_id, count, round], ...],
+     "positions": [[actions_applied, key], ...]}
+
+Индекс только дописывается: update() читает архив с байта end последней
+строки, так что новые партии индексируются по мере поступления.
+
+Раунд — как в analytics.round_of; стартовые карты — раунд 0.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+import copy
+import hashlib
+import json
+import os
+
+from .actions import ActionType
+from .analytics import round_of
+from .encoding import index_action
+from .replays import Replay, iter_replay_spans, read_replay, replay_states
+from .state import GameState, Phase
+
+
+INDEX_SUFFIX = ".idx"
+
+GameSeat = Tuple[int, int]   # (смещение партии в архиве, место)
+
+
+def state_key(state: GameState) -> str:
+    """Компактный ключ позиции: чей ход, фаза, игроки, рынок."""
+    parts = [str(state.current_player), state.phase.value]
+    for p in state.players:
+        cards = ",".join(f"{k}{v}" for k, v in sorted(p.establishments.items()) if v > 0)
+        landmarks = ",".join(sorted(k for k, v in p.landmarks.items() if v))
+        parts.append(f"{p.coins}:{cards}:{landmarks}")
+    parts.append(",".join(f"{k}{v}" for k, v in sorted(state.market.available.items()) if v > 0))
+    return hashlib.blake2b("|".join(parts).encode("utf-8"), digest_size=8).hexdigest()
+
+
+def index_replay(offset: int, end: int, replay: Replay) -> Dict[str, Any]:
+    """Строка индекса для одной партии."""
+    n = replay["num_players"]
+    counts: List[Dict[str, int]] = [defaultdict(int) for _ in range(n)]
+    milestones: List[List[Any]] = []
+    positions: List[List[Any]] = []
+    turns = 0
+
+    states = replay_states(replay)
+    _, state = next(states)
+    for seat, player in enumerate(state.players):
+        for card_id, count in player.establishments.items():
+            for k in range(1, count + 1):
+                milestones.append([seat, card_id, k, 0])
+            counts[seat][card_id] = count
+        for landmark_id, built in player.landmarks.items():
+            if built:
+                milestones.append([seat, landmark_id, 1, 0])
+                counts[seat][landmark_id] = 1
+    positions.append([0, state_key(state)])
+
+    for code in replay["actions"]:
+        action = index_action(code)
+        seat = state.current_player
+        applied, state = next(states)
+        if action.type == ActionType.ROLL:
+            turns += 1
+        elif action.card_id is not None:
+            counts[seat][action.card_id] += 1
+            milestones.append([seat, action.card_id, counts[seat][action.card_id], round_of(turns, n)])
+        if state.phase == Phase.ROLL and not state.done:
+            positions.append([applied, state_key(state)])
+
+    return {
+        "offset": offset,
+        "end": end,
+        "game": replay.get("game"),
+        "num_players": n,
+        "versions": replay["versions"],
+        "milestones": milestones,
+        "positions": positions,
+    }
+
+
+class PositionIndex:
+    """
+    Индекс архива в памяти + файл <архив>.idx.
+    """
+
+    def __init__(self, archive_path: str) -> None:
+        self.archive_path = archive_path
+        self.path = archive_path + INDEX_SUFFIX
+        self.indexed_to = 0
+        self.games: Dict[int, Tuple[int, str]] = {}   # смещение -> (игроков, версии)
+        # (карта, копий) -> (партия, место) -> раунд, когда их стало столько
+        self.milestones: Dict[Tuple[str, int], Dict[GameSeat, int]] = defaultdict(dict)
+        # ключ позиции -> [(партия, сколько действий применено)]
+        self.positions: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self._load()
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        valid_end = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                self._add(json.loads(line))
+                valid_end += len(line)
+        if valid_end < os.path.getsize(self.path):
+            with open(self.path, "r+b") as f:
+                f.truncate(valid_end)
+
+    def _add(self, entry: Dict[str, Any]) -> None:
+        offset = entry["offset"]
+        self.games[offset] = (entry["num_players"], entry["versions"])
+        for seat, card_id, count, r in entry["milestones"]:
+            self.milestones[card_id, count][offset, seat] = r
+        for applied, key in entry["positions"]:
+            self.positions[key].append((offset, applied))
+        self.indexed_to = max(self.indexed_to, entry["end"])
+
+    def update(self) -> int:
+        """Проиндексировать новые партии архива; вернуть, сколько добавлено."""
+        entries = []
+        for offset, end, replay in iter_replay_spans(self.archive_path, self.indexed_to):
+            entries.append(index_replay(offset, end, replay))
+        if not entries:
+            return 0
+        with open(self.path, "ab") as f:
+            for entry in entries:
+                f.write(json.dumps(entry, separators=(",", ":")).encode("utf-8") + b"\n")
+            f.flush()
+            os.fsync(f.fileno())
+        for entry in entries:
+            self._add(entry)
+        return len(entries)
+
+    # ---- запросы -----------------------------------------------------------
+
+    def query(
+        self,
+        holdings: Mapping[str, int],
+        by_round: int,
+        num_players: Optional[int] = None,
+        versions: Optional[str] = None,
+    ) -> List[GameSeat]:
+        """
+        (партия, место), где у игрока к раунду by_round было не меньше
+        holdings[card_id] копий каждой карты (достопримечательность — 1).
+        """
+        found: Optional[set] = None
+        for card_id, count in holdings.items():
+            reached = self.milestones.get((card_id, count), {})
+            hits = {gs for gs, r in reached.items() if r <= by_round}
+            found = hits if found is None else found & hits
+            if not found:
+                return []
+        if found is None:
+            return []
+        return sorted(
+            (offset, seat) for offset, seat in found
+            if (num_players is None or self.games[offset][0] == num_players)
+            and (versions is None or self.games[offset][1] == versions)
+        )
+
+    def find(self, state: GameState) -> List[Tuple[int, int]]:
+        """Где встречалась позиция (в начале хода): (партия, сколько действий применено)."""
+        return list(self.positions.get(state_key(state), ()))
+
+    def load_game(self, offset: int) -> Replay:
+        return read_replay(self.archive_path, offset)
+
+    def position_at(self, offset: int, applied: int) -> GameState:
+        """Состояние партии после applied действий."""
+        for i, state in replay_states(self.load_game(offset)):
+            if i == applied:
+                return copy.deepcopy(state)
+        raise IndexError(applied)
@@ -0,0 +1,185 @@
+"""
+Счётчики горячих функций движка.
+
+Включается контекстным менеджером или, в точках входа (benchmarks/run.py,
+desktop/main.py), переменной окружения MACHI_PROFILE через enable_from_env():
+
+    with profiling() as prof:
+        play_games(...)
+    print(prof.report())
+
+    MACHI_PROFILE=1 python benchmarks/run.py run -k game          # таблица в stderr при выходе
+    MACHI_PROFILE=prof.json python benchmarks/run.py run -k game  # JSON в файл при выходе
+
+Импорт движка сам ничего не включает.
+
+Когда выключено, в движке ничего нет: включение подменяет функции
+обёртками-счётчиками во всех модулях, где они импортированы (и метод
+GameState.check_victory), выключение возвращает оригиналы. Поэтому
+включать и выключать лучше вне горячего цикла.
+
+Время — накопленное с вложенными вызовами (apply_action включает
+_resolve_dice, а тот — стадии по цветам). Счётчики свои у каждого
+процесса; если файл отчёта уже есть, к имени добавляется pid.
+"""
+
+from __future__ import annotations
+
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+import atexit
+import functools
+import json
+import os
+import sys
+import time
+
+from . import rules
+from .state import GameState
+
+
+ENV_VAR = "MACHI_PROFILE"
+
+# функции rules.py: имя в отчёте == имя в модуле
+RULES_TARGETS: Tuple[str, ...] = (
+    "legal_actions",
+    "apply_action",
+    "_resolve_dice",
+    "_resolve_red",
+    "_resolve_green",
+    "_resolve_blue",
+    "_fill_market_unique",
+)
+VICTORY_TARGET = "check_victory"
+
+# имя -> [вызовы, наносекунды]
+_counters: Dict[str, List[int]] = {}
+# (имя, оригинал, обёртка)
+_patched: List[Tuple[str, Callable, Callable]] = []
+
+
+def _wrap(name: str, fn: Callable) -> Callable:
+    counter = _counters.setdefault(name, [0, 0])
+    clock = time.perf_counter_ns
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        t0 = clock()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            counter[0] += 1
+            counter[1] += clock() - t0
+
+    return wrapper
+
+
+def _rebind(old: Callable, new: Callable, attr: str) -> None:
+    # все модули, которые сделали from .rules import <attr>
+    for module in list(sys.modules.values()):
+        if getattr(module, "__dict__", {}).get(attr) is old:
+            setattr(module, attr, new)
+
+
+def is_enabled() -> bool:
+    return bool(_patched)
+
+
+def enable() -> None:
+    if _patched:
+        return
+    for name in RULES_TARGETS:
+        original = getattr(rules, name)
+        wrapper = _wrap(name, original)
+        _rebind(original, wrapper, name)
+        _patched.append((name, original, wrapper))
+
+    original = GameState.check_victory
+    wrapper = _wrap(VICTORY_TARGET, original)
+    GameState.check_victory = wrapper
+    _patched.append((VICTORY_TARGET, original, wrapper))
+
+
+def disable() -> None:
+    while _patched:
+        name, original, wrapper = _patched.pop()
+        if name == VICTORY_TARGET:
+            GameState.check_victory = original
+        else:
+            _rebind(wrapper, original, name)
+
+
+def reset() -> None:
+    for counter in _counters.values():
+        counter[0] = counter[1] = 0
+
+
+def stats() -> Dict[str, Dict[str, float]]:
+    """{имя: {calls, total_ns, mean_ns}} для вызывавшихся функций."""
+    return {
+        name: {"calls": calls, "total_ns": ns, "mean_ns": ns / calls}
+        for name, (calls, ns) in _counters.items()
+        if calls
+    }
+
+
+def report(fmt: str = "table") -> str:
+    """Отчёт: fmt="table" — текстовая таблица, "json" — JSON."""
+    data = stats()
+    if fmt == "json":
+        return json.dumps(data, indent=1)
+    if fmt != "table":
+        raise ValueError(f"Неизвестный формат отчёта: {fmt}")
+
+    lines = [f"{'функция':<22} {'вызовов':>12} {'всего, мс':>12} {'среднее, мкс':>14}"]
+    for name, row in sorted(data.items(), key=lambda item: -item[1]["total_ns"]):
+        lines.append(
+            f"{name:<22} {row['calls']:>12} {row['total_ns'] / 1e6:>12.1f} {row['mean_ns'] / 1e3:>14.2f}"
+        )
+    return "\n".join(lines)
+
+
+class Profile:
+    """Результат блока profiling(): отчёт по накопленным счётчикам."""
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        return stats()
+
+    def report(self, fmt: str = "table") -> str:
+        return report(fmt)
+
+
+@contextmanager
+def profiling(reset_counters: bool = True) -> Iterator[Profile]:
+    """Включить счётчики на время блока (если были выключены — выключить после)."""
+    was_enabled = is_enabled()
+    if reset_counters:
+        reset()
+    enable()
+    try:
+        yield Profile()
+    finally:
+        if not was_enabled:
+            disable()
+
+
+def _report_at_exit(target: str) -> None:
+    if not any(calls for calls, _ in _counters.values()):
+        return
+    if target.lower().endswith(".json"):
+        root, ext = os.path.splitext(target)
+        path = target if not os.path.exists(target) else f"{root}.{os.getpid()}{ext}"
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(report("json"))
+    else:
+        print(report("table"), file=sys.stderr)
+
+
+def enable_from_env() -> Optional[str]:
+    """Включить, если задан MACHI_PROFILE (значение — путь .json или что угодно для stderr)."""
+    target = os.environ.get(ENV_VAR)
+    if not target or target == "0" or is_enabled():
+        return None
+    enable()
+    atexit.register(_report_at_exit, target)
+    return target
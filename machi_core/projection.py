@@ -0,0 +1,225 @@
+"""
+Многоходовой прогноз дохода (цепь Маркова по монетам).
+
+Для балансировки: сколько монет в среднем будет у каждого игрока через
+K ходов при текущих предприятиях и когда игрок сможет позволить себе
+достопримечательность. Считается матрицами переходов в NumPy, без
+симуляции.
+
+Модель:
+    - состояние цепи — монеты всех игроков, у каждого обрезаны сверху
+      coin_cap (всё, что больше, считается как coin_cap) и разложены
+      по корзинам 0, coin_step, 2*coin_step, ..., coin_cap;
+    - один шаг — ход одного игрока: бросок и доход по настоящему
+      rules._resolve_dice (красные, затем зелёные, затем синие),
+      распределение берётся из outcomes.roll_outcomes;
+    - 1 или 2 кубика (при вокзале) выбираются по большему ожидаемому
+      доходу самого игрока;
+    - покупок нет: предприятия и достопримечательности фиксированы.
+
+Размер матрицы — (число корзин) ** число_игроков в квадрате. По
+умолчанию coin_step — наименьший шаг, при котором состояний не больше
+max_states: для 2 игроков это 1 (точная цепь), для 3+ корзины крупнее.
+Монеты между корзинами делятся между двумя соседними пропорционально
+расстоянию (среднее сохраняется), но сам доход считается по монетам
+корзины: у красных карт и всего, что зависит от монет, появляется
+погрешность порядка coin_step, и afford_probabilities для cost между
+корзинами — приближение.
+
+Требует NumPy.
+"""
+
+from __future__ import annotations
+
+from typing import List, Optional, Tuple
+import copy
+
+import numpy as np
+
+from .cards import get_card_def
+from .outcomes import expected_change, roll_outcomes
+from .state import GameState
+
+
+DEFAULT_MAX_STATES = 4096
+
+
+def _num_levels(coin_cap: int, coin_step: int) -> int:
+    return len(range(0, coin_cap, coin_step)) + 1
+
+
+class IncomeProjection:
+    """
+    Матрицы переходов для позиции. Строки — откуда, столбцы — куда;
+    распределение — вектор-строка, шаг — v @ T.
+    """
+
+    def __init__(
+        self,
+        state: GameState,
+        coin_cap: Optional[int] = None,
+        max_states: int = DEFAULT_MAX_STATES,
+        coin_step: Optional[int] = None,
+    ) -> None:
+        if coin_cap is None:
+            coin_cap = max(
+                [
+                    get_card_def(lm).cost
+                    for p in state.players for lm, built in p.landmarks.items() if not built
+                ]
+                + [max(p.coins for p in state.players)]
+            )
+        self.coin_cap = coin_cap
+        self.num_players = len(state.players)
+        if coin_step is None:
+            coin_step = 1
+            while coin_step < coin_cap and _num_levels(coin_cap, coin_step) ** self.num_players > max_states:
+                coin_step += 1
+        self.coin_step = coin_step
+        # монеты в корзинах
+        self.levels: List[int] = list(range(0, coin_cap, coin_step)) + [coin_cap]
+        self.size = len(self.levels) ** self.num_players
+        if self.size > max_states:
+            raise ValueError(
+                f"Слишком много состояний: {self.size} > {max_states}, уменьшите coin_cap или увеличьте coin_step"
+            )
+        # монеты 0..coin_cap -> [(корзина, вес)]
+        self._split = [self._split_coins(c) for c in range(coin_cap + 1)]
+
+        self.first_player = state.current_player
+        self._state = copy.deepcopy(state)
+        self.turn_matrices: List[np.ndarray] = [
+            self._turn_matrix(p) for p in range(self.num_players)
+        ]
+        # полный круг, начиная с текущего игрока
+        self.round_matrix = np.eye(self.size)
+        for k in range(self.num_players):
+            self.round_matrix = self.round_matrix @ self.turn_matrices[self._seat(k)]
+
+    # ---- кодирование состояния ---------------------------------------------
+
+    def _seat(self, turn: int) -> int:
+        return (self.first_player + turn) % self.num_players
+
+    def _split_coins(self, coins: int) -> List[Tuple[int, float]]:
+        i = coins // self.coin_step
+        low = self.levels[i]
+        if coins == low:
+            return [(i, 1.0)]
+        w = (coins - low) / (self.levels[i + 1] - low)
+        return [(i, 1.0 - w), (i + 1, w)]
+
+    def encode(self, coins: List[int]) -> List[Tuple[int, float]]:
+        """Монеты игроков -> [(состояние, вероятность)]: соседние корзины по каждому игроку."""
+        base = len(self.levels)
+        cells = [(0, 1.0)]
+        for c in reversed(coins):
+            parts = self._split[min(max(c, 0), self.coin_cap)]
+            cells = [(index * base + b, p * w) for index, p in cells for b, w in parts]
+        return cells
+
+    def decode(self, index: int) -> List[int]:
+        base = len(self.levels)
+        coins = []
+        for _ in range(self.num_players):
+            index, b = divmod(index, base)
+            coins.append(self.levels[b])
+        return coins
+
+    def _coin_grid(self) -> np.ndarray:
+        """Матрица size x num_players: монеты в каждом состоянии."""
+        return np.array([self.decode(i) for i in range(self.size)], dtype=np.float64)
+
+    # ---- переходы ----------------------------------------------------------
+
+    def _turn_matrix(self, player_index: int) -> np.ndarray:
+        T = np.zeros((self.size, self.size))
+        state = self._state
+        state.current_player = player_index
+        two_dice = state.players[player_index].has_built("train_station")
+
+        for index in range(self.size):
+            coins = self.decode(index)
+            for p, c in zip(state.players, coins):
+                p.coins = c
+
+            dist = roll_outcomes(state, 1)
+            if two_dice:
+                two = roll_outcomes(state, 2)
+                if expected_change(two)[player_index] > expected_change(dist)[player_index]:
+                    dist = two
+
+            for delta, prob in dist.items():
+                for target, w in self.encode([c + d for c, d in zip(coins, delta)]):
+                    T[index, target] += prob * w
+        return T
+
+    def initial(self, state: GameState) -> np.ndarray:
+        v = np.zeros(self.size)
+        for index, w in self.encode([p.coins for p in state.players]):
+            v[index] += w
+        return v
+
+    def step_matrix(self, turns: int) -> np.ndarray:
+        """Переход за turns ходов подряд, начиная с текущего игрока."""
+        rounds, rest = divmod(turns, self.num_players)
+        M = np.linalg.matrix_power(self.round_matrix, rounds)
+        for k in range(rest):
+            M = M @ self.turn_matrices[self._seat(k)]
+        return M
+
+    # ---- запросы -----------------------------------------------------------
+
+    def distribution(self, state: GameState, turns: int) -> np.ndarray:
+        """Распределение по состояниям через turns ходов."""
+        return self.initial(state) @ self.step_matrix(turns)
+
+    def expected_coins(self, state: GameState, turns: int) -> List[float]:
+        """Ожидаемые монеты каждого игрока через turns ходов."""
+        return [float(c) for c in self.distribution(state, turns) @ self._coin_grid()]
+
+    def afford_probabilities(
+        self,
+        state: GameState,
+        player_index: int,
+        cost: int,
+        max_turns: int,
+    ) -> List[float]:
+        """
+        P(игрок хотя бы раз набрал cost монет за первые k ходов),
+        k = 0..max_turns. Состояния с монетами >= cost поглощающие.
+        """
+        if cost > self.coin_cap:
+            raise ValueError(f"cost {cost} больше coin_cap {self.coin_cap}")
+
+        hit = self._coin_grid()[:, player_index] >= cost
+        absorbing = []
+        for T in self.turn_matrices:
+            A = T.copy()
+            A[hit] = 0.0
+            A[hit, hit] = 1.0
+            absorbing.append(A)
+
+        v = self.initial(state)
+        result = [float(v[hit].sum())]
+        for k in range(max_turns):
+            v = v @ absorbing[self._seat(k)]
+            result.append(float(v[hit].sum()))
+        return result
+
+    def turns_to_afford(
+        self,
+        state: GameState,
+        player_index: int,
+        landmark_id: str,
+        max_turns: int = 200,
+    ) -> float:
+        """
+        Ожидаемое число ходов (всех игроков), пока у игрока впервые
+        наберётся на достопримечательность. Хвост после max_turns
+        отбрасывается.
+        """
+        probs = self.afford_probabilities(
+            state, player_index, get_card_def(landmark_id).cost, max_turns,
+        )
+        return float(sum(1.0 - p for p in probs[:-1]))
@@ -0,0 +1,234 @@
+"""
+Архив реплеев.
+
+Партия полностью задаётся seed'ом (перемешивание колоды и все броски,
+см. simulation.play_game), набором версий карт и последовательностью
+действий. Поэтому реплей — одна строка JSON:
+
+    {"game": 17, "seed": ..., "versions": "normal", "num_players": 2,
+     "winner": 0, "actions": [0, 2, 5, ...]}
+
+Действия — номера из encoding.action_index. Файл только дописывается;
+положение партии в архиве — смещение её строки в байтах.
+
+record_games ведёт чекпоинт <архив>.<ключ прогона>.progress
+(checkpoint.JobCheckpoint, ключ — checkpoint.job_key от конфигурации):
+номер следующей партии и длину архива. При продолжении архив обрезается
+до этой длины, и партии доигрываются с того же номера. У каждого прогона
+свой файл, поэтому в один архив можно дописывать прогоны подряд
+(например, следующий диапазон start).
+
+Требует NumPy (через encoding).
+"""
+
+from __future__ import annotations
+
+from functools import partial
+from random import Random
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+import json
+import os
+
+from .actions import ActionType
+from .cards import CardVersion, versions_key
+from .checkpoint import JobCheckpoint, file_size, job_key, truncate_outputs
+from .encoding import action_index, index_action
+from .rules import new_game
+from .simulation import (
+    DEFAULT_MAX_TURNS,
+    AgentSpec,
+    build_agents,
+    game_seed,
+    run_parallel,
+    step,
+)
+from .state import GameState
+
+
+Replay = Dict[str, Any]
+
+PROGRESS_SUFFIX = ".progress"
+
+
+def parse_versions(key: str) -> set[CardVersion]:
+    """Обратное к cards.versions_key."""
+    return {CardVersion(name) for name in key.split("+") if name}
+
+
+def record_replay(
+    specs: Sequence[AgentSpec],
+    game_id: int,
+    base_seed: int = 0,
+    allowed_versions: set[CardVersion] | None = None,
+    max_turns: int = DEFAULT_MAX_TURNS,
+) -> Replay:
+    """Сыграть партию (как play_game) и вернуть её реплей."""
+    seed = game_seed(base_seed, game_id)
+    rng = Random(seed)
+    agents = build_agents(specs, seed)
+    state = new_game(len(agents), allowed_versions, rng=rng)
+
+    actions: List[int] = []
+    turns = 0
+    while not state.done and turns < max_turns:
+        idx = state.current_player
+        action = agents[idx].select_action(state, idx)
+        if action.type == ActionType.ROLL:
+            turns += 1
+        actions.append(action_index(action))
+        state = step(state, action, rng)
+
+    return {
+        "game": game_id,
+        "seed": seed,
+        "versions": versions_key(allowed_versions),
+        "num_players": len(agents),
+        "winner": state.winner,
+        "actions": actions,
+    }
+
+
+def replay_states(replay: Replay) -> Iterator[Tuple[int, GameState]]:
+    """
+    Проиграть реплей заново: (сколько действий применено, состояние)
+    для начальной позиции и после каждого действия.
+    Состояние одно и то же, меняется на месте — копируйте, если нужно.
+    """
+    rng = Random(replay["seed"])
+    state = new_game(replay["num_players"], parse_versions(replay["versions"]), rng=rng)
+    yield 0, state
+    for i, code in enumerate(replay["actions"], 1):
+        state = step(state, index_action(code), rng)
+        yield i, state
+
+
+# ---- файл архива --------------------------------------------------------------
+
+
+def _drop_torn_tail(path: str) -> None:
+    # строка, оборванная посреди записи, отрезается перед дописыванием
+    if not os.path.exists(path):
+        return
+    with open(path, "r+b") as f:
+        size = f.seek(0, os.SEEK_END)
+        end = size
+        while end > 0:
+            chunk_start = max(0, end - 65536)
+            f.seek(chunk_start)
+            chunk = f.read(end - chunk_start)
+            newline = chunk.rfind(b"\n")
+            if newline >= 0:
+                end = chunk_start + newline + 1
+                break
+            end = chunk_start
+        if end < size:
+            f.truncate(end)
+
+
+def append_replays(path: str, replays: Sequence[Replay]) -> List[int]:
+    """Дописать реплеи; вернуть их смещения."""
+    _drop_torn_tail(path)
+    offsets: List[int] = []
+    with open(path, "ab") as f:
+        for replay in replays:
+            offsets.append(f.tell())
+            f.write(json.dumps(replay, separators=(",", ":")).encode("utf-8") + b"\n")
+        f.flush()
+        os.fsync(f.fileno())
+    return offsets
+
+
+def iter_replay_spans(path: str, start: int = 0) -> Iterator[Tuple[int, int, Replay]]:
+    """
+    (начало строки, конец строки, реплей) начиная с байта start;
+    недописанная строка пропускается.
+    """
+    if not os.path.exists(path):
+        return
+    with open(path, "rb") as f:
+        f.seek(start)
+        offset = start
+        for line in f:
+            if not line.endswith(b"\n"):
+                return
+            end = offset + len(line)
+            yield offset, end, json.loads(line)
+            offset = end
+
+
+def iter_replays(path: str, start: int = 0) -> Iterator[Tuple[int, Replay]]:
+    """(смещение, реплей) начиная с байта start."""
+    for offset, _, replay in iter_replay_spans(path, start):
+        yield offset, replay
+
+
+def read_replay(path: str, offset: int) -> Replay:
+    with open(path, "rb") as f:
+        f.seek(offset)
+        return json.loads(f.readline())
+
+
+def _record_range(
+    bounds: Tuple[int, int],
+    specs: Sequence[AgentSpec],
+    base_seed: int,
+    allowed_versions: set[CardVersion] | None,
+    max_turns: int,
+) -> List[Replay]:
+    start, stop = bounds
+    return [
+        record_replay(specs, game_id, base_seed, allowed_versions, max_turns)
+        for game_id in range(start, stop)
+    ]
+
+
+def record_games(
+    path: str,
+    specs: Sequence[AgentSpec],
+    num_games: int,
+    start: int = 0,
+    base_seed: int = 0,
+    allowed_versions: set[CardVersion] | None = None,
+    max_turns: int = DEFAULT_MAX_TURNS,
+    workers: Optional[int] = None,
+    games_per_batch: int = 100,
+    checkpoint_every: float = 30.0,
+) -> None:
+    """
+    Сыграть партии start .. start+num_games-1 и дописать их в архив по порядку.
+    Повторный вызов с теми же аргументами продолжает прерванный прогон,
+    а законченный — не трогает.
+    """
+    config = {
+        "specs": [spec.to_dict() for spec in specs],
+        "start": start,
+        "base_seed": base_seed,
+        "versions": sorted(v.value for v in allowed_versions or ()),
+        "max_turns": max_turns,
+    }
+    checkpoint = JobCheckpoint(f"{path}.{job_key(config)}{PROGRESS_SUFFIX}", config, checkpoint_every)
+    first = start
+    if checkpoint.resumed:
+        first = checkpoint.next_game
+        if first >= start + num_games:
+            # прогон закончен, а архив с тех пор могли дописывать другие прогоны
+            return
+        truncate_outputs({path: checkpoint.payload["archive_bytes"]})
+    else:
+        checkpoint.update(start, {"archive_bytes": file_size(path)}, force=True)
+
+    ranges = [
+        (lo, min(lo + games_per_batch, start + num_games))
+        for lo in range(first, start + num_games, games_per_batch)
+    ]
+    worker = partial(
+        _record_range,
+        specs=list(specs),
+        base_seed=base_seed,
+        allowed_versions=allowed_versions,
+        max_turns=max_turns,
+    )
+    for (_, stop), replays in zip(ranges, run_parallel(worker, ranges, workers)):
+        append_replays(path, replays)
+        checkpoint.update(stop, {"archive_bytes": file_size(path)})
+    checkpoint.save()
@@ -0,0 +1,349 @@
+"""
+Колоночное хранилище итогов партий.
+
+Одна запись на партию, каждая колонка — отдельный файл фиксированной
+ширины, плюс небольшой заголовок со схемой:
+
+    store_dir/
+      schema.json        — колонки (dtype, форма строки), число строк,
+                           справочники агентов и карт
+      seed.bin           — int64  [N]
+      num_players.bin    — int8   [N]
+      versions.bin       — uint8  [N]: биты по порядку CardVersion
+      winner.bin         — int8   [N]: место победителя, -1 — без победителя
+      turns.bin          — int32  [N]: бросков
+      actions.bin        — int32  [N]
+      agents.bin         — int16  [N, MAX_PLAYERS]: id агента по местам, -1 — места нет
+      purchases.bin      — uint8  [N, MAX_PLAYERS, NUM_CARDS]: покупки по порядковым
+                           номерам карт (cards.CARD_INDEX)
+
+Файлы только дописываются, пачками. Число строк в schema.json
+обновляется атомарно после дописывания всех колонок; при открытии
+колонки, ставшие длиннее (обрыв посреди пачки), обрезаются до него.
+В той же записи schema.json хранится прогресс прогонов simulate_to_store
+(номер следующей партии), так что прерванный прогон продолжается
+без потерь и дублей.
+
+Чтение — np.memmap без разбора, фильтры — обычные векторные выражения:
+
+    store = ResultsStore.open("runs/greedy")
+    mask = (store["num_players"] == 2) & (store["winner"] == 0)
+    mine = store.purchases_of("mine")[mask]
+
+Требует NumPy.
+"""
+
+from __future__ import annotations
+
+from functools import partial
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import json
+import os
+
+import numpy as np
+
+from .cards import CARD_IDS, CARD_INDEX, CardVersion
+from .checkpoint import atomic_write_json, job_key
+from .encoding import MAX_PLAYERS
+from .simulation import (
+    DEFAULT_MAX_TURNS,
+    AgentSpec,
+    GameResult,
+    build_agents,
+    game_seed,
+    play_game,
+    run_parallel,
+)
+
+
+SCHEMA_NAME = "schema.json"
+SCHEMA_VERSION = 1
+
+_VERSIONS = list(CardVersion)
+
+COLUMNS: Dict[str, Tuple[Any, Tuple[int, ...]]] = {
+    "seed": (np.int64, ()),
+    "num_players": (np.int8, ()),
+    "versions": (np.uint8, ()),
+    "winner": (np.int8, ()),
+    "turns": (np.int32, ()),
+    "actions": (np.int32, ()),
+    "agents": (np.int16, (MAX_PLAYERS,)),
+    "purchases": (np.uint8, (MAX_PLAYERS, len(CARD_IDS))),
+}
+
+Batch = Dict[str, np.ndarray]
+
+
+def versions_mask(versions: str) -> int:
+    """cards.versions_key -> битовая маска по порядку CardVersion."""
+    mask = 0
+    for name in versions.split("+"):
+        if name:
+            mask |= 1 << _VERSIONS.index(CardVersion(name))
+    return mask
+
+
+def make_batch(results: Sequence[GameResult], agent_ids: Sequence[Sequence[int]]) -> Batch:
+    """
+    Пачка строк из итогов партий (обычно делается в воркере).
+    agent_ids[i] — id агентов по местам в i-й партии.
+    """
+    n = len(results)
+    batch = {
+        name: np.zeros((n,) + shape, dtype=dtype)
+        for name, (dtype, shape) in COLUMNS.items()
+    }
+    batch["agents"].fill(-1)
+
+    for row, (result, ids) in enumerate(zip(results, agent_ids)):
+        batch["seed"][row] = result.seed or 0
+        batch["num_players"][row] = result.num_players
+        batch["versions"][row] = versions_mask(result.versions)
+        batch["winner"][row] = -1 if result.winner is None else result.winner
+        batch["turns"][row] = result.turns
+        batch["actions"][row] = result.actions
+        batch["agents"][row, :len(ids)] = ids
+        purchases = batch["purchases"][row]
+        for _, player, card_id in result.purchases:
+            purchases[player, CARD_INDEX[card_id]] += 1
+    return batch
+
+
+class ResultsStore:
+    """
+    Открытое хранилище. Колонки читаются как memmap через store[name].
+    """
+
+    def __init__(self, path: str, schema: Dict[str, Any]) -> None:
+        self.path = path
+        self.schema = schema
+        self._maps: Dict[str, np.ndarray] = {}
+
+    # ---- создание / открытие ----------------------------------------------
+
+    @classmethod
+    def open(cls, path: str, create: bool = True) -> "ResultsStore":
+        schema_path = os.path.join(path, SCHEMA_NAME)
+        if not os.path.exists(schema_path):
+            if not create:
+                raise FileNotFoundError(schema_path)
+            os.makedirs(path, exist_ok=True)
+            schema = {
+                "version": SCHEMA_VERSION,
+                "rows": 0,
+                "columns": {
+                    name: {"dtype": np.dtype(dtype).str, "shape": list(shape)}
+                    for name, (dtype, shape) in COLUMNS.items()
+                },
+                "agents": [],
+                "cards": list(CARD_IDS),
+                "versions": [v.value for v in _VERSIONS],
+                "jobs": {},
+            }
+            store = cls(path, schema)
+            store._write_schema()
+            for name in COLUMNS:
+                open(store._column_path(name), "wb").close()
+            return store
+
+        with open(schema_path, "r", encoding="utf-8") as f:
+            schema = json.load(f)
+        if schema["cards"] != list(CARD_IDS):
+            raise ValueError("Хранилище записано с другим набором карт")
+        store = cls(path, schema)
+        store._truncate_to_rows()
+        return store
+
+    def _column_path(self, name: str) -> str:
+        return os.path.join(self.path, f"{name}.bin")
+
+    def _row_bytes(self, name: str) -> int:
+        column = self.schema["columns"][name]
+        return np.dtype(column["dtype"]).itemsize * int(np.prod(column["shape"], dtype=np.int64))
+
+    def _write_schema(self) -> None:
+        atomic_write_json(os.path.join(self.path, SCHEMA_NAME), self.schema)
+
+    def _truncate_to_rows(self) -> None:
+        # хвост недописанной пачки
+        for name in self.schema["columns"]:
+            size = self.rows * self._row_bytes(name)
+            column_path = self._column_path(name)
+            if os.path.getsize(column_path) > size:
+                with open(column_path, "r+b") as f:
+                    f.truncate(size)
+
+    # ---- справочник агентов ------------------------------------------------
+
+    @property
+    def rows(self) -> int:
+        return self.schema["rows"]
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def agent_id(self, label: str, register: bool = False) -> int:
+        agents: List[str] = self.schema["agents"]
+        if label in agents:
+            return agents.index(label)
+        if not register:
+            raise KeyError(label)
+        agents.append(label)
+        self._write_schema()
+        return len(agents) - 1
+
+    def agent_label(self, agent_id: int) -> str:
+        return self.schema["agents"][agent_id]
+
+    # ---- запись ------------------------------------------------------------
+
+    def job_progress(self, job: str) -> int:
+        """Номер следующей партии прогона job (0 — не начинался)."""
+        return self.schema.setdefault("jobs", {}).get(job, 0)
+
+    def append(self, batch: Batch, job: Optional[str] = None, next_game: int = 0) -> None:
+        """
+        Дописать пачку строк (см. make_batch). job/next_game — отметить
+        прогресс прогона в той же атомарной записи, что и число строк.
+        """
+        n = len(batch["seed"])
+        if job is not None:
+            self.schema.setdefault("jobs", {})[job] = next_game
+        if n == 0:
+            if job is not None:
+                self._write_schema()
+            return
+        for name, column in self.schema["columns"].items():
+            array = np.ascontiguousarray(batch[name], dtype=np.dtype(column["dtype"]))
+            if array.shape != (n,) + tuple(column["shape"]):
+                raise ValueError(f"Колонка {name}: форма {array.shape}")
+            with open(self._column_path(name), "ab") as f:
+                f.write(array.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+        self.schema["rows"] = self.rows + n
+        self._write_schema()
+        self._maps.clear()
+
+    # ---- чтение ------------------------------------------------------------
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        array = self._maps.get(name)
+        if array is None:
+            column = self.schema["columns"][name]
+            shape = (self.rows,) + tuple(column["shape"])
+            if self.rows == 0:
+                array = np.zeros(shape, dtype=column["dtype"])
+            else:
+                array = np.memmap(self._column_path(name), dtype=column["dtype"], mode="r", shape=shape)
+            self._maps[name] = array
+        return array
+
+    def purchases_of(self, card_id: str) -> np.ndarray:
+        """[N, MAX_PLAYERS]: сколько раз карта куплена каждым местом."""
+        return self["purchases"][:, :, self.schema["cards"].index(card_id)]
+
+    def has_version(self, version: CardVersion) -> np.ndarray:
+        return (self["versions"] & (1 << self.schema["versions"].index(version.value))) != 0
+
+    def seats_of(self, label: str) -> np.ndarray:
+        """[N, MAX_PLAYERS] bool: где сидел агент."""
+        return self["agents"] == self.agent_id(label)
+
+    def wins_of(self, label: str, mask: Optional[np.ndarray] = None) -> Tuple[int, int]:
+        """(побед, партий) агента, по партиям из mask."""
+        seats = self.seats_of(label)
+        winners = self["winner"].astype(np.int64)
+        won = np.zeros(self.rows, dtype=bool)
+        decided = winners >= 0
+        won[decided] = seats[np.flatnonzero(decided), winners[decided]]
+        played = seats.any(axis=1)
+        if mask is not None:
+            won &= mask
+            played &= mask
+        return int(won.sum()), int(played.sum())
+
+
+# ---- запись из симуляции ------------------------------------------------------
+
+
+def _play_range(
+    bounds: Tuple[int, int],
+    specs: Sequence[AgentSpec],
+    agent_ids: Sequence[int],
+    base_seed: int,
+    allowed_versions: set[CardVersion] | None,
+    max_turns: int,
+) -> Batch:
+    start, stop = bounds
+    results = []
+    for game_id in range(start, stop):
+        seed = game_seed(base_seed, game_id)
+        results.append(play_game(
+            build_agents(specs, seed), seed, allowed_versions, max_turns, record_purchases=True,
+        ))
+    return make_batch(results, [agent_ids] * len(results))
+
+
+def simulate_to_store(
+    store: ResultsStore,
+    specs: Sequence[AgentSpec],
+    num_games: int,
+    start: int = 0,
+    base_seed: int = 0,
+    allowed_versions: set[CardVersion] | None = None,
+    max_turns: int = DEFAULT_MAX_TURNS,
+    workers: Optional[int] = None,
+    games_per_batch: int = 1000,
+) -> None:
+    """
+    Сыграть партии start .. start+num_games-1 и дописать в хранилище.
+    Воркеры возвращают готовые пачки колонок, запись — одна на пачку.
+
+    Повторный вызов с теми же аргументами продолжает с места обрыва
+    (прогресс хранится в хранилище под ключом от конфигурации прогона).
+    """
+    agent_ids = [store.agent_id(spec.label, register=True) for spec in specs]
+    config = {
+        "specs": [spec.to_dict() for spec in specs],
+        "start": start,
+        "base_seed": base_seed,
+        "versions": sorted(v.value for v in allowed_versions or ()),
+        "max_turns": max_turns,
+    }
+    job = job_key(config)
+    first = max(start, store.job_progress(job))
+
+    ranges = [
+        (lo, min(lo + games_per_batch, start + num_games))
+        for lo in range(first, start + num_games, games_per_batch)
+    ]
+    worker = partial(
+        _play_range,
+        specs=list(specs),
+        agent_ids=agent_ids,
+        base_seed=base_seed,
+        allowed_versions=allowed_versions,
+        max_turns=max_turns,
+    )
+    for (_, stop), batch in zip(ranges, run_parallel(worker, ranges, workers)):
+        store.append(batch, job, stop)
+
+
+def append_results(
+    store: ResultsStore,
+    results: Iterable[GameResult],
+    labels: Sequence[str],
+    batch_size: int = 10_000,
+) -> None:
+    """Дописать готовые итоги (одни и те же агенты labels по местам)."""
+    ids = [store.agent_id(label, register=True) for label in labels]
+    pending: List[GameResult] = []
+    for result in results:
+        pending.append(result)
+        if len(pending) >= batch_size:
+            store.append(make_batch(pending, [ids] * len(pending)))
+            pending = []
+    if pending:
+        store.append(make_batch(pending, [ids] * len(pending)))
@@ -11,7 +11,7 @@
 
 from __future__ import annotations
 
-from typing import List, Optional
+from typing import Dict, FrozenSet, List, Optional, Tuple
 
 
 from .cards import (
@@ -21,9 +21,13 @@ from .cards import (
     CARDS,
     CardVersion  )
 
-from .state import GameState, PlayerState, MarketState, Phase
+from .state import Deck, GameState, PlayerState, MarketState, Phase
 from .actions import Action, ActionType
-from random import Random, randint
+from .events import IncomeEvent, LandmarkEvent, PhaseChange, PurchaseEvent, TransferEvent, emit
+from random import Random
+
+# случайность эффектов карт, если вызывающий не передал свой rng
+_DEFAULT_RNG = Random()
 
 # сколько копий каждой версии в колоде (упростим пока)
 COPIES_PER_VERSION = {
@@ -50,6 +54,18 @@ def _build_market_deck(
     return deck
 
 
+# колоды по набору версий до перемешивания (для new_game/reset_game)
+_DECK_TEMPLATES: Dict[FrozenSet[CardVersion], Tuple[str, ...]] = {}
+
+
+def _deck_template(allowed_versions: set[CardVersion]) -> Tuple[str, ...]:
+    key = frozenset(allowed_versions)
+    template = _DECK_TEMPLATES.get(key)
+    if template is None:
+        template = _DECK_TEMPLATES[key] = tuple(_build_market_deck(allowed_versions))
+    return template
+
+
 def _fill_market_unique(market: MarketState) -> None:
     """
     Добрать рынок до market.max_unique уникальных типов,
@@ -115,7 +131,7 @@ def legal_actions(state: GameState, player_index: int) -> List[Action]:
     return actions
 
 
-def _apply_roll(state: GameState, dice_value: Optional[int]) -> None:
+def _apply_roll(state: GameState, dice_value: Optional[int], rng: Random | None = None) -> None:
     if state.phase != Phase.ROLL:
         raise ValueError("Бросить кубить можно только в фазе ROLL")
     
@@ -125,9 +141,11 @@ def _apply_roll(state: GameState, dice_value: Optional[int]) -> None:
 
     state.last_roll = dice_value
 
-    _resolve_dice(state)
+    _resolve_dice(state, rng)
 
     state.phase = Phase.BUY
+    if state.listeners:
+        emit(state.listeners, PhaseChange(state.current_player, Phase.ROLL, Phase.BUY, dice_value))
 
 
 def _apply_buy_card(state: GameState, card_id: Optional[str]) -> None:
@@ -149,12 +167,16 @@ def _apply_buy_card(state: GameState, card_id: Optional[str]) -> None:
     
     player.coins -= card_def.cost
     state.market.take_one(card_id)
+    if state.listeners:
+        emit(state.listeners, PurchaseEvent(state.current_player, card_id, card_def.cost))
 
 
     if card_def.card_type == CardType.ESTABLISHMENT:
         player.add_card(card_id)
         if card_id == "credit_bureau":
             player.coins += 5
+            if state.listeners:
+                emit(state.listeners, IncomeEvent(state.current_player, card_id, 5))
         
         # если после покупки у этого типа стало 0 – убираем его из available
         if state.market.available.get(card_id, 0) <= 0:
@@ -189,6 +211,8 @@ def _apply_build_landmark(state: GameState, landmark_id: Optional[str]) -> None:
 
     player.coins -= card_def.cost
     player.build_landmark(landmark_id)
+    if state.listeners:
+        emit(state.listeners, LandmarkEvent(state.current_player, landmark_id, True, card_def.cost))
     _end_buy_phase_and_maybe_finish_turn(state=state)
 
 
@@ -200,9 +224,16 @@ def _end_buy_phase_and_maybe_finish_turn(state: GameState) -> None:
     state.current_player = state.next_player_index()
     state.phase = Phase.ROLL
     state.last_roll = None
+    if state.listeners:
+        emit(state.listeners, PhaseChange(state.current_player, Phase.BUY, Phase.ROLL))
 
 
-def apply_action(state: GameState, action: Action, dice_value: Optional[int] = None) -> GameState:
+def apply_action(
+    state: GameState,
+    action: Action,
+    dice_value: Optional[int] = None,
+    rng: Random | None = None,
+) -> GameState:
     """
     Применяет действие к состоянию и возвращает ИЗМЕНЁННОЕ состояние.
 
@@ -210,12 +241,18 @@ def apply_action(state: GameState, action: Action, dice_value: Optional[int] = N
       - нужен только для ActionType.ROLL;
       - бросок кубика приходит ИЗВНЕ (от UI / теста / бота),
         чтобы логика была детерминируемой и пригодной для RL.
+
+    rng:
+      - случайность внутри эффектов карт (траулер, снос);
+      - None — общий для модуля генератор rules._DEFAULT_RNG (свой Random(),
+        random.seed на него не влияет); для воспроизводимых симуляций
+        передавайте свой.
     """
     if state.done:
         return state
 
     if action.type == ActionType.ROLL:
-        _apply_roll(state, dice_value)
+        _apply_roll(state, dice_value, rng)
     elif action.type == ActionType.BUY_CARD:
         _apply_buy_card(state, action.card_id)
     elif action.type == ActionType.BUILD_LANDMARK:
@@ -225,16 +262,18 @@ def apply_action(state: GameState, action: Action, dice_value: Optional[int] = N
     else:
         raise ValueError(f"Неизвестный тип действия: {action.type}")
 
-    # После любого действия стоит проверить победу
-    winner = state.check_victory()
+    # Победа меняется только со стройкой (снос её отнять не может)
+    winner = state.check_victory() if action.type == ActionType.BUILD_LANDMARK else None
     if winner is not None:
         state.done = True
         state.winner = winner
-        state.phase = Phase.GAME_OVER
+        old_phase, state.phase = state.phase, Phase.GAME_OVER
+        if state.listeners:
+            emit(state.listeners, PhaseChange(winner, old_phase, Phase.GAME_OVER))
 
     return state
 
-def _resolve_dice(state: GameState) -> None:
+def _resolve_dice(state: GameState, rng: Random | None = None) -> None:
     """
     Распределяет доход по итогам броска
     """
@@ -242,10 +281,23 @@ def _resolve_dice(state: GameState) -> None:
     if dice is None:
         return
 
+    if rng is None:
+        rng = _DEFAULT_RNG
+
+    _resolve_red(state, dice)
+    _resolve_green(state, dice, rng)
+    _resolve_blue(state, dice, rng)
+
+    # 4) Фиолетовые – позже
+    # TODO: они тяжелее потом добавлю
+
+
+def _resolve_red(state: GameState, dice: int) -> None:
     current_idx = state.current_player          # индекс активного
     current = state.current_player_state()      # активный игрок
 
     num_players = len(state.players)
+    listeners = state.listeners
 
     # 1) Красные (рестораны других игроков)
     # начинаем с игрока слева от current и идём по кругу
@@ -267,6 +319,7 @@ def _resolve_dice(state: GameState) -> None:
                 if current.coins <= 0:
                     break  # уже нечего брать
 
+                coins_before = current.coins
                 if card_def.version == "normal":
                     cost = card_def.income * count
                     
@@ -328,6 +381,15 @@ def _resolve_dice(state: GameState) -> None:
                         current.coins -= transfer
                         player.coins += transfer
 
+                if listeners and current.coins != coins_before:
+                    emit(listeners, TransferEvent(current_idx, p_idx, card_id, coins_before - current.coins))
+
+
+def _resolve_green(state: GameState, dice: int, rng: Random) -> None:
+    current_idx = state.current_player          # индекс активного
+    current = state.current_player_state()      # активный игрок
+    listeners = state.listeners
+
     # 2) Зеленые – как у тебя было
     for card_id, count in current.establishments.items():
         if count <= 0:
@@ -336,6 +398,7 @@ def _resolve_dice(state: GameState) -> None:
         card_def = get_card_def(card_id)
 
         if card_def.color == CardColor.GREEN and dice in card_def.activation_numbers:
+            coins_before = current.coins
             if card_id == "department_store":
                 count_landmark = current.count_build_landmark()
 
@@ -345,15 +408,13 @@ def _resolve_dice(state: GameState) -> None:
             elif card_id == "building_demolition_company":
                 
                 for _ in range(count):
-                    lndmrk = current.random_true_landmark()
-                    
-                    print(lndmrk)
+                    lndmrk = current.random_true_landmark(rng)
                     if lndmrk is None:
                         continue
 
-                    print("yes")
-
                     current.rebuild_landmark(lndmrk[0])
+                    if listeners:
+                        emit(listeners, LandmarkEvent(current_idx, lndmrk[0], False))
                     current.coins += card_def.income
 
             elif card_id == "flower_shop":
@@ -399,9 +460,15 @@ def _resolve_dice(state: GameState) -> None:
                 
                 current.coins += cost
 
+            if listeners and current.coins != coins_before:
+                emit(listeners, IncomeEvent(current_idx, card_id, current.coins - coins_before))
+
+
+def _resolve_blue(state: GameState, dice: int, rng: Random) -> None:
+    listeners = state.listeners
 
     # 3) Синие – как у тебя было
-    for player in state.players:
+    for p_idx, player in enumerate(state.players):
         for card_id, count in player.establishments.items():
             if count <= 0:
                 continue
@@ -409,7 +476,8 @@ def _resolve_dice(state: GameState) -> None:
             card_def = get_card_def(card_id)
 
             if card_def.color == CardColor.BLUE and dice in card_def.activation_numbers:
-                
+                coins_before = player.coins
+
                 if card_id == "cornfield":
                     count_landmark = player.count_build_landmark()
 
@@ -422,23 +490,29 @@ def _resolve_dice(state: GameState) -> None:
                         
                 elif card_id == "trawler":
                     if player.has_built("port"):
-                        count1 = randint(1, 6)
-                        count2 = randint(1, 6)
+                        count1 = rng.randint(1, 6)
+                        count2 = rng.randint(1, 6)
                         player.coins += (count1 + count2) * count
 
                 else:
                     player.coins += card_def.income * count
 
-    # 4) Фиолетовые – позже
-    # TODO: они тяжелее потом добавлю
+                if listeners and player.coins != coins_before:
+                    emit(listeners, IncomeEvent(p_idx, card_id, player.coins - coins_before))
 
 
 def _create_starting_player() -> PlayerState:
     """
     Создает игрока с начальными ресурсами и картами.
     """
-    p = PlayerState()
+    return _reset_starting_player(PlayerState())
+
+
+def _reset_starting_player(p: PlayerState) -> PlayerState:
+    p.name = ""
     p.coins = 3
+    p.establishments.clear()
+    p.landmarks.clear()
 
     p.add_card("wheat_field_buy", 1)
     p.add_card("bakery_buy", 1)
@@ -446,6 +520,7 @@ def _create_starting_player() -> PlayerState:
     p.landmarks["port"] = False
     p.landmarks["train_station"] = False
     p.landmarks["shopping_mall"] = False
+    p.recount()
     return p
 
 
@@ -462,17 +537,16 @@ def new_game(num_players: int = 3,
     if allowed_versions is None:
         allowed_versions = {CardVersion.NORMAL}
 
-    deck = _build_market_deck(allowed_versions)
-
     if rng is None:
-        import random
-        rng = random.Random()
-    rng.shuffle(deck)
+        rng = Random()
+    deck = Deck()
+    deck.refill(_deck_template(allowed_versions), rng)
 
     market = MarketState(
         available={},
         deck=deck,
         max_unique=10,  # можешь поставить 5–7 для MVP, у тебя пока мало типов
+        versions=frozenset(allowed_versions),
     )
     _fill_market_unique(market)
 
@@ -486,4 +560,44 @@ def new_game(num_players: int = 3,
         winner=None,
     )
 
-    return game
\ No newline at end of file
+    return game
+
+
+def reset_game(state: GameState,
+               allowed_versions: set[CardVersion] | None = None,
+               rng: Random | None = None,
+               num_players: int | None = None,
+               ) -> GameState:
+    """
+    То же, что new_game, но на месте: переиспользует игроков, словари
+    и список колоды существующего состояния (Deck.refill; если колоду
+    успели скопировать, список заводится новый). При том же rng партия
+    получается та же, что из new_game.
+    """
+    if num_players is None:
+        num_players = len(state.players)
+    del state.players[num_players:]
+    for p in state.players:
+        _reset_starting_player(p)
+    while len(state.players) < num_players:
+        state.players.append(_create_starting_player())
+
+    if allowed_versions is None:
+        allowed_versions = {CardVersion.NORMAL}
+
+    market = state.market
+    if rng is None:
+        rng = Random()
+    market.deck.refill(_deck_template(allowed_versions), rng)
+
+    market.available.clear()
+    market.max_unique = 10
+    market.versions = frozenset(allowed_versions)
+    _fill_market_unique(market)
+
+    state.current_player = 0
+    state.phase = Phase.ROLL
+    state.last_roll = None
+    state.done = False
+    state.winner = None
+    return state
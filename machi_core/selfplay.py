@@ -0,0 +1,352 @@
+"""
+Генерация обучающих данных самоигрой.
+
+Партии играются на пуле процессов, на каждое решение агента пишется
+(наблюдение, маска допустимых действий, действие, итог партии для
+решавшего игрока). Данные складываются в шарды фиксированного размера:
+
+    out_dir/
+      manifest.json                 — конфиг, список шардов, докуда дошли
+      shard_00000.obs.npy           — float32 [N, OBS_SIZE]
+      shard_00000.mask.npy          — bool    [N, NUM_ACTIONS]
+      shard_00000.action.npy        — int16   [N]
+      shard_00000.outcome.npy       — float32 [N]: 1 победа, -1 поражение, 0 без победителя
+      shard_00000.game.npy          — int64   [N]: номер партии
+      shard_00000.seat.npy          — int8    [N]: место решавшего игрока
+      pending_<k>.npz               — хвост, не добравший до полного шарда
+
+Хвост и manifest переписываются атомарно вместе с каждым шардом,
+поэтому после обрыва генерация продолжается с первой незаписанной
+партии без потерь и дублей. Шарды читаются через np.load(mmap_mode="r").
+
+Требует NumPy.
+"""
+
+from __future__ import annotations
+
+from functools import partial
+from random import Random
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+import json
+import os
+
+import numpy as np
+
+from .actions import ActionType
+from .cards import CardVersion
+from .checkpoint import atomic_write_json
+from .encoding import NUM_ACTIONS, OBS_SIZE, action_index, encode_observation, legal_mask
+from .rules import new_game
+from .simulation import (
+    DEFAULT_MAX_TURNS,
+    AgentSpec,
+    build_agents,
+    game_seed,
+    run_parallel,
+    step,
+)
+
+
+MANIFEST_NAME = "manifest.json"
+
+FIELDS = {
+    "obs": np.float32,
+    "mask": np.bool_,
+    "action": np.int16,
+    "outcome": np.float32,
+    "game": np.int64,
+    "seat": np.int8,
+}
+
+
+def record_game(
+    specs: Sequence[AgentSpec],
+    game_id: int,
+    base_seed: int = 0,
+    allowed_versions: set[CardVersion] | None = None,
+    max_turns: int = DEFAULT_MAX_TURNS,
+) -> Dict[str, np.ndarray]:
+    """
+    Сыграть одну партию и вернуть все решения в виде массивов (см. FIELDS).
+    """
+    seed = game_seed(base_seed, game_id)
+    rng = Random(seed)
+    agents = build_agents(specs, seed)
+    state = new_game(len(agents), allowed_versions, rng=rng)
+
+    obs: List[np.ndarray] = []
+    masks: List[np.ndarray] = []
+    actions: List[int] = []
+    seats: List[int] = []
+    turns = 0
+
+    while not state.done and turns < max_turns:
+        idx = state.current_player
+        obs.append(encode_observation(state, idx))
+        masks.append(legal_mask(state, idx))
+
+        action = agents[idx].select_action(state, idx)
+        actions.append(action_index(action))
+        seats.append(idx)
+
+        if action.type == ActionType.ROLL:
+            turns += 1
+        state = step(state, action, rng)
+
+    n = len(actions)
+    seat_arr = np.array(seats, dtype=np.int8)
+    if state.winner is None:
+        outcome = np.zeros(n, dtype=np.float32)
+    else:
+        outcome = np.where(seat_arr == state.winner, 1.0, -1.0).astype(np.float32)
+
+    return {
+        "obs": np.array(obs, dtype=np.float32).reshape(n, OBS_SIZE),
+        "mask": np.array(masks, dtype=np.bool_).reshape(n, NUM_ACTIONS),
+        "action": np.array(actions, dtype=np.int16),
+        "outcome": outcome,
+        "game": np.full(n, game_id, dtype=np.int64),
+        "seat": seat_arr,
+    }
+
+
+def _empty_samples() -> Dict[str, np.ndarray]:
+    return {
+        "obs": np.zeros((0, OBS_SIZE), dtype=np.float32),
+        "mask": np.zeros((0, NUM_ACTIONS), dtype=np.bool_),
+        **{
+            name: np.zeros(0, dtype=dtype)
+            for name, dtype in FIELDS.items()
+            if name not in ("obs", "mask")
+        },
+    }
+
+
+def _atomic_save_npy(path: str, array: np.ndarray) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        np.save(f, array)
+    os.replace(tmp, path)
+
+
+class ShardWriter:
+    """
+    Копит сэмплы и режет их на шарды по shard_size.
+
+    Вызывающий сообщает, до какой партии всё передано (commit),
+    и writer сохраняет шарды + хвост + manifest.
+    """
+
+    def __init__(self, out_dir: str, manifest: Dict[str, Any]) -> None:
+        self.out_dir = out_dir
+        self.manifest = manifest
+        self.shard_size: int = manifest["config"]["shard_size"]
+
+        self._chunks: List[Dict[str, np.ndarray]] = []
+        self._buffered = 0
+        self._obsolete: List[str] = []
+
+        # Короткий последний шард (от прошлого final) забираем обратно
+        # в буфер, чтобы при дописывании все шарды были полного размера.
+        shards = manifest["shards"]
+        if shards and shards[-1]["samples"] < self.shard_size:
+            last = shards.pop()
+            self._append({
+                name: np.load(os.path.join(out_dir, f"{last['name']}.{name}.npy"))
+                for name in FIELDS
+            })
+            self._obsolete.extend(f"{last['name']}.{name}.npy" for name in FIELDS)
+
+        pending = manifest.get("pending")
+        if pending:
+            with np.load(os.path.join(out_dir, pending)) as data:
+                self._append({name: data[name] for name in FIELDS})
+
+    def _append(self, samples: Dict[str, np.ndarray]) -> None:
+        n = len(samples["action"])
+        if n:
+            self._chunks.append(samples)
+            self._buffered += n
+
+    def _take_buffer(self) -> Dict[str, np.ndarray]:
+        if not self._chunks:
+            return _empty_samples()
+        merged = {name: np.concatenate([c[name] for c in self._chunks]) for name in FIELDS}
+        self._chunks = []
+        self._buffered = 0
+        return merged
+
+    def add(self, samples: Dict[str, np.ndarray]) -> None:
+        self._append(samples)
+
+    def _write_shard(self, samples: Dict[str, np.ndarray]) -> None:
+        # имена не переиспользуются, старые файлы не перезаписываются
+        index = self.manifest["next_shard"]
+        self.manifest["next_shard"] = index + 1
+        name = f"shard_{index:05d}"
+        for field_name in FIELDS:
+            _atomic_save_npy(
+                os.path.join(self.out_dir, f"{name}.{field_name}.npy"),
+                samples[field_name],
+            )
+        self.manifest["shards"].append({"name": name, "samples": int(len(samples["action"]))})
+
+    def commit(self, next_game: int, final: bool = False) -> None:
+        """
+        Все партии < next_game переданы в add(). Записать полные шарды
+        (и короткий последний, если final) и обновить manifest.
+        """
+        if self._buffered < self.shard_size and not final:
+            return
+
+        merged = self._take_buffer()
+        total = len(merged["action"])
+        start = 0
+        while total - start >= self.shard_size:
+            end = start + self.shard_size
+            self._write_shard({k: v[start:end] for k, v in merged.items()})
+            start = end
+
+        rest = {k: v[start:] for k, v in merged.items()}
+        if final and len(rest["action"]):
+            self._write_shard(rest)
+            rest = _empty_samples()
+
+        old_pending = self.manifest.get("pending")
+        new_pending = None
+        if len(rest["action"]):
+            self._append(rest)
+            new_pending = f"pending_{self.manifest['next_shard']:05d}.npz"
+            tmp = os.path.join(self.out_dir, new_pending + ".tmp")
+            with open(tmp, "wb") as f:
+                np.savez(f, **rest)
+            os.replace(tmp, os.path.join(self.out_dir, new_pending))
+
+        self.manifest["pending"] = new_pending
+        self.manifest["next_game"] = next_game
+        self.manifest["samples"] = sum(s["samples"] for s in self.manifest["shards"]) + self._buffered
+        atomic_write_json(os.path.join(self.out_dir, MANIFEST_NAME), self.manifest)
+
+        if old_pending and old_pending != new_pending:
+            self._obsolete.append(old_pending)
+        for name in self._obsolete:
+            os.remove(os.path.join(self.out_dir, name))
+        self._obsolete = []
+
+
+def _config(
+    specs: Sequence[AgentSpec],
+    base_seed: int,
+    shard_size: int,
+    allowed_versions: set[CardVersion] | None,
+    max_turns: int,
+) -> Dict[str, Any]:
+    return {
+        "agents": [spec.label for spec in specs],
+        "base_seed": base_seed,
+        "shard_size": shard_size,
+        "allowed_versions": sorted(v.value for v in (allowed_versions or {CardVersion.NORMAL})),
+        "max_turns": max_turns,
+        "obs_size": OBS_SIZE,
+        "num_actions": NUM_ACTIONS,
+    }
+
+
+def load_manifest(out_dir: str) -> Optional[Dict[str, Any]]:
+    path = os.path.join(out_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def generate(
+    out_dir: str,
+    specs: Sequence[AgentSpec],
+    num_games: int,
+    shard_size: int = 100_000,
+    base_seed: int = 0,
+    allowed_versions: set[CardVersion] | None = None,
+    max_turns: int = DEFAULT_MAX_TURNS,
+    workers: Optional[int] = None,
+    chunksize: int = 16,
+) -> Dict[str, Any]:
+    """
+    Догенерировать партии 0..num_games-1 в out_dir.
+
+    Если в out_dir уже есть manifest с тем же конфигом — продолжить
+    с места остановки (или дописать новые партии, если num_games вырос).
+    Возвращает итоговый manifest.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    config = _config(specs, base_seed, shard_size, allowed_versions, max_turns)
+
+    manifest = load_manifest(out_dir)
+    if manifest is None:
+        manifest = {
+            "config": config,
+            "shards": [],
+            "next_shard": 0,
+            "pending": None,
+            "next_game": 0,
+            "samples": 0,
+        }
+    elif manifest["config"] != config:
+        raise ValueError(f"В {out_dir} уже лежат данные с другим конфигом")
+
+    writer = ShardWriter(out_dir, manifest)
+    first = manifest["next_game"]
+
+    worker = partial(
+        record_game,
+        specs,
+        base_seed=base_seed,
+        allowed_versions=allowed_versions,
+        max_turns=max_turns,
+    )
+    for game_id, samples in enumerate(
+        run_parallel(worker, range(first, num_games), workers, chunksize), start=first,
+    ):
+        writer.add(samples)
+        writer.commit(game_id + 1)
+
+    writer.commit(max(num_games, first), final=True)
+    return manifest
+
+
+def iter_shards(out_dir: str, mmap: bool = True) -> Iterator[Dict[str, np.ndarray]]:
+    """Шарды по одному; при mmap=True массивы не читаются в память целиком."""
+    manifest = load_manifest(out_dir)
+    if manifest is None:
+        return
+    mode = "r" if mmap else None
+    for shard in manifest["shards"]:
+        yield {
+            name: np.load(os.path.join(out_dir, f"{shard['name']}.{name}.npy"), mmap_mode=mode)
+            for name in FIELDS
+        }
+
+
+def iter_batches(
+    out_dir: str,
+    batch_size: int,
+    seed: Optional[int] = None,
+) -> Iterator[Dict[str, np.ndarray]]:
+    """
+    Поток батчей по всем шардам. С seed — шарды и сэмплы внутри шарда
+    перемешиваются (в памяти одновременно только один шард).
+    """
+    shards = list(iter_shards(out_dir))
+    rng = np.random.default_rng(seed) if seed is not None else None
+    if rng is not None:
+        rng.shuffle(shards)
+
+    for shard in shards:
+        n = len(shard["action"])
+        order = rng.permutation(n) if rng is not None else None
+        for start in range(0, n, batch_size):
+            if order is None:
+                yield {k: np.asarray(v[start:start + batch_size]) for k, v in shard.items()}
+            else:
+                idx = np.sort(order[start:start + batch_size])
+                yield {k: v[idx] for k, v in shard.items()}
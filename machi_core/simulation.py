@@ -0,0 +1,290 @@
+"""
+Безголовая (без UI) прогонка партий.
+
+Здесь:
+    - бросок кубиков из переданного Random;
+    - один шаг партии (действие + кубики, если это ROLL);
+    - полная партия набором агентов с лимитом времени на ход.
+
+Используется ботами для rollout'ов и инструментами симуляции.
+"""
+
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass, field, is_dataclass
+from random import Random
+from typing import AbstractSet, Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, TypeVar
+import importlib
+import inspect
+import multiprocessing
+
+from .actions import Action, ActionType
+from .agents import Agent, deadline_after
+from .cards import CardVersion, versions_key
+from .rules import apply_action, new_game, reset_game
+from .state import GameState
+from . import tracing
+
+
+# Страховка от бесконечных партий (боты, которые ничего не строят)
+DEFAULT_MAX_TURNS = 1000
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+@dataclass
+class GameResult:
+    """
+    Итог одной партии.
+    """
+    seed: Optional[int]
+    num_players: int
+    winner: Optional[int]   # None — партия упёрлась в max_turns
+    turns: int              # сколько было бросков
+    actions: int            # сколько всего действий применено
+    versions: str = ""      # cards.versions_key набора карт
+    # покупки по порядку: (номер броска, игрок, card_id), если play_game просили их записать
+    purchases: List[Tuple[int, int, str]] = field(default_factory=list)
+
+
+def roll_dice(rng: Random, num_dice: int = 1) -> int:
+    """Сумма num_dice кубиков."""
+    total = 0
+    for _ in range(num_dice):
+        total += rng.randint(1, 6)
+    return total
+
+
+def step(state: GameState, action: Action, rng: Random) -> GameState:
+    """
+    Применить действие; для ROLL кубики бросаются из rng,
+    он же используется эффектами карт.
+    """
+    if action.type == ActionType.ROLL:
+        return apply_action(state, action, dice_value=roll_dice(rng, action.num_dice), rng=rng)
+    return apply_action(state, action, rng=rng)
+
+
+class GamePool:
+    """
+    Свободные GameState для повторного использования: rules.reset_game
+    переинициализирует их на месте, и массовый прогон не создаёт заново
+    игроков, словари и колоду на каждую партию.
+
+    Только по явному запросу (play_game(pool=...)): выигрыш в пределах
+    шума, а агент или слушатель, сохранивший ссылку на состояние, увидит,
+    как его переписывает следующая партия.
+    """
+
+    def __init__(self) -> None:
+        self._free: List[GameState] = []
+
+    def acquire(
+        self,
+        num_players: int,
+        allowed_versions: set[CardVersion] | None = None,
+        rng: Optional[Random] = None,
+    ) -> GameState:
+        if self._free:
+            return reset_game(self._free.pop(), allowed_versions, rng, num_players)
+        return new_game(num_players, allowed_versions, rng=rng)
+
+    def release(self, state: GameState) -> None:
+        self._free.append(state)
+
+
+def play_game(
+    agents: Sequence[Agent],
+    seed: Optional[int] = None,
+    allowed_versions: set[CardVersion] | None = None,
+    max_turns: int = DEFAULT_MAX_TURNS,
+    move_time: Optional[float] = None,
+    state: Optional[GameState] = None,
+    pool: Optional[GamePool] = None,
+    record_purchases: bool = False,
+) -> GameResult:
+    """
+    Сыграть партию до конца.
+
+    agents[i] ходит за игрока i.
+    seed задаёт и перемешивание колоды, и все броски кубиков.
+    move_time — бюджет на один ход агента в секундах (передаётся
+    агенту как deadline); None — без ограничения.
+    state — начать с готового состояния вместо new_game.
+    pool — взять состояние из пула и вернуть его туда после партии
+    (агенты не должны хранить ссылку на состояние между партиями).
+    record_purchases — записать покупки в GameResult.purchases
+    (rollout'ам поиска они не нужны, поэтому по умолчанию нет).
+    """
+    rng = Random(seed)
+
+    pooled = state is None and pool is not None
+    if state is None:
+        if pool is not None:
+            state = pool.acquire(len(agents), allowed_versions, rng)
+        else:
+            state = new_game(len(agents), allowed_versions, rng=rng)
+
+    turns = 0
+    actions = 0
+    purchases: List[Tuple[int, int, str]] = []
+    watcher = tracing.watch(state)
+
+    try:
+        while not state.done and turns < max_turns:
+            idx = state.current_player
+            action = tracing.select_action(agents[idx], state, idx, deadline_after(move_time))
+
+            if action.type == ActionType.ROLL:
+                turns += 1
+            elif record_purchases and action.card_id is not None:
+                purchases.append((turns, idx, action.card_id))
+
+            state = step(state, action, rng)
+            actions += 1
+    finally:
+        tracing.unwatch(state, watcher)
+    result = GameResult(
+        seed=seed,
+        num_players=len(state.players),
+        winner=state.winner,
+        turns=turns,
+        actions=actions,
+        versions=versions_key(state.market.versions),
+        purchases=purchases,
+    )
+    if pooled:
+        pool.release(state)
+    return result
+
+
+def play_games(
+    agents: Sequence[Agent],
+    seeds: Sequence[int],
+    allowed_versions: set[CardVersion] | None = None,
+    max_turns: int = DEFAULT_MAX_TURNS,
+    move_time: Optional[float] = None,
+    pool: Optional[GamePool] = None,
+) -> List[GameResult]:
+    """Несколько партий подряд одними и теми же агентами (pool — см. play_game)."""
+    return [
+        play_game(agents, seed, allowed_versions, max_turns, move_time, pool=pool)
+        for seed in seeds
+    ]
+
+
+def game_seed(base_seed: int, game_id: int) -> int:
+    """Seed партии по её номеру: одна и та же партия при любом разбиении работы."""
+    return (base_seed << 32) + game_id
+
+
+def agent_seed(seed: int, seat: int) -> int:
+    """Seed агента на месте seat в партии с данным seed."""
+    return seed * 8 + seat + 1
+
+
+@dataclass
+class AgentSpec:
+    """
+    Описание агента, которое можно передать в другой процесс:
+    фабрика (обычно класс) + аргументы. Сам агент создаётся в воркере.
+    """
+    factory: Callable[..., Agent]
+    kwargs: Dict[str, Any] = field(default_factory=dict)
+    name: str = ""
+
+    @property
+    def label(self) -> str:
+        if self.name:
+            return self.name
+        args = ",".join(f"{k}={v}" for k, v in sorted(self.kwargs.items()))
+        return f"{self.factory.__name__}({args})"
+
+    def build(self, seed: Optional[int] = None) -> Agent:
+        kwargs = dict(self.kwargs)
+        if seed is not None and "seed" not in kwargs:
+            try:
+                params = inspect.signature(self.factory).parameters
+            except (TypeError, ValueError):
+                params = {}
+            if "seed" in params:
+                kwargs["seed"] = seed
+        return self.factory(**kwargs)
+
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-совместимое описание (фабрика — по имени модуля)."""
+        return {
+            "factory": _qualified_name(self.factory),
+            "kwargs": {k: _encode_value(v) for k, v in self.kwargs.items()},
+            "name": self.name,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], allowed: Optional[AbstractSet[str]] = None) -> "AgentSpec":
+        """
+        allowed — имена (module:qualname) фабрик и датаклассов, которые
+        можно импортировать; None — любые (описание из своего же кода).
+        """
+        return cls(
+            factory=_import_name(data["factory"], allowed),
+            kwargs={k: _decode_value(v, allowed) for k, v in data.get("kwargs", {}).items()},
+            name=data.get("name", ""),
+        )
+
+
+def _qualified_name(obj: Any) -> str:
+    return f"{obj.__module__}:{obj.__qualname__}"
+
+
+def _import_name(name: str, allowed: Optional[AbstractSet[str]] = None) -> Any:
+    if allowed is not None and name not in allowed:
+        raise ValueError(f"{name} нет среди разрешённых фабрик агентов")
+    module_name, _, qualname = name.partition(":")
+    obj: Any = importlib.import_module(module_name)
+    for part in qualname.split("."):
+        obj = getattr(obj, part)
+    return obj
+
+
+def _encode_value(value: Any) -> Any:
+    # датаклассы (например, веса ботов) храним как имя класса + поля
+    if is_dataclass(value) and not isinstance(value, type):
+        return {"__dataclass__": _qualified_name(type(value)), "fields": asdict(value)}
+    return value
+
+
+def _decode_value(value: Any, allowed: Optional[AbstractSet[str]] = None) -> Any:
+    if isinstance(value, dict) and "__dataclass__" in value:
+        return _import_name(value["__dataclass__"], allowed)(**value["fields"])
+    return value
+
+
+def build_agents(specs: Sequence[AgentSpec], seed: Optional[int]) -> List[Agent]:
+    """Агенты для одной партии; у каждого места свой seed."""
+    return [
+        spec.build(None if seed is None else agent_seed(seed, seat))
+        for seat, spec in enumerate(specs)
+    ]
+
+
+def run_parallel(
+    fn: Callable[[T], R],
+    items: Iterable[T],
+    workers: Optional[int] = None,
+    chunksize: int = 1,
+) -> Iterator[R]:
+    """
+    fn по всем items на пуле процессов; результаты в исходном порядке.
+
+    workers=0 — всё в текущем процессе (удобно для отладки).
+    fn должна быть функцией уровня модуля (пиклится по имени).
+    """
+    if workers == 0:
+        for item in items:
+            yield fn(item)
+        return
+
+    with multiprocessing.Pool(workers) as pool:
+        yield from pool.imap(fn, items, chunksize)
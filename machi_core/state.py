@@ -9,8 +9,10 @@ from __future__ import annotations
 
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Dict, List, Optional
-from random import choice
+from typing import Callable, Dict, FrozenSet, Iterator, List, Optional, Sequence, Tuple
+from random import Random, choice
+
+from .cards import CardVersion, get_card_def
 
 class Phase(str, Enum):
     """
@@ -24,6 +26,12 @@ class Phase(str, Enum):
     GAME_OVER = "game_over"
 
 
+# без всех трёх партия не выиграна (см. GameState.check_victory)
+VICTORY_LANDMARKS: Tuple[str, ...] = ("train_station", "shopping_mall", "port")
+_VICTORY_BIT: Dict[str, int] = {landmark_id: 1 << i for i, landmark_id in enumerate(VICTORY_LANDMARKS)}
+_ALL_VICTORY = (1 << len(VICTORY_LANDMARKS)) - 1
+
+
 @dataclass
 class PlayerState:
     """
@@ -31,61 +39,243 @@ class PlayerState:
         - Монеты;
         - Предприятия (карта --> количество)
         - Достопримечательности (id --> построена ли)
+
+    Производные величины (число построенных достопримечательностей,
+    флаги победных, всего предприятий, стоимость имущества) хранятся
+    и обновляются методами add_card / remove_card / build_landmark /
+    rebuild_landmark, поэтому читаются за O(1). Если словари меняются
+    напрямую — после этого нужно вызвать recount().
     """
     name: str = ""
     coins: int = 0
     establishments: Dict[str, int] = field(default_factory=dict)
     landmarks: Dict[str, bool] = field(default_factory=dict)
 
+    _built_landmarks: int = field(default=0, init=False, repr=False, compare=False)
+    _victory_mask: int = field(default=0, init=False, repr=False, compare=False)
+    _total_establishments: int = field(default=0, init=False, repr=False, compare=False)
+    _assets_value: int = field(default=0, init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self.recount()
+
+    def recount(self) -> None:
+        """Пересчитать производные величины с нуля."""
+        self._built_landmarks = 0
+        self._victory_mask = 0
+        self._total_establishments = 0
+        self._assets_value = 0
+        for card_id, count in self.establishments.items():
+            self._total_establishments += count
+            self._assets_value += get_card_def(card_id).cost * count
+        for landmark_id, built in self.landmarks.items():
+            if built:
+                self._landmark_changed(landmark_id, 1)
+
+    def _landmark_changed(self, landmark_id: str, delta: int) -> None:
+        self._built_landmarks += delta
+        self._victory_mask ^= _VICTORY_BIT.get(landmark_id, 0)
+        self._assets_value += get_card_def(landmark_id).cost * delta
+
+    # ---- производные величины ------------------------------------------------
+
+    @property
+    def built_landmarks(self) -> int:
+        """Сколько достопримечательностей построено."""
+        return self._built_landmarks
+
+    @property
+    def victory_mask(self) -> int:
+        """Биты построенных победных достопримечательностей (порядок VICTORY_LANDMARKS)."""
+        return self._victory_mask
+
+    @property
+    def has_all_victory_landmarks(self) -> bool:
+        return self._victory_mask == _ALL_VICTORY
+
+    @property
+    def total_establishments(self) -> int:
+        return self._total_establishments
+
+    @property
+    def net_worth(self) -> int:
+        """Монеты + цена предприятий и построенных достопримечательностей."""
+        return self.coins + self._assets_value
+
+    # ---- изменения ---------------------------------------------------------
+
     def count_of(self, card_id: str) -> int:
         return self.establishments.get(card_id, 0)
 
     def add_card(self, card_id: str, count: int = 1) -> None:
         self.establishments[card_id] = self.establishments.get(card_id, 0) + count
+        self._total_establishments += count
+        self._assets_value += get_card_def(card_id).cost * count
+
+    def remove_card(self, card_id: str, count: int = 1) -> None:
+        have = self.establishments.get(card_id, 0)
+        if have < count:
+            raise ValueError(f"У игрока нет {count} шт. {card_id}")
+        if have == count:
+            del self.establishments[card_id]
+        else:
+            self.establishments[card_id] = have - count
+        self._total_establishments -= count
+        self._assets_value -= get_card_def(card_id).cost * count
     
     def has_built(self, landmark_id: str) -> bool:
         return self.landmarks.get(landmark_id, False)
 
     def build_landmark(self, landmark_id: str) -> int:
+        if not self.landmarks.get(landmark_id, False):
+            self._landmark_changed(landmark_id, 1)
         self.landmarks[landmark_id] = True
     
     def rebuild_landmark(self, landmark_id: str) -> int:
+        if self.landmarks.get(landmark_id, False):
+            self._landmark_changed(landmark_id, -1)
         self.landmarks[landmark_id] = False
 
     def count_build_landmark(self) -> int:
-        count = 0
-        for lnd in self.landmarks.values():
-            if lnd:
-                count += 1
-        return count
+        return self._built_landmarks
     
     def count_build_establishments(self, card_id: str) -> int:
-        count = 0
-        for lnd, cnt in self.establishments.items():
-            if lnd == card_id:
-                count += cnt
-        return count
+        return self.establishments.get(card_id, 0)
     
-    def random_true_landmark(self):
+    def copy(self) -> "PlayerState":
+        other = PlayerState.__new__(PlayerState)
+        other.__dict__.update(self.__dict__)
+        other.establishments = dict(self.establishments)
+        other.landmarks = dict(self.landmarks)
+        return other
+
+    def __deepcopy__(self, memo) -> "PlayerState":
+        return self.copy()
+
+    def random_true_landmark(self, rng: Optional[Random] = None):
         true_landmark = list(filter(lambda x: x[1], self.landmarks.items()))
         if true_landmark:
+            if rng is not None:
+                return rng.choice(true_landmark)
             return choice(true_landmark)
         else:
             None
 
+class Deck:
+    """
+    Колода рынка: общая неизменяемая перемешанная последовательность
+    + сколько карт в ней ещё осталось. Карты берутся с конца (как
+    list.pop), поэтому порядок вытягивания тот же, что у списка.
+
+    Последовательность между копиями общая: копия колоды — O(1),
+    и копия состояния не тащит за собой ~170 строк.
+
+    refill перемешивает новую колоду в собственный список колоды, если
+    его ещё не делит ни одна копия (_owned); после copy() список общий
+    и неизменяемый, и следующий refill заводит новый.
+    """
+
+    __slots__ = ("cards", "size", "_owned")
+
+    def __init__(self, cards: Sequence[str] = (), size: Optional[int] = None) -> None:
+        self.cards: Sequence[str] = tuple(cards)
+        self.size = len(self.cards) if size is None else size
+        self._owned = False
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __bool__(self) -> bool:
+        return self.size > 0
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.cards[:self.size])
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, Deck):
+            return self.remaining() == other.remaining()
+        if isinstance(other, (list, tuple)):
+            return self.remaining() == tuple(other)
+        return NotImplemented
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return f"Deck({self.size} из {len(self.cards)})"
+
+    def pop(self) -> str:
+        if self.size <= 0:
+            raise IndexError("Колода пуста")
+        self.size -= 1
+        return self.cards[self.size]
+
+    def remaining(self) -> Tuple[str, ...]:
+        """Оставшиеся карты, последняя — верхняя."""
+        return tuple(self.cards[:self.size])
+
+    def counts(self) -> Dict[str, int]:
+        """Сколько каких карт осталось (без порядка — то, что видно игрокам)."""
+        result: Dict[str, int] = {}
+        for card_id in self.cards[:self.size]:
+            result[card_id] = result.get(card_id, 0) + 1
+        return result
+
+    def copy(self) -> "Deck":
+        return Deck.__new__(Deck)._share(self)
+
+    def _share(self, other: "Deck") -> "Deck":
+        self.cards = other.cards
+        self.size = other.size
+        # список теперь общий: менять его на месте нельзя ни одной из колод
+        self._owned = other._owned = False
+        return self
+
+    def refill(self, cards: Sequence[str], rng: Random) -> None:
+        """Колода из cards, перемешанная rng (как rng.shuffle(list(cards)))."""
+        if self._owned:
+            self.cards[:] = cards   # type: ignore[index]
+        else:
+            self.cards = list(cards)
+            self._owned = True
+        rng.shuffle(self.cards)     # type: ignore[arg-type]
+        self.size = len(self.cards)
+
+    def __copy__(self) -> "Deck":
+        return self.copy()
+
+    def __deepcopy__(self, memo) -> "Deck":
+        return self.copy()
+
+    def shuffled(self, rng: Random) -> "Deck":
+        """Новая колода из тех же оставшихся карт в случайном порядке
+        (детерминизация скрытого порядка для поиска)."""
+        cards = list(self.cards[:self.size])
+        rng.shuffle(cards)
+        return Deck(cards)
+
+
 @dataclass
 class MarketState:
     """
     Рынок:
         - что на столе лежит и сколько копий
+        - из каких версий карт собрана колода партии
     """
 
     available: Dict[str, int] = field(default_factory=dict)
 
-    deck: List[str] = field(default_factory=list)
+    deck: Deck = field(default_factory=Deck)
 
     max_unique: int = 10
 
+    versions: FrozenSet[CardVersion] = frozenset({CardVersion.NORMAL})
+
+    def copy(self) -> "MarketState":
+        return MarketState(dict(self.available), self.deck.copy(), self.max_unique, self.versions)
+
+    def __deepcopy__(self, memo) -> "MarketState":
+        return self.copy()
+
     def can_buy(self, card_id: str) -> bool:
         return self.available.get(card_id, 0) > 0
 
@@ -110,6 +300,29 @@ class GameState:
     done: bool = True
     winner: Optional[int] = None
 
+    # подписчики событий движка (см. events.py); в копии не переходят
+    listeners: Optional[List[Callable]] = field(default=None, compare=False, repr=False)
+
+    def __reduce__(self):
+        # pickle (и пулы процессов) получают компактную форму, см. codec.py
+        from .codec import decode_state, encode_state
+        return decode_state, (encode_state(self),)
+
+    def copy(self) -> "GameState":
+        """Независимая копия; колода рынка общая (она неизменяемая)."""
+        return GameState(
+            players=[p.copy() for p in self.players],
+            current_player=self.current_player,
+            phase=self.phase,
+            market=self.market.copy(),
+            last_roll=self.last_roll,
+            done=self.done,
+            winner=self.winner,
+        )
+
+    def __deepcopy__(self, memo) -> "GameState":
+        return self.copy()
+
     def current_player_state(self) -> PlayerState:
         return self.players[self.current_player]
 
@@ -124,7 +337,7 @@ class GameState:
         """
 
         for idx, p in enumerate(self.players):
-            if p.has_built("train_station") and p.has_built("shopping_mall") and p.has_built("port"):
+            if p.has_all_victory_landmarks:
                 return idx
             
         return None
\ No newline at end of file
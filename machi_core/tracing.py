@@ -0,0 +1,258 @@
+"""
+Трассировка партий в формате Chrome trace-event (chrome://tracing, Perfetto).
+
+Спаны:
+    turn / roll / buy     — ход и его фазы (по PhaseChange из events.py)
+    select_action, think  — решение агента (блокирующее / в фоне); пишут
+                            места вызова: play_game и бот-ход в UI
+    refresh_full_ui       — перерисовка окна
+
+Спаны пишутся в кольцевой буфер фиксированного размера (старые
+вытесняются), так что трассировку можно держать включённой всю сессию
+и выгрузить последние N событий, когда что-то подтормаживает:
+
+    tracer = tracing.enable(capacity=200_000)
+    ...
+    tracer.export("session.trace.json")
+
+MACHI_TRACE=путь.json читают точки входа (benchmarks/run.py, desktop/main.py)
+через enable_from_env(): включить и выгрузить при выходе. Импорт движка сам
+ничего не включает.
+
+Когда трассировка выключена, цена — одна проверка глобальной переменной
+на решение агента и на партию. Всё, что происходит внутри решения
+агента (rollout'ы поиска — тоже партии и решения), не записывается,
+иначе один ход MonteCarloBot заполнил бы весь буфер.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from typing import TYPE_CHECKING, Any, Deque, Dict, Iterator, List, Optional, Tuple
+import atexit
+import json
+import os
+import threading
+import time
+
+from .events import PhaseChange, subscribe, unsubscribe
+from .state import GameState, Phase
+
+if TYPE_CHECKING:
+    from .actions import Action
+    from .agents import Agent
+
+
+ENV_VAR = "MACHI_TRACE"
+DEFAULT_CAPACITY = 200_000
+
+_clock = time.perf_counter_ns
+
+# (имя, категория, начало нс, длительность нс, поток, args)
+SpanRecord = Tuple[str, str, int, int, int, Optional[Dict[str, Any]]]
+
+
+class Tracer:
+    """Кольцевой буфер законченных спанов."""
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY) -> None:
+        self.capacity = capacity
+        self.spans: Deque[SpanRecord] = deque(maxlen=capacity)
+        self.origin = _clock()
+
+    def __len__(self) -> int:
+        return len(self.spans)
+
+    def clear(self) -> None:
+        self.spans.clear()
+
+    def complete(
+        self,
+        name: str,
+        cat: str,
+        start_ns: int,
+        end_ns: Optional[int] = None,
+        args: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        if end_ns is None:
+            end_ns = _clock()
+        # deque.append атомарен: писать можно из любого потока
+        self.spans.append((name, cat, start_ns, end_ns - start_ns, threading.get_ident(), args))
+
+    @contextmanager
+    def span(self, name: str, cat: str = "", **args: Any) -> Iterator[None]:
+        start = _clock()
+        try:
+            yield
+        finally:
+            self.complete(name, cat, start, None, args or None)
+
+    # ---- партии ------------------------------------------------------------
+
+    def watch(self, state: GameState) -> "_GameWatcher":
+        """Писать спаны ходов и фаз этой партии (до unwatch)."""
+        watcher = _GameWatcher(self, state)
+        subscribe(state, watcher)
+        return watcher
+
+    def unwatch(self, state: GameState, watcher: "_GameWatcher") -> None:
+        unsubscribe(state, watcher)
+
+    # ---- выгрузка ----------------------------------------------------------
+
+    def to_chrome(self) -> Dict[str, Any]:
+        pid = os.getpid()
+        events: List[Dict[str, Any]] = []
+        tids = set()
+        for name, cat, start, dur, tid, args in list(self.spans):
+            event = {
+                "name": name,
+                "cat": cat,
+                "ph": "X",
+                "ts": (start - self.origin) / 1000,
+                "dur": dur / 1000,
+                "pid": pid,
+                "tid": tid,
+            }
+            if args:
+                event["args"] = args
+            events.append(event)
+            tids.add(tid)
+
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for tid in sorted(tids):
+            if tid in names:
+                events.append({
+                    "name": "thread_name", "ph": "M", "pid": pid, "tid": tid,
+                    "args": {"name": names[tid]},
+                })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_chrome(), f)
+
+
+class _GameWatcher:
+    """Подписчик событий: режет партию на спаны ходов и фаз."""
+
+    def __init__(self, tracer: Tracer, state: GameState) -> None:
+        self.tracer = tracer
+        self.turn = 0
+        self.player = state.current_player
+        self.turn_start = self.phase_start = _clock()
+
+    def __call__(self, event) -> None:
+        # победа приходит сразу после BUY -> ROLL, ход к этому моменту уже закрыт
+        if type(event) is not PhaseChange or event.new is Phase.GAME_OVER:
+            return
+        now = _clock()
+        args = {"player": self.player, "turn": self.turn}
+        self.tracer.complete(event.old.value, "phase", self.phase_start, now, args)
+        self.phase_start = now
+        if event.new is Phase.ROLL:
+            self.tracer.complete("turn", "turn", self.turn_start, now, args)
+            self.turn_start = now
+            self.turn += 1
+        self.player = event.player
+
+
+# ---- глобальный трассировщик -----------------------------------------------------
+
+_active: Optional[Tracer] = None
+_local = threading.local()
+
+
+def enable(capacity: int = DEFAULT_CAPACITY) -> Tracer:
+    global _active
+    if _active is None or _active.capacity != capacity:
+        _active = Tracer(capacity)
+    return _active
+
+
+def disable() -> Optional[Tracer]:
+    """Выключить; возвращает трассировщик с накопленными спанами."""
+    global _active
+    tracer, _active = _active, None
+    return tracer
+
+
+def active() -> Optional[Tracer]:
+    return _active
+
+
+def span(name: str, cat: str = ""):
+    """Спан у активного трассировщика; без него — пустой контекст."""
+    if _active is None:
+        return nullcontext()
+    return _active.span(name, cat)
+
+
+def watch(state: GameState) -> Optional[_GameWatcher]:
+    """Следить за партией, если трассировка включена и мы не внутри решения агента."""
+    if _active is None or getattr(_local, "busy", False):
+        return None
+    return _active.watch(state)
+
+
+def unwatch(state: GameState, watcher: Optional[_GameWatcher]) -> None:
+    if watcher is not None:
+        unsubscribe(state, watcher)
+
+
+def select_action(
+    agent: "Agent",
+    state: GameState,
+    player_index: int,
+    deadline: Optional[float] = None,
+) -> "Action":
+    """agent.select_action со спаном решения — так ход бота зовут play_game и UI."""
+    tracer = _active
+    if tracer is None or getattr(_local, "busy", False):
+        return agent.select_action(state, player_index, deadline)
+    _local.busy = True
+    start = _clock()
+    try:
+        return agent.select_action(state, player_index, deadline)
+    finally:
+        _local.busy = False
+        tracer.complete("select_action", "agent", start, None,
+                        {"agent": type(agent).__name__, "player": player_index})
+
+
+def thought(agent: "Agent", player_index: int, start_ns: int) -> None:
+    """Спан фонового обдумывания: от start_ns (start_thinking) до сейчас (stop)."""
+    if _active is not None:
+        _active.complete("think", "agent", start_ns, None,
+                         {"agent": type(agent).__name__, "player": player_index})
+
+
+@contextmanager
+def inside_decision() -> Iterator[None]:
+    """Не писать спаны в этом потоке (фоновое обдумывание агента)."""
+    busy = getattr(_local, "busy", False)
+    _local.busy = True
+    try:
+        yield
+    finally:
+        _local.busy = busy
+
+
+def now() -> int:
+    return _clock()
+
+
+def _export_at_exit(path: str) -> None:
+    if _active is not None and len(_active):
+        _active.export(path)
+
+
+def enable_from_env() -> Optional[Tracer]:
+    """Включить, если задан MACHI_TRACE; спаны выгружаются в этот файл при выходе."""
+    path = os.environ.get(ENV_VAR)
+    if not path or path == "0":
+        return None
+    tracer = enable()
+    atexit.register(_export_at_exit, path)
+    return tracer
@@ -0,0 +1,247 @@
+"""
+Подбор численных весов эвристического бота.
+
+Эволюционная стратегия с диагональной ковариацией (separable NES,
+упрощённый CMA): на каждом поколении вокруг среднего вектора весов
+сэмплируются зеркальные пары кандидатов, каждый играет партии против
+опорного пула, лучшая половина сдвигает среднее, а шаги по каждой
+координате расширяются/сужаются по удачным направлениям.
+
+Шум снижается общими случайными числами: в одном поколении все
+кандидаты играют одни и те же seed'ы (колода, кубики), на всех местах.
+
+После каждого поколения состояние пишется в JSON-чекпоинт; при
+повторном запуске с тем же путём тюнинг продолжается.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from functools import partial
+from random import Random
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import json
+import math
+import os
+
+from .bots.greedy_bot import GreedyBot, GreedyWeights
+from .cards import CardVersion
+from .checkpoint import atomic_write_json
+from .simulation import (
+    DEFAULT_MAX_TURNS,
+    AgentSpec,
+    _qualified_name,
+    build_agents,
+    game_seed,
+    play_game,
+    run_parallel,
+)
+
+
+SpecFactory = Callable[[Sequence[float]], AgentSpec]
+
+
+def greedy_spec(vector: Sequence[float]) -> AgentSpec:
+    """Вектор весов -> GreedyBot с этими весами."""
+    return AgentSpec(GreedyBot, {"weights": GreedyWeights.from_vector(list(vector))})
+
+
+def play_fitness_games(
+    candidate: AgentSpec,
+    opponents: Sequence[AgentSpec],
+    num_players: int,
+    seed: int,
+    allowed_versions: set[CardVersion] | None = None,
+    max_turns: int = DEFAULT_MAX_TURNS,
+) -> Tuple[int, int]:
+    """
+    Кандидат по очереди на каждом месте, остальные места — оппоненты
+    из пула по кругу. Возвращает (побед, партий).
+    """
+    wins = 0
+    for seat in range(num_players):
+        specs: List[AgentSpec] = []
+        j = 0
+        for s in range(num_players):
+            if s == seat:
+                specs.append(candidate)
+            else:
+                specs.append(opponents[(seed + j) % len(opponents)])
+                j += 1
+        result = play_game(build_agents(specs, seed), seed, allowed_versions, max_turns)
+        wins += result.winner == seat
+    return wins, num_players
+
+
+def _fitness_task(
+    item: Tuple[int, AgentSpec, int],
+    opponents: Sequence[AgentSpec],
+    num_players: int,
+    allowed_versions: set[CardVersion] | None,
+    max_turns: int,
+) -> Tuple[int, int, int]:
+    index, candidate, seed = item
+    wins, games = play_fitness_games(
+        candidate, opponents, num_players, seed, allowed_versions, max_turns,
+    )
+    return index, wins, games
+
+
+@dataclass
+class TuneState:
+    generation: int
+    mean: List[float]
+    sigma: List[float]
+    best_vector: List[float]
+    best_fitness: float = -1.0
+    history: List[Dict[str, Any]] = field(default_factory=list)
+    # параметры прогона: продолжать чекпоинт можно только с теми же
+    config: Dict[str, Any] = field(default_factory=dict)
+
+
+def _load_state(path: str) -> Optional[TuneState]:
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return TuneState(**data)
+
+
+def _save_state(path: str, state: TuneState) -> None:
+    atomic_write_json(path, state.__dict__)
+
+
+def tune(
+    checkpoint_path: str,
+    generations: int,
+    reference: Sequence[AgentSpec],
+    initial: Sequence[float] | None = None,
+    initial_sigma: float | Sequence[float] = 0.5,
+    make_spec: SpecFactory = greedy_spec,
+    popsize: int = 16,
+    games_per_candidate: int = 64,
+    num_players: int = 2,
+    learning_rate: float = 0.2,
+    base_seed: int = 0,
+    allowed_versions: set[CardVersion] | None = None,
+    max_turns: int = DEFAULT_MAX_TURNS,
+    workers: Optional[int] = None,
+    log: Callable[[str], None] | None = None,
+) -> TuneState:
+    """
+    Дотюнить до generations поколений (продолжает с чекпоинта).
+
+    games_per_candidate — сколько seed'ов на кандидата за поколение
+    (каждый seed играется num_players раз, по разу на каждом месте).
+    make_spec должна быть функцией уровня модуля.
+    log — куда писать строку после каждого поколения (например, print).
+
+    Чекпоинт другого прогона (другие popsize, games_per_candidate, пул,
+    seed и т.д.) не продолжается — ValueError.
+    """
+    if popsize < 2 or popsize % 2:
+        raise ValueError("popsize должен быть чётным и не меньше 2")
+
+    config = {
+        "popsize": popsize,
+        "games_per_candidate": games_per_candidate,
+        "num_players": num_players,
+        "learning_rate": learning_rate,
+        "base_seed": base_seed,
+        "allowed_versions": sorted(v.value for v in allowed_versions) if allowed_versions else None,
+        "max_turns": max_turns,
+        "reference": [spec.to_dict() for spec in reference],
+        "make_spec": _qualified_name(make_spec),
+    }
+    config = json.loads(json.dumps(config))   # как после чтения из JSON
+
+    state = _load_state(checkpoint_path)
+    if state is not None and state.config != config:
+        raise ValueError(f"Чекпоинт {checkpoint_path} от другого прогона")
+    if state is None:
+        mean = list(initial if initial is not None else GreedyWeights().to_vector())
+        if isinstance(initial_sigma, (int, float)):
+            sigma = [float(initial_sigma)] * len(mean)
+        else:
+            sigma = list(initial_sigma)
+        state = TuneState(generation=0, mean=mean, sigma=sigma, best_vector=list(mean), config=config)
+
+    dim = len(state.mean)
+    mu = popsize // 2
+    raw = [math.log(mu + 0.5) - math.log(i + 1) for i in range(mu)]
+    rank_weights = [w / sum(raw) for w in raw]
+
+    worker = partial(
+        _fitness_task,
+        opponents=list(reference),
+        num_players=num_players,
+        allowed_versions=allowed_versions,
+        max_turns=max_turns,
+    )
+
+    while state.generation < generations:
+        gen = state.generation
+        rng = Random(f"{base_seed}:{gen}")
+
+        # зеркальные пары: mean ± sigma * z
+        noises: List[List[float]] = []
+        for _ in range(popsize // 2):
+            z = [rng.gauss(0.0, 1.0) for _ in range(dim)]
+            noises.append(z)
+            noises.append([-v for v in z])
+        vectors = [
+            [m + s * v for m, s, v in zip(state.mean, state.sigma, z)]
+            for z in noises
+        ]
+
+        # общие seed'ы для всех кандидатов поколения
+        seeds = [game_seed(base_seed, gen * games_per_candidate + g) for g in range(games_per_candidate)]
+        items = [
+            (i, make_spec(vector), seed)
+            for i, vector in enumerate(vectors)
+            for seed in seeds
+        ]
+
+        wins = [0] * popsize
+        games = [0] * popsize
+        for index, w, g in run_parallel(worker, items, workers, chunksize=4):
+            wins[index] += w
+            games[index] += g
+        fitness = [w / g if g else 0.0 for w, g in zip(wins, games)]
+
+        order = sorted(range(popsize), key=lambda i: fitness[i], reverse=True)
+        selected = order[:mu]
+
+        state.mean = [
+            sum(rank_weights[r] * vectors[i][d] for r, i in enumerate(selected))
+            for d in range(dim)
+        ]
+        state.sigma = [
+            state.sigma[d] * math.exp(
+                0.5 * learning_rate
+                * sum(rank_weights[r] * (noises[i][d] ** 2 - 1.0) for r, i in enumerate(selected))
+            )
+            for d in range(dim)
+        ]
+
+        top = order[0]
+        if fitness[top] > state.best_fitness:
+            state.best_fitness = fitness[top]
+            state.best_vector = vectors[top]
+
+        state.history.append({
+            "generation": gen,
+            "best": fitness[top],
+            "mean": sum(fitness) / popsize,
+        })
+        state.generation = gen + 1
+        _save_state(checkpoint_path, state)
+
+        if log is not None:
+            log(
+                f"поколение {gen}: лучший {fitness[top]:.3f}, "
+                f"средний {sum(fitness) / popsize:.3f}, "
+                f"лучший за всё время {state.best_fitness:.3f}"
+            )
+
+    return state
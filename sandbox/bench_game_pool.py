@@ -0,0 +1,75 @@
+"""
+new_game против переиспользования состояний (rules.reset_game / GamePool):
+создание партии отдельно и партии целиком.
+
+    python sandbox/bench_game_pool.py
+"""
+
+import gc
+import os
+import sys
+import time
+from random import Random
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from machi_core.agents import RandomBot
+from machi_core.cards import CardVersion
+from machi_core.rules import new_game, reset_game
+from machi_core.simulation import GamePool, play_game
+
+
+def bench_setup(num_players: int, versions, count: int = 20000) -> None:
+    t0 = time.perf_counter()
+    for i in range(count):
+        new_game(num_players, versions, rng=Random(i))
+    fresh = time.perf_counter() - t0
+
+    state = new_game(num_players, versions, rng=Random(0))
+    t0 = time.perf_counter()
+    for i in range(count):
+        reset_game(state, versions, Random(i))
+    reused = time.perf_counter() - t0
+
+    print(
+        f"  создание партии: new_game {fresh / count * 1e6:6.1f} мкс, "
+        f"reset_game {reused / count * 1e6:6.1f} мкс"
+    )
+
+
+def bench_games(num_players: int, versions, count: int = 2000) -> None:
+    agents = [RandomBot(seed=i) for i in range(num_players)]
+
+    def run(pool):
+        gc.collect()
+        collections = gc.get_stats()[0]["collections"]
+        t0 = time.perf_counter()
+        for seed in range(count):
+            play_game(agents, seed, versions, pool=pool)
+        elapsed = time.perf_counter() - t0
+        return count / elapsed, gc.get_stats()[0]["collections"] - collections
+
+    # лучшее из нескольких чередующихся прогонов
+    fresh = pooled = 0.0
+    gc_fresh = gc_pooled = 0
+    for _ in range(3):
+        rate, gc_fresh = run(None)
+        fresh = max(fresh, rate)
+        rate, gc_pooled = run(GamePool())
+        pooled = max(pooled, rate)
+    print(
+        f"  партий/с: new_game {fresh:7.0f} (gc0 {gc_fresh}), "
+        f"пул {pooled:7.0f} (gc0 {gc_pooled}), x{pooled / fresh:.2f}"
+    )
+
+
+def main() -> None:
+    for num_players, versions in ((2, None), (4, {CardVersion.NORMAL, CardVersion.PLUS})):
+        label = "+".join(sorted(v.value for v in versions)) if versions else "normal"
+        print(f"--- {num_players} игрока, {label}")
+        bench_setup(num_players, versions)
+        bench_games(num_players, versions)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Сравнение компактного pickle GameState (codec.py) с обычным
+pickle датаклассов: размер, время туда-обратно, передача через пул.
+
+    python sandbox/bench_state_pickle.py
+"""
+
+import copy
+import copyreg
+import io
+import os
+import pickle
+import sys
+import time
+from multiprocessing import Pool
+from random import Random
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from machi_core.agents import RandomBot
+from machi_core.rules import new_game
+from machi_core.simulation import step
+from machi_core.state import GameState
+
+
+class _PlainPickler(pickle.Pickler):
+    # как было до codec.py: __dict__ датакласса
+    def reducer_override(self, obj):
+        if type(obj) is GameState:
+            return copyreg.__newobj__, (GameState,), obj.__dict__
+        return NotImplemented
+
+
+def plain_dumps(obj) -> bytes:
+    buf = io.BytesIO()
+    _PlainPickler(buf, protocol=pickle.HIGHEST_PROTOCOL).dump(obj)
+    return buf.getvalue()
+
+
+def compact_dumps(obj) -> bytes:
+    return pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def sample_states(count: int, num_players: int) -> list:
+    """Позиции из партий случайных ботов."""
+    rng = Random(0)
+    states = []
+    while len(states) < count:
+        state = new_game(num_players, rng=rng)
+        bots = [RandomBot(seed=rng.randrange(2**31)) for _ in range(num_players)]
+        while not state.done and len(states) < count:
+            if rng.random() < 0.2:
+                states.append(copy.deepcopy(state))
+            idx = state.current_player
+            state = step(state, bots[idx].select_action(state, idx), rng)
+    return states
+
+
+def _echo(item) -> bytes:
+    # воркер распаковывает и упаковывает обратно тем же способом
+    compact, data = item
+    state = pickle.loads(data)
+    return compact_dumps(state) if compact else plain_dumps(state)
+
+
+def bench(name: str, dumps, states, repeat: int = 5) -> None:
+    blobs = [dumps(s) for s in states]
+    size = sum(len(b) for b in blobs) / len(blobs)
+
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for s in states:
+            pickle.loads(dumps(s))
+        best = min(best, time.perf_counter() - t0)
+    per_state = best / len(states) * 1e6
+    print(f"{name:<10} {size:8.0f} байт   {per_state:8.1f} мкс туда-обратно")
+
+
+def bench_pool(name: str, dumps, states, compact: bool, workers: int = 4) -> None:
+    payload = [(compact, dumps(s)) for s in states]
+    with Pool(workers) as pool:
+        pool.map(_echo, payload[:workers])   # прогрев
+        t0 = time.perf_counter()
+        for blob in pool.imap(_echo, payload, chunksize=64):
+            pickle.loads(blob)
+        elapsed = time.perf_counter() - t0
+    print(f"{name:<10} пул из {workers}: {len(states) / elapsed:10.0f} состояний/с")
+
+
+def main() -> None:
+    for num_players in (2, 4):
+        states = sample_states(2000, num_players)
+        print(f"--- {num_players} игрока, {len(states)} позиций")
+        bench("обычный", plain_dumps, states)
+        bench("компактный", compact_dumps, states)
+        bench_pool("обычный", plain_dumps, states, False)
+        bench_pool("компактный", compact_dumps, states, True)
+
+
+if __name__ == "__main__":
+    main()
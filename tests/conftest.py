@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Корень проекта в sys.path, чтобы тесты запускались из любой папки
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
@@ -0,0 +1,163 @@
+"""
+StateArena: seqlock слота — читатель никогда не получает
+наполовину переписанное состояние.
+"""
+
+from random import Random
+import multiprocessing
+import time
+
+import pytest
+
+from machi_core import arena as arena_module
+from machi_core.agents import RandomBot
+from machi_core.arena import SlotOverflow, StateArena
+from machi_core.cards import CardVersion
+from machi_core.codec import encode_state
+from machi_core.rules import legal_actions, new_game
+from machi_core.simulation import step
+
+
+def game_states(count, seed=0):
+    rng = Random(seed)
+    state = new_game(4, rng=rng)
+    bots = [RandomBot(seed=i) for i in range(4)]
+    states = []
+    while len(states) < count and not state.done:
+        states.append(state.copy())
+        idx = state.current_player
+        state = step(state, bots[idx].select_action(state, idx), rng)
+    return states
+
+
+def test_put_get_and_versions():
+    a, b = game_states(2)
+    with StateArena.create(2) as arena:
+        assert arena.get(0) is None
+        assert arena.version(0) == 0
+
+        arena.put(0, a)
+        assert arena.version(0) == 2
+        assert arena.get(0) == a
+        assert arena.get(1) is None
+
+        arena.put(0, b)
+        assert arena.version(0) == 4
+        assert arena.get(0) == b
+
+
+def test_read_retried_after_concurrent_write(monkeypatch):
+    a, b = game_states(2)
+    with StateArena.create(1) as arena:
+        arena.put(0, a)
+        original = arena_module.decode_state
+        calls = []
+
+        def decode_then_overwrite(data):
+            # писатель успел переписать слот, пока читатель разбирал данные
+            state = original(data)
+            if not calls:
+                calls.append(state)
+                data.release()
+                arena.put(0, b)
+            return state
+
+        monkeypatch.setattr(arena_module, "decode_state", decode_then_overwrite)
+        assert arena.get(0) == b
+        assert calls == [a]
+
+
+def test_reader_sees_odd_version_as_write_in_progress():
+    (a,) = game_states(1)
+    with StateArena.create(1) as arena:
+        arena.put(0, a)
+        seq, data = arena.view(0)
+        data.release()
+        assert seq % 2 == 0
+
+        # как будто писатель остановился посреди записи
+        arena._words[arena._offset(0) // 8] = seq + 1
+        seq, data = arena.view(0)
+        data.release()
+        assert seq % 2 == 1
+        assert arena.version(0) == seq
+
+
+def _writer(name, blobs, stop):
+    arena = StateArena.attach(name)
+    try:
+        i = 0
+        while not stop.is_set():
+            arena.put_bytes(0, blobs[i % len(blobs)])
+            i += 1
+    finally:
+        arena.close()
+
+
+def test_concurrent_writer_process():
+    states = game_states(60)
+    blobs = [encode_state(s) for s in states]
+    known = set(blobs)
+
+    with StateArena.create(1) as arena:
+        arena.put_bytes(0, blobs[0])
+        stop = multiprocessing.Event()
+        writer = multiprocessing.Process(target=_writer, args=(arena.name, blobs, stop))
+        writer.start()
+        try:
+            reads = 0
+            deadline = time.monotonic() + 1.0
+            while time.monotonic() < deadline:
+                assert encode_state(arena.get(0)) in known
+                reads += 1
+        finally:
+            stop.set()
+            writer.join(10)
+        assert writer.exitcode == 0
+        assert reads > 0
+
+
+def test_default_slot_holds_big_late_games():
+    # 4–6 игроков, все версии карт, позиции до самого конца партии
+    with StateArena.create(1) as arena:
+        for num_players in (4, 5, 6):
+            for seed in range(5):
+                rng = Random(seed)
+                state = new_game(num_players, set(CardVersion), rng=rng)
+                bots = [RandomBot(seed=i) for i in range(num_players)]
+                while not state.done:
+                    idx = state.current_player
+                    state = step(state, bots[idx].select_action(state, idx), rng)
+                    arena.put(0, state)
+                assert arena.get(0) == state
+
+
+def test_overflow_leaves_slot_intact():
+    a, b = game_states(2)
+    with StateArena.create(1, slot_size=64) as arena:
+        arena.put_bytes(0, b"x" * 8)
+        version = arena.version(0)
+        with pytest.raises(SlotOverflow):
+            arena.put(0, a)
+        assert arena.version(0) == version
+
+
+def test_rollouts_do_not_see_deck_order(monkeypatch):
+    (state,) = game_states(1)
+    real = state.market.deck.remaining()
+    seen = []
+
+    def recording_step(sim, action, rng):
+        seen.append(sim.market.deck.remaining())
+        return step(sim, action, rng)
+
+    monkeypatch.setattr(arena_module, "step", recording_step)
+    with StateArena.create(1) as arena:
+        arena.put(0, state)
+        monkeypatch.setattr(arena_module, "_worker_arena", arena)
+        actions = legal_actions(state, state.current_player)
+        for seed in range(5):
+            arena_module._rollout_task((0, seed), actions, state.current_player, max_turns=1)
+
+    assert all(sorted(deck) == sorted(real) for deck in seen)
+    assert any(deck != real for deck in seen)
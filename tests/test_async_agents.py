@@ -0,0 +1,70 @@
+"""
+Асинхронные агенты: пока anytime-бот одной партии заканчивает мысль,
+остальные партии цикла идут дальше.
+"""
+
+from typing import Iterator, List, Optional
+import asyncio
+import time
+
+from machi_core.actions import Action
+from machi_core.agents import AnytimeAgent, RandomBot
+from machi_core.async_agents import AsyncAgent, as_async, play_game_async
+from machi_core.rules import legal_actions
+from machi_core.state import GameState
+
+
+THINK_STEP = 0.2
+
+
+class SlowThinker(AnytimeAgent):
+    """Каждый шаг генератора — THINK_STEP секунд без yield."""
+
+    def think(self, state: GameState, player_index: int) -> Iterator[Action]:
+        action = legal_actions(state, player_index)[0]
+        while True:
+            time.sleep(THINK_STEP)
+            yield action
+
+
+class Ticker(AsyncAgent):
+    """RandomBot, который отмечает время каждого своего хода."""
+
+    def __init__(self, ticks: List[float]) -> None:
+        self.bot = RandomBot(seed=0)
+        self.ticks = ticks
+
+    async def select_action(
+        self, state: GameState, player_index: int, deadline: Optional[float] = None,
+    ) -> Action:
+        await asyncio.sleep(0.005)
+        self.ticks.append(time.monotonic())
+        return self.bot.select_action(state, player_index)
+
+
+def test_games_progress_while_anytime_agent_stops():
+    ticks: List[float] = []
+
+    async def main():
+        slow = play_game_async(
+            [as_async(SlowThinker()), as_async(SlowThinker())],
+            seed=0, max_turns=3, move_time=0.01,
+        )
+        async def fast():
+            # партии быстрых агентов одна за другой, пока идёт медленная
+            for seed in range(1000):
+                await play_game_async([Ticker(ticks), Ticker(ticks)], seed=seed)
+
+        fast_task = asyncio.ensure_future(fast())
+        start = time.monotonic()
+        await slow
+        end = time.monotonic()
+        fast_task.cancel()
+        return start, end
+
+    start, end = asyncio.run(main())
+    during = [t for t in ticks if start <= t <= end]
+    # медленная партия ждала потоки агентов не меньше нескольких THINK_STEP
+    assert end - start >= 2 * THINK_STEP
+    gaps = [b - a for a, b in zip([start] + during, during + [end])]
+    assert max(gaps) < THINK_STEP / 2
@@ -0,0 +1,110 @@
+"""
+AnytimeAgent: дедлайн, фоновое обдумывание (start_thinking / poll / stop)
+и безопасный ход, если к сроку ничего не придумано.
+"""
+
+from random import Random
+from typing import Iterator
+import threading
+import time
+
+from machi_core.actions import Action, ActionType
+from machi_core.agents import AnytimeAgent, deadline_after, deadline_passed
+from machi_core.rules import legal_actions, new_game
+from machi_core.simulation import step
+from machi_core.state import GameState, Phase
+
+
+class Scripted(AnytimeAgent):
+    """Ждёт release, потом выдаёт ходы moves(state) по одному."""
+
+    def __init__(self, moves=lambda state, idx: []) -> None:
+        super().__init__()
+        self.moves = moves
+        self.release = threading.Event()
+
+    def think(self, state: GameState, player_index: int) -> Iterator[Action]:
+        self.release.wait(5)
+        yield from self.moves(state, player_index)
+
+
+def buy_position(coins=10):
+    rng = Random(0)
+    state = new_game(2, rng=rng)
+    state = step(state, Action(ActionType.ROLL), rng)
+    assert state.phase == Phase.BUY
+    state.players[state.current_player].coins = coins
+    return state
+
+
+def roll_position_with_station():
+    state = new_game(2, rng=Random(0))
+    state.players[0].build_landmark("train_station")
+    assert len(legal_actions(state, 0)) == 2
+    return state
+
+
+def test_fallback_does_not_spend_or_double_roll():
+    state = buy_position()
+    assert legal_actions(state, 0)[0].type == ActionType.BUY_CARD
+    agent = Scripted()
+    agent.release.set()
+    assert agent.select_action(state, 0).type == ActionType.END_BUY
+
+    state = roll_position_with_station()
+    action = agent.select_action(state, 0)
+    assert (action.type, action.num_dice) == (ActionType.ROLL, 1)
+
+
+def test_timeout_in_background_gives_safe_move():
+    state = buy_position()
+    agent = Scripted()
+    deadline = deadline_after(0.02)
+    agent.start_thinking(state, 0, deadline)
+    assert agent.is_thinking()
+    assert agent.poll() is None
+
+    while not deadline_passed(deadline):
+        time.sleep(0.005)
+    # к дедлайну ничего нет
+    assert agent.poll() is None
+    agent.release.set()
+    assert agent.stop().type == ActionType.END_BUY
+    assert not agent.is_thinking()
+
+
+def test_stop_returns_best_found_move():
+    state = buy_position()
+    buy = legal_actions(state, 0)[0]
+
+    def moves(state, idx):
+        yield buy
+        time.sleep(0.01)
+        yield buy
+
+    agent = Scripted(moves)
+    agent.start_thinking(state, 0)
+    # состояние скопировано: его можно менять, пока агент думает
+    state.players[0].coins = 0
+    agent.release.set()
+    while agent.poll() is None:
+        time.sleep(0.001)
+    assert agent.poll() == buy
+    assert agent.stop() == buy
+    assert agent.poll() is None
+
+
+def test_select_action_stops_at_deadline():
+    state = buy_position()
+    buy = legal_actions(state, 0)[0]
+
+    def endless(state, idx):
+        while True:
+            time.sleep(0.005)
+            yield buy
+
+    agent = Scripted(endless)
+    agent.release.set()
+    start = time.monotonic()
+    assert agent.select_action(state, 0, deadline_after(0.05)) == buy
+    assert time.monotonic() - start < 1.0
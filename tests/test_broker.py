@@ -0,0 +1,58 @@
+"""
+DecisionBroker: батч из многих партий даёт те же решения, что
+политика на каждой позиции по отдельности.
+"""
+
+import asyncio
+
+import pytest
+
+from machi_core.async_agents import play_games_async
+from machi_core.broker import BrokerAgent, DecisionBroker, LinearPolicy, MLPPolicy
+
+
+def run_games(policy, max_batch, seeds=range(8)):
+    broker = DecisionBroker(policy, max_batch=max_batch)
+
+    def make_agents(seed):
+        return [BrokerAgent(broker)] * 2
+
+    results = asyncio.run(play_games_async(make_agents, list(seeds), max_turns=200))
+    return results, broker
+
+
+@pytest.mark.parametrize("policy", [LinearPolicy.random(seed=0), MLPPolicy.random(seed=0)],
+                         ids=["linear", "mlp"])
+def test_batched_games_match_unbatched(policy):
+    batched, broker = run_games(policy, max_batch=64)
+    single, single_broker = run_games(policy, max_batch=1)
+    assert batched == single
+    assert single_broker.mean_batch_size == 1.0
+    # партии шли одновременно: батчи больше одного решения
+    assert broker.mean_batch_size > 1.0
+    assert broker.num_decisions == sum(r.actions for r in batched)
+
+
+def test_decisions_legal_and_match_policy():
+    policy = LinearPolicy.random(seed=1)
+    seen = []
+
+    def recording(obs, mask):
+        choices = policy(obs, mask)
+        seen.extend(zip(obs.copy(), mask.copy(), choices))
+        return choices
+
+    run_games(recording, max_batch=32, seeds=range(4))
+    assert seen
+    for obs, mask, choice in seen:
+        assert mask[choice]
+        # та же строка в одиночку — тот же ответ
+        assert policy(obs[None], mask[None])[0] == choice
+
+
+def test_policy_error_reaches_every_game():
+    def broken(obs, mask):
+        raise RuntimeError("политика упала")
+
+    with pytest.raises(RuntimeError):
+        run_games(broken, max_batch=8, seeds=range(3))
@@ -0,0 +1,138 @@
+"""
+Продолжение прерванных прогонов: после обрыва и повторного запуска
+результат тот же, что у прогона без обрыва, — без потерь и дублей.
+"""
+
+import numpy as np
+import pytest
+
+from machi_core import analytics, replays, selfplay
+from machi_core.agents import RandomBot
+from machi_core.simulation import AgentSpec
+
+
+SPECS = [AgentSpec(RandomBot), AgentSpec(RandomBot)]
+
+
+class Crash(Exception):
+    pass
+
+
+def crash_on_call(monkeypatch, module, name, call):
+    """Подменить module.name: вызов номер call падает, остальные проходят."""
+    original = getattr(module, name)
+    calls = [0]
+
+    def wrapper(*args, **kwargs):
+        calls[0] += 1
+        if calls[0] == call:
+            raise Crash()
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(module, name, wrapper)
+
+
+def crash_after_items(monkeypatch, module, items):
+    """Подменить module.run_parallel: после items результатов — обрыв."""
+    original = module.run_parallel
+
+    def wrapper(*args, **kwargs):
+        for i, result in enumerate(original(*args, **kwargs)):
+            if i == items:
+                raise Crash()
+            yield result
+
+    monkeypatch.setattr(module, "run_parallel", wrapper)
+
+
+# ---- replays.record_games ---------------------------------------------------------
+
+def record(path, checkpoint_every):
+    replays.record_games(
+        str(path), SPECS, 20, games_per_batch=5, workers=0, checkpoint_every=checkpoint_every,
+    )
+
+
+@pytest.mark.parametrize("checkpoint_every", [1e9, 0.0])
+def test_record_games_resume(tmp_path, monkeypatch, checkpoint_every):
+    expected = tmp_path / "expected.bin"
+    record(expected, checkpoint_every)
+
+    path = tmp_path / "a.bin"
+    with monkeypatch.context() as m:
+        crash_on_call(m, replays, "append_replays", 3)
+        with pytest.raises(Crash):
+            record(path, checkpoint_every)
+    record(path, checkpoint_every)
+
+    games = [replay["game"] for _, replay in replays.iter_replays(str(path))]
+    assert games == list(range(20))
+    assert path.read_bytes() == expected.read_bytes()
+
+
+def test_record_games_appends_consecutive_ranges(tmp_path):
+    expected = tmp_path / "expected.bin"
+    replays.record_games(str(expected), SPECS, 20, games_per_batch=5, workers=0)
+
+    path = tmp_path / "a.bin"
+    replays.record_games(str(path), SPECS, 12, games_per_batch=5, workers=0)
+    replays.record_games(str(path), SPECS, 8, start=12, games_per_batch=5, workers=0)
+    # повтор законченного прогона ничего не дописывает и не обрезает
+    replays.record_games(str(path), SPECS, 12, games_per_batch=5, workers=0)
+
+    games = [replay["game"] for _, replay in replays.iter_replays(str(path))]
+    assert games == list(range(20))
+    assert path.read_bytes() == expected.read_bytes()
+
+
+# ---- analytics.analyze_games ------------------------------------------------------
+
+def analyze(path):
+    return analytics.analyze_games(
+        SPECS, 20, workers=0, games_per_task=5,
+        checkpoint_path=str(path), checkpoint_every=0.0,
+    )
+
+
+def test_analytics_resume(tmp_path, monkeypatch):
+    expected = analyze(tmp_path / "expected.json")
+
+    path = tmp_path / "a.json"
+    with monkeypatch.context() as m:
+        crash_after_items(m, analytics, 2)
+        with pytest.raises(Crash):
+            analyze(path)
+    result = analyze(path)
+
+    assert result.to_dict() == expected.to_dict()
+    # повторный запуск законченного прогона ничего не доигрывает
+    assert analyze(path).to_dict() == expected.to_dict()
+
+
+# ---- selfplay.generate ------------------------------------------------------------
+
+def generate(out_dir):
+    return selfplay.generate(str(out_dir), SPECS, 12, shard_size=200, workers=0)
+
+
+def all_samples(out_dir):
+    shards = list(selfplay.iter_shards(str(out_dir), mmap=False))
+    return {name: np.concatenate([s[name] for s in shards]) for name in selfplay.FIELDS}
+
+
+def test_selfplay_resume(tmp_path, monkeypatch):
+    generate(tmp_path / "expected")
+    expected = all_samples(tmp_path / "expected")
+
+    out_dir = tmp_path / "run"
+    with monkeypatch.context() as m:
+        crash_after_items(m, selfplay, 7)
+        with pytest.raises(Crash):
+            generate(out_dir)
+    manifest = generate(out_dir)
+
+    assert manifest["next_game"] == 12
+    result = all_samples(out_dir)
+    assert sorted(np.unique(result["game"])) == list(range(12))
+    for name in selfplay.FIELDS:
+        np.testing.assert_array_equal(result[name], expected[name])
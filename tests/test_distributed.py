@@ -0,0 +1,74 @@
+"""
+Координатор распределённого прогона: токен, список разрешённых
+фабрик и приём результатов только за выданные диапазоны.
+"""
+
+import pytest
+
+from machi_core import distributed
+from machi_core.agents import RandomBot
+from machi_core.simulation import AgentSpec
+
+
+def make_coordinator(results):
+    job = distributed.make_job("analytics", [AgentSpec(RandomBot)] * 2, by_rounds=[3])
+    return distributed.Coordinator(
+        job, 20, lambda bounds, payload: results.append(bounds),
+        games_per_lease=10, token="secret",
+    )
+
+
+def test_default_host_is_loopback():
+    coordinator = make_coordinator([])
+    try:
+        assert coordinator.address[0] == "127.0.0.1"
+    finally:
+        coordinator.close()
+
+
+def test_requests_without_token_rejected():
+    coordinator = make_coordinator([])
+    try:
+        assert "error" in coordinator.handle({"op": "lease", "worker": "w"})
+        assert "error" in coordinator.handle({"op": "lease", "worker": "w", "token": "wrong"})
+        assert "lease" in coordinator.handle({"op": "lease", "worker": "w", "token": "secret"})
+    finally:
+        coordinator.close()
+
+
+def test_result_only_for_leased_or_pending_range():
+    results = []
+    coordinator = make_coordinator(results)
+    try:
+        lease = coordinator.handle({"op": "lease", "worker": "w", "token": "secret"})
+
+        # диапазон, которого координатор не выдавал
+        forged = {"op": "result", "token": "secret", "lease": 999, "range": [5, 15], "payload": {}}
+        assert coordinator.handle(forged) == {"ok": False}
+
+        result = {"op": "result", "token": "secret", "lease": lease["lease"],
+                  "range": lease["range"], "payload": {}}
+        assert coordinator.handle(result) == {"ok": True}
+        # повтор за уже сданный диапазон
+        assert coordinator.handle(result) == {"ok": False}
+
+        # опоздавший воркер без аренды, но диапазон ещё в очереди
+        late = {"op": "result", "token": "secret", "lease": 999, "range": [10, 20], "payload": {}}
+        assert coordinator.handle(late) == {"ok": True}
+
+        assert results == [(0, 10), (10, 20)]
+        assert coordinator.wait(0)
+    finally:
+        coordinator.close()
+
+
+def test_job_factories_allowlisted():
+    job = distributed.make_job("results", [AgentSpec(RandomBot)])
+    assert distributed._job_args(job)[0][0].factory is RandomBot
+
+    job["specs"][0]["factory"] = "os:system"
+    with pytest.raises(ValueError):
+        distributed._job_args(job)
+
+    with pytest.raises(ValueError):
+        distributed.make_job("results", [AgentSpec(dict)])
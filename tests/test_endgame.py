@@ -0,0 +1,61 @@
+"""
+EndgameSolver на позиции, где вероятность победы считается вручную.
+"""
+
+import pytest
+
+from machi_core.actions import ActionType
+from machi_core.endgame import EndgameSolver, EndgameTooLarge
+from machi_core.state import GameState, MarketState, Phase, PlayerState
+
+
+def position(coins=1, phase=Phase.ROLL):
+    """
+    Игроку 0 остался порт (2 монеты), у него 1 монета. У обоих только
+    пшеничное поле: синяя карта на 1, монета владельцу при любом броске.
+    Игрок 1 за горизонт не успевает построить три достопримечательности.
+    """
+    players = [
+        PlayerState(coins=coins, establishments={"wheat_field": 1},
+                    landmarks={"train_station": True, "shopping_mall": True, "port": False}),
+        PlayerState(coins=0, establishments={"wheat_field": 1},
+                    landmarks={"train_station": False, "shopping_mall": False, "port": False}),
+    ]
+    return GameState(players=players, current_player=0, phase=phase, market=MarketState(), done=False)
+
+
+def expected_win(depth, my_turn, ready):
+    """P(победы игрока 0) за depth ходов; ready — монеты на порт уже есть."""
+    if depth == 0:
+        return 0.0
+    if my_turn:
+        if ready:
+            return 1.0
+        return 1 / 6 + 5 / 6 * expected_win(depth - 1, False, False)
+    # бросок соперника на 1 тоже приносит монету
+    return 1 / 6 * expected_win(depth - 1, True, True) + 5 / 6 * expected_win(depth - 1, True, False)
+
+
+@pytest.mark.parametrize("horizon", [1, 2, 3, 4, 7])
+def test_win_probabilities_exact(horizon):
+    solver = EndgameSolver(position(), horizon=horizon)
+    p0, p1 = solver.win_probabilities(position())
+    assert p0 == pytest.approx(expected_win(horizon, True, False), abs=1e-12)
+    assert p1 == 0.0
+
+
+def test_best_actions():
+    solver = EndgameSolver(position(), horizon=5)
+    # два кубика никогда не дают 1
+    action = solver.best_action(position(), 0)
+    assert (action.type, action.num_dice) == (ActionType.ROLL, 1)
+
+    action = solver.best_action(position(coins=2, phase=Phase.BUY), 0)
+    assert (action.type, action.card_id) == (ActionType.BUILD_LANDMARK, "port")
+    assert solver.win_probabilities(position(coins=2, phase=Phase.BUY))[0] == 1.0
+
+
+def test_too_large():
+    solver = EndgameSolver(position(), horizon=8, max_nodes=3)
+    with pytest.raises(EndgameTooLarge):
+        solver.win_probabilities(position())
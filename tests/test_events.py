@@ -0,0 +1,97 @@
+"""
+События движка: поток событий объясняет все изменения монет,
+карт и фаз, а без подписчиков события не создаются вовсе.
+"""
+
+from random import Random
+
+import pytest
+
+from machi_core import rules
+from machi_core.agents import RandomBot
+from machi_core.cards import CardVersion
+from machi_core.events import (
+    EventLog,
+    IncomeEvent,
+    LandmarkEvent,
+    PhaseChange,
+    PurchaseEvent,
+    TransferEvent,
+    subscribe,
+)
+from machi_core.rules import new_game
+from machi_core.simulation import step
+from machi_core.state import Phase
+
+
+def replay_events(events, coins, establishments, landmarks):
+    """Применить события к копиям монет и карт игроков."""
+    for event in events:
+        if isinstance(event, IncomeEvent):
+            coins[event.player] += event.amount
+        elif isinstance(event, TransferEvent):
+            coins[event.from_player] -= event.amount
+            coins[event.to_player] += event.amount
+        elif isinstance(event, PurchaseEvent):
+            coins[event.player] -= event.cost
+            owned = establishments[event.player]
+            owned[event.card_id] = owned.get(event.card_id, 0) + 1
+        elif isinstance(event, LandmarkEvent):
+            coins[event.player] -= event.cost
+            landmarks[event.player][event.landmark_id] = event.built
+
+
+@pytest.mark.parametrize("num_players", [2, 4])
+def test_events_explain_every_change(num_players):
+    seen = set()
+    for seed in range(30):
+        rng = Random(seed)
+        state = new_game(num_players, set(CardVersion), rng=rng)
+        log = subscribe(state, EventLog())
+        bots = [RandomBot(seed=seed * 10 + i) for i in range(num_players)]
+
+        while not state.done:
+            idx = state.current_player
+            phase = state.phase
+            coins = [p.coins for p in state.players]
+            establishments = [dict(p.establishments) for p in state.players]
+            landmarks = [dict(p.landmarks) for p in state.players]
+
+            state = step(state, bots[idx].select_action(state, idx), rng)
+            events = log.drain()
+            seen.update(type(e) for e in events)
+
+            replay_events(events, coins, establishments, landmarks)
+            assert coins == [p.coins for p in state.players]
+            assert establishments == [dict(p.establishments) for p in state.players]
+            assert landmarks == [dict(p.landmarks) for p in state.players]
+
+            phases = [e for e in events if isinstance(e, PhaseChange)]
+            if phases:
+                assert phases[0].old is phase
+                assert phases[-1].new is state.phase
+                for a, b in zip(phases, phases[1:]):
+                    assert a.new is b.old
+                if phases[0].new is Phase.BUY:
+                    assert phases[0].roll == state.last_roll
+            else:
+                assert state.phase is phase
+
+    assert seen == {IncomeEvent, TransferEvent, PurchaseEvent, LandmarkEvent, PhaseChange}
+
+
+def test_no_events_without_listeners(monkeypatch):
+    def forbidden(*args, **kwargs):
+        raise AssertionError("событие без подписчиков")
+
+    for name in ("IncomeEvent", "TransferEvent", "PurchaseEvent", "LandmarkEvent", "PhaseChange", "emit"):
+        monkeypatch.setattr(rules, name, forbidden)
+
+    for seed in range(10):
+        rng = Random(seed)
+        state = new_game(4, set(CardVersion), rng=rng)
+        bots = [RandomBot(seed=i) for i in range(4)]
+        while not state.done:
+            idx = state.current_player
+            state = step(state, bots[idx].select_action(state, idx), rng)
+        assert state.listeners is None
@@ -0,0 +1,96 @@
+"""
+rules.reset_game и GamePool: переиспользованное состояние неотличимо
+от свежего new_game при том же rng.
+"""
+
+from random import Random
+
+import pytest
+
+from machi_core.agents import RandomBot
+from machi_core.cards import CardVersion
+from machi_core.rules import new_game, reset_game
+from machi_core.simulation import GamePool, play_game, play_games, step
+
+
+VERSION_SETS = [None, {CardVersion.PLUS}, set(CardVersion)]
+
+
+def played_state(num_players, seed):
+    """Состояние после партии: монеты, карты, рынок — всё не как в начале."""
+    rng = Random(seed)
+    state = new_game(num_players, set(CardVersion), rng=rng)
+    bots = [RandomBot(seed=i) for i in range(num_players)]
+    while not state.done:
+        idx = state.current_player
+        state = step(state, bots[idx].select_action(state, idx), rng)
+    return state
+
+
+def assert_same(a, b):
+    assert a == b
+    # поле за полем, с порядком ключей словарей (от него зависит порядок действий)
+    for name in ("current_player", "phase", "last_roll", "done", "winner", "listeners"):
+        assert getattr(a, name) == getattr(b, name), name
+    assert list(a.market.available.items()) == list(b.market.available.items())
+    assert a.market.deck.remaining() == b.market.deck.remaining()
+    assert a.market.max_unique == b.market.max_unique
+    assert a.market.versions == b.market.versions
+    assert len(a.players) == len(b.players)
+    for pa, pb in zip(a.players, b.players):
+        # кэши игрока в == не участвуют
+        assert vars(pa) == vars(pb)
+        assert list(pa.establishments.items()) == list(pb.establishments.items())
+        assert list(pa.landmarks.items()) == list(pb.landmarks.items())
+
+
+@pytest.mark.parametrize("versions", VERSION_SETS)
+@pytest.mark.parametrize("old_players,num_players", [(2, 2), (4, 4), (2, 5), (5, 3)])
+def test_reset_game_matches_new_game(versions, old_players, num_players):
+    for seed in range(5):
+        fresh = new_game(num_players, versions, rng=Random(seed))
+        reused = reset_game(played_state(old_players, seed), versions, Random(seed), num_players)
+        assert_same(reused, fresh)
+
+
+def test_reset_game_reuses_deck_storage():
+    state = played_state(4, 0)
+    cards = state.market.deck.cards
+    reset_game(state, set(CardVersion), Random(2))
+    assert state.market.deck.cards is cards
+    assert_same(state, new_game(4, set(CardVersion), rng=Random(2)))
+
+
+def test_reset_game_leaves_copies_alone():
+    state = new_game(3, rng=Random(0))
+    copy = state.copy()
+    deck = copy.market.deck.remaining()
+    reset_game(state, rng=Random(1))
+    assert copy.market.deck.remaining() == deck
+    assert state.market.deck.cards is not copy.market.deck.cards
+    assert_same(state, new_game(3, rng=Random(1)))
+
+
+def test_pooled_games_match_fresh_games():
+    agents = [RandomBot(seed=i) for i in range(3)]
+    fresh = play_games(agents, range(20), {CardVersion.NORMAL, CardVersion.SHARP})
+
+    agents = [RandomBot(seed=i) for i in range(3)]
+    pooled = play_games(agents, range(20), {CardVersion.NORMAL, CardVersion.SHARP}, pool=GamePool())
+    assert pooled == fresh
+
+
+def test_pool_reuses_released_state():
+    pool = GamePool()
+    state = pool.acquire(2, rng=Random(0))
+    pool.release(state)
+    assert pool.acquire(3, rng=Random(1)) is state
+    assert len(state.players) == 3
+    # пул пуст — новое состояние
+    assert pool.acquire(2, rng=Random(2)) is not state
+
+
+def test_play_game_same_with_and_without_pool():
+    result = play_game([RandomBot(seed=0), RandomBot(seed=1)], seed=3)
+    again = play_game([RandomBot(seed=0), RandomBot(seed=1)], seed=3, pool=GamePool())
+    assert again == result
@@ -0,0 +1,72 @@
+"""
+Лига: Эло для нескольких игроков, доигрывание расписания
+и продолжение с диска без переигровки старых раундов.
+"""
+
+import json
+
+import pytest
+
+from machi_core.agents import RandomBot
+from machi_core.bots.greedy_bot import GreedyBot
+from machi_core.league import DEFAULT_RATING, League
+from machi_core.simulation import AgentSpec
+
+
+def test_two_player_elo_by_hand(tmp_path):
+    league = League(str(tmp_path / "league.json"), k_factor=32.0)
+    league.register("a", AgentSpec(RandomBot), rating=1600.0)
+    league.register("b", AgentSpec(RandomBot), rating=1400.0)
+
+    league.record(["a", "b"], [([1, 0], 0)])   # на месте 0 сидит b и выигрывает
+    expected_b = 1 / (1 + 10 ** (200 / 400))
+    assert league.ratings["b"] == pytest.approx(1400 + 32 * (1 - expected_b))
+    assert league.ratings["a"] == pytest.approx(1600 - 32 * (1 - expected_b))
+    assert league.wins == {"a": 0, "b": 1}
+    assert league.played == {"a|b": 1}
+
+
+def test_multiplayer_elo_pairs():
+    league = League("unused", num_players=3, k_factor=16.0)
+    for name in "abc":
+        league.register(name, AgentSpec(RandomBot))
+
+    # при равных рейтингах победитель получает 2 * 16/2 * 0.5,
+    # проигравшие между собой — ничья
+    league.record(["a", "b", "c"], [([0, 1, 2], 2)])
+    assert league.ratings == pytest.approx({
+        "a": DEFAULT_RATING - 4.0, "b": DEFAULT_RATING - 4.0, "c": DEFAULT_RATING + 8.0,
+    })
+    # ничья по лимиту ходов ничего не меняет при равных рейтингах
+    league.ratings = {name: DEFAULT_RATING for name in "abc"}
+    league.record(["a", "b", "c"], [([0, 1, 2], None)])
+    assert league.ratings == pytest.approx({name: DEFAULT_RATING for name in "abc"})
+    assert sum(league.games.values()) == 6
+
+
+def test_new_entrant_catches_up_without_replays(tmp_path):
+    path = str(tmp_path / "league.json")
+    league = League.load_or_create(path, base_seed=3, max_turns=200)
+    league.register("random", AgentSpec(RandomBot))
+    league.register("greedy", AgentSpec(GreedyBot))
+    assert league.run(2, workers=0) == 2
+
+    league = League.load_or_create(path, base_seed=3, max_turns=200)
+    league.register("greedy2", AgentSpec(GreedyBot, {"seed": 1}))
+    assert list(league.schedule(2)) == [
+        (("greedy", "greedy2"), 0), (("greedy2", "random"), 0),
+        (("greedy", "greedy2"), 1), (("greedy2", "random"), 1),
+    ]
+    assert league.run(2, workers=0) == 4
+    assert league.run(2, workers=0) == 0
+
+    with open(path, encoding="utf-8") as f:
+        saved = json.load(f)
+    assert saved["played"] == {"greedy|random": 2, "greedy|greedy2": 2, "greedy2|random": 2}
+    # два раунда, в каждом по партии на каждое место
+    assert saved["games"] == {"random": 8, "greedy": 8, "greedy2": 8}
+
+    with pytest.raises(ValueError):
+        League.load_or_create(path, base_seed=4)
+    with pytest.raises(ValueError):
+        league.register("random", AgentSpec(GreedyBot))
@@ -0,0 +1,47 @@
+"""
+Дебютная книга: таблица выбирается по версиям карт самой партии.
+"""
+
+from random import Random
+
+import pytest
+
+from machi_core.actions import Action, ActionType
+from machi_core.bots.mc_bot import MonteCarloBot
+from machi_core.cards import CardVersion
+from machi_core.opening_book import END_BUY_CODE, OpeningBook, action_code, position_key, table_key
+from machi_core.rules import legal_actions, new_game
+from machi_core.simulation import step
+from machi_core.state import Phase
+
+
+def first_buy_position(versions):
+    rng = Random(1)
+    state = new_game(2, versions, rng=rng)
+    state = step(state, Action(ActionType.ROLL), rng)
+    assert state.phase == Phase.BUY and state.current_player == 0
+    return state
+
+
+@pytest.mark.parametrize("versions", [{CardVersion.PLUS}, {CardVersion.NORMAL, CardVersion.SHARP}])
+def test_bot_reads_table_of_game_versions(versions):
+    state = first_buy_position(versions)
+    key = position_key(0, 0, state.players[0])
+    card = next(action_code(a) for a in legal_actions(state, 0) if a.type == ActionType.BUY_CARD)
+
+    # в таблице обычных карт на той же позиции — другой ход
+    book = OpeningBook(depth=2, tables={
+        table_key(2, {CardVersion.NORMAL}): {key: [card]},
+        table_key(2, versions): {key: [END_BUY_CODE]},
+    })
+    assert book.lookup(state, 0).type == ActionType.END_BUY
+
+    bot = MonteCarloBot(seed=0, opening_book=book)
+    assert bot.select_action(state, 0).type == ActionType.END_BUY
+
+
+def test_no_table_for_game_versions():
+    state = first_buy_position({CardVersion.PLUS})
+    key = position_key(0, 0, state.players[0])
+    book = OpeningBook(depth=2, tables={table_key(2, None): {key: [END_BUY_CODE]}})
+    assert book.lookup(state, 0) is None
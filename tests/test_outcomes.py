@@ -0,0 +1,47 @@
+"""
+outcomes: точное распределение изменения монет на позиции,
+которую легко посчитать вручную.
+"""
+
+import pytest
+
+from machi_core.outcomes import expected_change, player_distribution, roll_outcomes, turn_outcomes
+from machi_core.state import GameState, MarketState, Phase, PlayerState
+
+
+def position(coins=2, station=False):
+    """
+    Ходит игрок 0 (пшеничное поле: +1 на 1). У игрока 1 кафе (берёт 1
+    у бросившего на 3) и два ранчо (+1 за каждое на 2).
+    """
+    landmarks = {"train_station": station, "shopping_mall": False, "port": False}
+    players = [
+        PlayerState(coins=coins, establishments={"wheat_field": 1}, landmarks=landmarks),
+        PlayerState(coins=0, establishments={"cafe": 1, "ranch": 2}, landmarks=dict(landmarks)),
+    ]
+    return GameState(players=players, current_player=0, phase=Phase.ROLL, market=MarketState(), done=False)
+
+
+def assert_dist(actual, expected):
+    assert set(actual) == set(expected)
+    for delta, p in expected.items():
+        assert actual[delta] == pytest.approx(p, abs=1e-12), delta
+
+
+def test_one_die():
+    assert_dist(roll_outcomes(position(), 1), {
+        (1, 0): 1 / 6,      # 1: пшеничное поле
+        (0, 2): 1 / 6,      # 2: два ранчо
+        (-1, 1): 1 / 6,     # 3: кафе
+        (0, 0): 3 / 6,
+    })
+    assert expected_change(roll_outcomes(position(), 1)) == pytest.approx([0.0, 0.5])
+    # платить кафе нечем
+    assert_dist(roll_outcomes(position(coins=0), 1), {(1, 0): 1 / 6, (0, 2): 1 / 6, (0, 0): 4 / 6})
+
+
+def test_two_dice():
+    outcomes = turn_outcomes(position(station=True))
+    assert_dist(outcomes.two_dice, {(0, 2): 1 / 36, (-1, 1): 2 / 36, (0, 0): 33 / 36})
+    assert player_distribution(outcomes.two_dice, 1) == pytest.approx({0: 33 / 36, 1: 2 / 36, 2: 1 / 36})
+    assert turn_outcomes(position()).two_dice is None
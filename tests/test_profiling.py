@@ -0,0 +1,57 @@
+"""
+profiling: счётчики подменяют функции движка на время включения
+и возвращают оригиналы при выключении.
+"""
+
+import sys
+
+from machi_core import profiling, rules, simulation
+from machi_core.agents import RandomBot
+from machi_core.state import GameState
+
+
+def bound_functions():
+    """(модуль, имя) -> объект для всех мест, куда импортированы цели профилирования."""
+    originals = {name: getattr(rules, name) for name in profiling.RULES_TARGETS}
+    return {
+        (module.__name__, name): fn
+        for module in list(sys.modules.values())
+        for name, fn in getattr(module, "__dict__", {}).items()
+        if name in originals and fn is originals[name]
+    }
+
+
+def play():
+    return simulation.play_game([RandomBot(seed=i) for i in range(4)], seed=5)
+
+
+def test_counts_and_restores():
+    before = bound_functions()
+    check_victory = GameState.check_victory
+    assert ("machi_core.simulation", "apply_action") in before
+    expected = play()
+
+    with profiling.profiling() as prof:
+        assert profiling.is_enabled()
+        # подменено и там, куда функцию импортировали
+        assert simulation.apply_action is not before["machi_core.simulation", "apply_action"]
+        assert GameState.check_victory is not check_victory
+        result = play()
+        stats = prof.stats()
+
+    # счётчики не меняют партию
+    assert result == expected
+    for name in ("_resolve_red", "_resolve_green", "_resolve_blue",
+                 "_fill_market_unique", "check_victory", "apply_action", "legal_actions"):
+        assert stats[name]["calls"] > 0, name
+
+    assert not profiling.is_enabled()
+    assert GameState.check_victory is check_victory
+    assert bound_functions() == before
+    for (module, name), fn in before.items():
+        assert getattr(sys.modules[module], name) is fn
+
+    # выключено — не считает
+    calls = profiling.stats()["apply_action"]["calls"]
+    play()
+    assert profiling.stats()["apply_action"]["calls"] == calls
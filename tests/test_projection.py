@@ -0,0 +1,65 @@
+"""
+IncomeProjection на позиции с доходом, не зависящим от монет:
+цепь должна совпасть с полиномиальным распределением.
+"""
+
+from math import comb, factorial
+
+import numpy as np
+import pytest
+
+from machi_core.projection import IncomeProjection
+from machi_core.state import GameState, MarketState, Phase, PlayerState
+
+
+CAP = 12
+
+
+def position():
+    """Пшеничное поле у игрока 0 (+1 на 1), ранчо у игрока 1 (+1 на 2), синие — на любой бросок."""
+    landmarks = {"train_station": False, "shopping_mall": False, "port": False}
+    players = [
+        PlayerState(coins=0, establishments={"wheat_field": 1}, landmarks=dict(landmarks)),
+        PlayerState(coins=0, establishments={"ranch": 1}, landmarks=dict(landmarks)),
+    ]
+    return GameState(players=players, current_player=0, phase=Phase.ROLL, market=MarketState(), done=False)
+
+
+def multinomial(turns, a, b):
+    rest = turns - a - b
+    return factorial(turns) / (factorial(a) * factorial(b) * factorial(rest)) \
+        * (1 / 6) ** a * (1 / 6) ** b * (4 / 6) ** rest
+
+
+@pytest.mark.parametrize("turns", [0, 1, 3, 7, CAP])
+def test_distribution_exact(turns):
+    projection = IncomeProjection(position(), coin_cap=CAP)
+    assert projection.coin_step == 1
+    dist = projection.distribution(position(), turns)
+
+    expected = np.zeros(projection.size)
+    for a in range(turns + 1):
+        for b in range(turns + 1 - a):
+            ((index, weight),) = projection.encode([a, b])
+            expected[index] += multinomial(turns, a, b)
+    np.testing.assert_allclose(dist, expected, atol=1e-12)
+    assert projection.expected_coins(position(), turns) == pytest.approx([turns / 6] * 2, abs=1e-12)
+
+
+def test_afford_probabilities_exact():
+    projection = IncomeProjection(position(), coin_cap=CAP)
+    probs = projection.afford_probabilities(position(), 0, 2, 10)
+    expected = [
+        1 - sum(comb(k, j) * (1 / 6) ** j * (5 / 6) ** (k - j) for j in range(2))
+        for k in range(11)
+    ]
+    assert probs == pytest.approx(expected, abs=1e-12)
+
+
+def test_coarse_buckets_keep_mean():
+    # доход не зависит от монет: деление по соседним корзинам среднее не меняет
+    # (cap с запасом: за ход масса уходит не дальше соседней корзины)
+    projection = IncomeProjection(position(), coin_cap=30, coin_step=3)
+    assert projection.levels == list(range(0, 31, 3))
+    for turns in (1, 4, 9):
+        assert projection.expected_coins(position(), turns) == pytest.approx([turns / 6] * 2, abs=1e-12)
@@ -0,0 +1,124 @@
+"""
+ResultsStore: запись и чтение колонок, обрезка недописанной пачки
+при открытии и продолжение прерванного simulate_to_store.
+"""
+
+import os
+
+import numpy as np
+import pytest
+
+from machi_core import results_store
+from machi_core.agents import RandomBot
+from machi_core.bots.greedy_bot import GreedyBot
+from machi_core.cards import CARD_INDEX, CardVersion
+from machi_core.results_store import ResultsStore, make_batch, simulate_to_store
+from machi_core.simulation import AgentSpec, play_game
+
+
+SPECS = [AgentSpec(RandomBot), AgentSpec(GreedyBot)]
+VERSIONS = {CardVersion.NORMAL, CardVersion.PLUS}
+
+
+class Crash(Exception):
+    pass
+
+
+def games(seeds, num_players=2):
+    return [
+        play_game([RandomBot(seed=seed + i) for i in range(num_players)], seed, VERSIONS,
+                  record_purchases=True)
+        for seed in seeds
+    ]
+
+
+def columns(store):
+    return {name: np.array(store[name]) for name in results_store.COLUMNS}
+
+
+def test_round_trip(tmp_path):
+    store = ResultsStore.open(str(tmp_path / "store"))
+    ids = [store.agent_id("a", register=True), store.agent_id("b", register=True)]
+    two, three = games(range(5)), games(range(5, 8), num_players=3)
+    store.append(make_batch(two, [ids] * 5))
+    store.append(make_batch(three, [ids + [ids[0]]] * 3))
+
+    store = ResultsStore.open(str(tmp_path / "store"), create=False)
+    results = two + three
+    assert len(store) == 8
+    assert list(store["seed"]) == [r.seed for r in results]
+    assert list(store["num_players"]) == [2] * 5 + [3] * 3
+    assert list(store["winner"]) == [-1 if r.winner is None else r.winner for r in results]
+    assert list(store["turns"]) == [r.turns for r in results]
+    assert list(store["actions"]) == [r.actions for r in results]
+    assert store.has_version(CardVersion.PLUS).all()
+    assert not store.has_version(CardVersion.SHARP).any()
+    assert (store["agents"][:5, 2:] == -1).all()
+
+    for row, result in enumerate(results):
+        expected = np.zeros((result.num_players, len(CARD_INDEX)), dtype=int)
+        for _, player, card_id in result.purchases:
+            expected[player, CARD_INDEX[card_id]] += 1
+        np.testing.assert_array_equal(store["purchases"][row, :result.num_players], expected)
+
+    wins_a = sum(r.winner is not None and r.winner in ((0, 2) if r.num_players == 3 else (0,))
+                 for r in results)
+    assert store.wins_of("a") == (wins_a, 8)
+
+
+def test_open_truncates_torn_batch(tmp_path):
+    path = str(tmp_path / "store")
+    store = ResultsStore.open(path)
+    ids = [store.agent_id("a", register=True)] * 2
+    store.append(make_batch(games(range(4)), [ids] * 4))
+    expected = columns(store)
+
+    # обрыв посреди следующей пачки: часть колонок дописана, schema.json — нет
+    batch = make_batch(games(range(4, 6)), [ids] * 2)
+    for name in ("seed", "winner", "purchases"):
+        with open(os.path.join(path, f"{name}.bin"), "ab") as f:
+            f.write(batch[name].tobytes()[:7])
+
+    store = ResultsStore.open(path)
+    assert len(store) == 4
+    for name, array in expected.items():
+        np.testing.assert_array_equal(store[name], array)
+        assert os.path.getsize(os.path.join(path, f"{name}.bin")) == array.nbytes
+
+    store.append(batch)
+    assert list(store["seed"]) == [r.seed for r in games(range(6))]
+
+
+def test_simulate_to_store_resume(tmp_path, monkeypatch):
+    expected = ResultsStore.open(str(tmp_path / "expected"))
+    simulate_to_store(expected, SPECS, 25, games_per_batch=10, workers=0)
+
+    path = str(tmp_path / "run")
+    original = ResultsStore.append
+    calls = [0]
+
+    def append_then_crash(self, batch, job=None, next_game=0):
+        calls[0] += 1
+        if calls[0] == 2:
+            # колонки наполовину дописаны, число строк не обновлено
+            for name in ("seed", "turns"):
+                with open(self._column_path(name), "ab") as f:
+                    f.write(batch[name].tobytes())
+            raise Crash()
+        return original(self, batch, job, next_game)
+
+    with monkeypatch.context() as m:
+        m.setattr(ResultsStore, "append", append_then_crash)
+        with pytest.raises(Crash):
+            simulate_to_store(ResultsStore.open(path), SPECS, 25, games_per_batch=10, workers=0)
+
+    store = ResultsStore.open(path)
+    assert len(store) == 10
+    simulate_to_store(store, SPECS, 25, games_per_batch=10, workers=0)
+    # законченный прогон повторно ничего не дописывает
+    simulate_to_store(ResultsStore.open(path), SPECS, 25, games_per_batch=10, workers=0)
+
+    store = ResultsStore.open(path)
+    assert len(store) == 25
+    for name, array in columns(expected).items():
+        np.testing.assert_array_equal(store[name], array)
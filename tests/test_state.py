@@ -0,0 +1,187 @@
+"""
+GameState: копии и codec не теряют полей, кэши игрока совпадают
+с пересчётом, победитель — тот же, что у полной проверки.
+"""
+
+from random import Random
+import copy
+import pickle
+
+import pytest
+
+from machi_core.agents import RandomBot
+from machi_core.cards import CardVersion
+from machi_core.codec import CODEC_VERSION, decode_state, encode_state
+from machi_core.rules import new_game
+from machi_core.simulation import step
+from machi_core.state import PlayerState
+
+
+ALL_VERSIONS = set(CardVersion)
+CACHED = ("_built_landmarks", "_victory_mask", "_total_establishments", "_assets_value")
+
+
+def game_positions(seed, num_players=4, versions=ALL_VERSIONS):
+    """Все позиции одной партии случайных ботов (включая финальную)."""
+    rng = Random(seed)
+    state = new_game(num_players, versions, rng=rng)
+    bots = [RandomBot(seed=seed * 10 + i) for i in range(num_players)]
+    yield state
+    while not state.done:
+        idx = state.current_player
+        state = step(state, bots[idx].select_action(state, idx), rng)
+        yield state
+
+
+def snapshot(state):
+    """Все поля состояния, с порядком ключей словарей (от него зависит порядок действий)."""
+    return (
+        [
+            (
+                p.name, p.coins,
+                list(p.establishments.items()),
+                list(p.landmarks.items()),
+                [getattr(p, name) for name in CACHED],
+            )
+            for p in state.players
+        ],
+        state.current_player,
+        state.phase,
+        list(state.market.available.items()),
+        state.market.deck.remaining(),
+        state.market.max_unique,
+        state.market.versions,
+        state.last_roll,
+        state.done,
+        state.winner,
+    )
+
+
+def recounted(player):
+    fresh = PlayerState(
+        name=player.name,
+        coins=player.coins,
+        establishments=dict(player.establishments),
+        landmarks=dict(player.landmarks),
+    )
+    return [getattr(fresh, name) for name in CACHED]
+
+
+# ---- копии и codec ----------------------------------------------------------------
+
+@pytest.mark.parametrize("clone", [
+    lambda s: s.copy(),
+    copy.deepcopy,
+    lambda s: decode_state(encode_state(s)),
+    lambda s: pickle.loads(pickle.dumps(s)),
+], ids=["copy", "deepcopy", "codec", "pickle"])
+def test_clone_keeps_every_field(clone):
+    for seed in range(5):
+        for state in game_positions(seed):
+            other = clone(state)
+            assert other == state
+            assert snapshot(other) == snapshot(state)
+
+
+@pytest.mark.parametrize("clone", [lambda s: s.copy(), copy.deepcopy], ids=["copy", "deepcopy"])
+def test_clone_is_independent(clone):
+    state = new_game(3, ALL_VERSIONS, rng=Random(0))
+    before = snapshot(state)
+    other = clone(state)
+
+    other.players[0].coins += 5
+    other.players[0].add_card("ranch")
+    other.players[1].build_landmark("port")
+    card_id = next(iter(other.market.available))
+    other.market.take_one(card_id)
+    other.market.deck.pop()
+
+    assert snapshot(state) == before
+
+
+def test_listeners_not_copied():
+    state = new_game(2, rng=Random(0))
+    state.listeners = [print]
+    assert state.copy().listeners is None
+    assert copy.deepcopy(state).listeners is None
+
+
+def test_pickle_carries_codec_bytes():
+    for state in game_positions(0):
+        data = encode_state(state)
+        payload = pickle.dumps(state)
+        assert data in payload
+        # против полей со строковыми ключами — в разы меньше
+        assert len(payload) * 3 < len(pickle.dumps(snapshot(state)))
+
+
+def test_codec_reads_memoryview_and_checks_version():
+    state = list(game_positions(1))[20]
+    data = encode_state(state)
+    buffer = memoryview(b"\xff" * 7 + data + b"\xff")
+    assert snapshot(decode_state(buffer[7:7 + len(data)])) == snapshot(state)
+
+    with pytest.raises(ValueError):
+        decode_state(bytes([CODEC_VERSION + 1]) + data[1:])
+
+
+# ---- кэши игрока ------------------------------------------------------------------
+
+def test_player_cache_after_buy_build_and_demolition():
+    p = PlayerState(establishments={"wheat_field": 1}, landmarks={"port": False, "train_station": False})
+    p.add_card("ranch", 2)
+    p.add_card("wheat_field")
+    p.build_landmark("port")
+    p.build_landmark("port")          # повторная постройка ничего не меняет
+    assert [getattr(p, name) for name in CACHED] == recounted(p)
+
+    p.remove_card("ranch")
+    p.rebuild_landmark("port")        # снос
+    p.rebuild_landmark("port")
+    p.build_landmark("train_station")
+    assert [getattr(p, name) for name in CACHED] == recounted(p)
+    assert p.built_landmarks == 1
+    assert p.total_establishments == 3
+
+    with pytest.raises(ValueError):
+        p.remove_card("ranch", 5)
+    assert [getattr(p, name) for name in CACHED] == recounted(p)
+
+
+def test_player_cache_matches_recount_in_games(monkeypatch):
+    demolished = []
+    original = PlayerState.rebuild_landmark
+
+    def rebuild_landmark(self, landmark_id):
+        demolished.append(landmark_id)
+        return original(self, landmark_id)
+
+    monkeypatch.setattr(PlayerState, "rebuild_landmark", rebuild_landmark)
+
+    for seed in range(40):
+        for state in game_positions(seed):
+            for p in state.players:
+                assert [getattr(p, name) for name in CACHED] == recounted(p)
+    # в партиях были и покупки, и снос достопримечательностей
+    assert demolished
+
+
+# ---- победитель -------------------------------------------------------------------
+
+def full_check(state):
+    """Проверка победы как до кэшей: все три победные достопримечательности."""
+    for idx, p in enumerate(state.players):
+        if p.has_built("train_station") and p.has_built("shopping_mall") and p.has_built("port"):
+            return idx
+    return None
+
+
+@pytest.mark.parametrize("num_players", [2, 3, 5])
+def test_winner_matches_full_check(num_players):
+    finished = 0
+    for seed in range(30):
+        for state in game_positions(seed, num_players):
+            assert state.check_victory() == full_check(state)
+        assert state.winner == full_check(state)
+        finished += state.winner is not None
+    assert finished
@@ -0,0 +1,79 @@
+"""
+tracing: спаны ходов, фаз и решений, кольцевой буфер и то, что
+rollout'ы внутри решения агента в трассировку не попадают.
+"""
+
+from collections import Counter
+
+import pytest
+
+from machi_core import tracing
+from machi_core.agents import RandomBot
+from machi_core.bots.mc_bot import MonteCarloBot
+from machi_core.simulation import play_game
+
+
+@pytest.fixture
+def tracer():
+    yield tracing.enable()
+    tracing.disable()
+
+
+def span_counts(tracer):
+    return Counter(name for name, *_ in tracer.spans)
+
+
+def test_random_game_spans(tracer):
+    result = play_game([RandomBot(seed=0), RandomBot(seed=1)], seed=3)
+    assert result.winner is not None
+    counts = span_counts(tracer)
+
+    assert set(counts) == {"select_action", "roll", "buy", "turn"}
+    assert counts["select_action"] == result.actions
+    assert counts["roll"] == counts["buy"] == counts["turn"] == result.turns
+
+    # у ходов игроки по очереди, номера ходов подряд
+    turns = [args for name, _, _, _, _, args in tracer.spans if name == "turn"]
+    assert [t["turn"] for t in turns] == list(range(result.turns))
+    assert [t["player"] for t in turns] == [i % 2 for i in range(result.turns)]
+
+    chrome = tracer.to_chrome()
+    complete = [e for e in chrome["traceEvents"] if e["ph"] == "X"]
+    assert len(complete) == len(tracer)
+    assert Counter(e["name"] for e in complete) == counts
+    assert all(e["dur"] >= 0 and e["ts"] >= 0 for e in complete)
+    assert any(e["ph"] == "M" and e["name"] == "thread_name" for e in chrome["traceEvents"])
+
+
+def test_ring_buffer_keeps_latest():
+    tracer = tracing.enable(capacity=50)
+    try:
+        play_game([RandomBot(seed=0), RandomBot(seed=1)], seed=3)
+        assert len(tracer) == 50
+        assert len(tracer.to_chrome()["traceEvents"]) <= 51
+        # последним записан последний ход партии
+        assert tracer.spans[-1][0] in ("turn", "select_action")
+        first = tracer.spans[0]
+        play_game([RandomBot(seed=0), RandomBot(seed=1)], seed=4)
+        assert len(tracer) == 50
+        assert first not in tracer.spans
+    finally:
+        tracing.disable()
+
+
+def test_rollouts_inside_decision_not_traced(tracer):
+    bots = [MonteCarloBot(max_rollouts=20, rollout_turns=10, seed=i, endgame_threshold=None)
+            for i in range(2)]
+    result = play_game(bots, seed=1, max_turns=6)
+    counts = span_counts(tracer)
+    # только сама партия: rollout'ы — тоже партии и решения, но их нет
+    assert counts["select_action"] == result.actions
+    assert counts["roll"] == result.turns
+
+
+def test_disabled_records_nothing():
+    tracer = tracing.enable()
+    tracing.disable()
+    play_game([RandomBot(seed=0), RandomBot(seed=1)], seed=3)
+    assert len(tracer) == 0
+    assert tracing.active() is None
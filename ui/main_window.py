@@ -30,6 +30,7 @@ from PySide6.QtWidgets import (
 
 from machi_core.rules import new_game
 from machi_core.agents import Agent
+from machi_core import tracing
 from machi_core.cards import CardVersion  
 
 from ui.widgets.player_board import PlayerBoard
@@ -68,6 +69,7 @@ class MainWindow(
         self.num_players = num_players
         self._ask_num_players()
         self.game = new_game(self.num_players, {CardVersion.NORMAL, CardVersion.PLUS, CardVersion.SHARP})
+        self._attach_engine_log()
         self._ask_player_names()
 
         # планшеты игроков вокруг стола
@@ -292,6 +294,7 @@ class MainWindow(
             self.num_players,
             {CardVersion.NORMAL, CardVersion.PLUS, CardVersion.SHARP},
         )
+        self._attach_engine_log()
 
         # заново спросить имена
         self._ask_player_names()
@@ -319,6 +322,10 @@ class MainWindow(
     # Обновление UI
     # =====================================================================
     def _refresh_full_ui(self) -> None:
+        with tracing.span("refresh_full_ui", "ui"):
+            self._refresh_full_ui_impl()
+
+    def _refresh_full_ui_impl(self) -> None:
         self._update_all_player_cards()
         self._rebuild_player_areas()
         self._update_market()
@@ -271,15 +271,8 @@ class ActionsMixin:
                 self.game = apply_action(self.game, action)
                 self._append_log(self._describe_non_roll_action(name, action))
 
-            # забираем лог ядра, если он есть
-            if hasattr(self.game, "log"):
-                engine_log = getattr(self.game, "log") or []
-                for line in engine_log:
-                    self._append_log(line)
-                try:
-                    self.game.log.clear()
-                except Exception:
-                    pass
+            # события ядра: доходы, платежи, снос
+            self._flush_engine_log()
 
         except Exception as ex:
             QMessageBox.warning(self, "Ошибка", str(ex))
@@ -4,13 +4,16 @@ from __future__ import annotations
 from typing import TYPE_CHECKING
 
 from PySide6.QtCore import QTimer
-from machi_core.agents import Agent
+from machi_core.agents import Agent, AnytimeAgent, deadline_after, deadline_passed
 from machi_core.rules import legal_actions
+from machi_core import tracing
 
 if TYPE_CHECKING:
     from ui.main_window import MainWindow
 
 BOT_WAIT = 100
+BOT_MOVE_BUDGET = 1.0   # секунд на ход бота
+BOT_POLL = 50           # как часто спрашивать anytime-бота, мс
 
 class BotsMixin:
     def _current_agent(self: "MainWindow") -> Agent | None:
@@ -39,5 +42,25 @@ class BotsMixin:
         if not actions:
             return
 
-        action = agent.select_action(self.game, idx)
+        deadline = deadline_after(BOT_MOVE_BUDGET)
+
+        if isinstance(agent, AnytimeAgent):
+            # думает в фоне, UI не замерзает; забираем ход по дедлайну
+            started = tracing.now()
+            agent.start_thinking(self.game, idx, deadline)
+            QTimer.singleShot(BOT_POLL, lambda: self._poll_bot(agent, deadline, idx, started))
+            return
+
+        action = tracing.select_action(agent, self.game, idx, deadline)
+        self._on_action_clicked(action)
+
+    def _poll_bot(
+        self: "MainWindow", agent: AnytimeAgent, deadline: float, idx: int, started: int,
+    ) -> None:
+        if agent.is_thinking() and not deadline_passed(deadline):
+            QTimer.singleShot(BOT_POLL, lambda: self._poll_bot(agent, deadline, idx, started))
+            return
+
+        action = agent.stop()
+        tracing.thought(agent, idx, started)
         self._on_action_clicked(action)
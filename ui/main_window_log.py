@@ -1,13 +1,47 @@
 # ui/main_window_log.py
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional
+
+from machi_core.cards import get_card_def
+from machi_core.events import Event, EventLog, IncomeEvent, LandmarkEvent, TransferEvent, subscribe
+from machi_core import tracing
 
 if TYPE_CHECKING:
     from ui.main_window import MainWindow
 
 
 class LogMixin:
+    def _attach_engine_log(self: "MainWindow") -> None:
+        # события ядра копим и выводим после действия, следом за его описанием
+        self._engine_log = EventLog()
+        subscribe(self.game, self._engine_log)
+        # ходы и фазы в трассировку, если она включена (tracing.enable)
+        tracing.watch(self.game)
+
+    def _flush_engine_log(self: "MainWindow") -> None:
+        for event in self._engine_log.drain():
+            text = self._describe_engine_event(event)
+            if text:
+                self._append_log(text)
+
+    def _describe_engine_event(self: "MainWindow", event: Event) -> Optional[str]:
+        # покупки и стройку уже описывает _describe_non_roll_action
+        players = self.game.players
+        if isinstance(event, IncomeEvent):
+            card_def = get_card_def(event.card_id)
+            return f"{players[event.player].name} получает {event.amount} монет ({card_def.name})"
+        if isinstance(event, TransferEvent):
+            card_def = get_card_def(event.card_id)
+            return (
+                f"{players[event.from_player].name} платит {event.amount} монет "
+                f"игроку {players[event.to_player].name} ({card_def.name})"
+            )
+        if isinstance(event, LandmarkEvent) and not event.built:
+            card_def = get_card_def(event.landmark_id)
+            return f"{players[event.player].name} сносит достопримечательность: {card_def.name}"
+        return None
+
     def _append_log(self: "MainWindow", text: str) -> None:
         # На экране логов нет, просто печать в консоль
         print(text)